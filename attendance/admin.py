@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Attendance
+from .models import (
+    Attendance, AttendanceAlert, AttendanceArchiveYear, EmployeeDayStatusYear, EmployeeMonthSummary, PunchEvent,
+)
 from .constants import TIME_12HR_FORMAT
 
 
@@ -9,10 +11,10 @@ class AttendanceAdmin(admin.ModelAdmin):
         'employee', 'date', 'get_in_time', 'get_out_time', 
         'get_office_time', 'get_home_time',
         'day_type', 'get_total_time', 'get_extra_time', 
-        'admin_alert', 'is_working_from_home', 'created_at'
+        'admin_alert', 'is_late', 'is_working_from_home', 'created_at'
     )
     list_filter = (
-        'day_type', 'admin_alert', 'is_working_from_home', 'date', 'created_at',
+        'day_type', 'admin_alert', 'is_late', 'is_working_from_home', 'date', 'created_at',
         'employee__department', 'employee__designation'
     )
     search_fields = (
@@ -22,7 +24,7 @@ class AttendanceAdmin(admin.ModelAdmin):
     readonly_fields = (
         'seconds_actual_worked_time', 'seconds_actual_working_time',
         'seconds_extra_time', 'office_time_inside', 'extra_time_status',
-        'office_seconds_worked', 'home_seconds_worked',
+        'office_seconds_worked', 'home_seconds_worked', 'is_late', 'late_minutes',
         'created_at', 'updated_at', 'created_by', 'updated_by'
     )
     
@@ -49,7 +51,7 @@ class AttendanceAdmin(admin.ModelAdmin):
             )
         }),
         ('Alerts & Messages', {
-            'fields': ('admin_alert', 'admin_alert_message', 'day_text', 'text')
+            'fields': ('admin_alert', 'admin_alert_message', ('is_late', 'late_minutes'), 'day_text', 'text')
         }),
         ('System Information', {
             'fields': ('created_at', 'updated_at', 'created_by', 'updated_by'),
@@ -123,3 +125,49 @@ class AttendanceAdmin(admin.ModelAdmin):
         obj.updated_by = request.user
         super().save_model(request, obj, form, change)
 
+
+@admin.register(EmployeeMonthSummary)
+class EmployeeMonthSummaryAdmin(admin.ModelAdmin):
+    list_display = (
+        'employee', 'year', 'month', 'working_days', 'leave_days', 'half_days',
+        'seconds_worked', 'seconds_to_compensate', 'late_days', 'is_stale', 'updated_at'
+    )
+    list_filter = ('year', 'month', 'is_stale')
+    search_fields = ('employee__first_name', 'employee__last_name', 'employee__employee_id')
+    readonly_fields = ('updated_at',)
+
+
+@admin.register(EmployeeDayStatusYear)
+class EmployeeDayStatusYearAdmin(admin.ModelAdmin):
+    list_display = ('employee', 'year', 'is_stale', 'updated_at')
+    list_filter = ('year', 'is_stale')
+    search_fields = ('employee__first_name', 'employee__last_name', 'employee__employee_id')
+    readonly_fields = ('day_bits', 'updated_at')
+
+
+@admin.register(AttendanceArchiveYear)
+class AttendanceArchiveYearAdmin(admin.ModelAdmin):
+    """Archived years are managed with the archive_attendance command"""
+    list_display = ('year', 'row_count', 'archived_at', 'archived_by')
+    readonly_fields = ('year', 'row_count', 'archived_at', 'archived_by')
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(AttendanceAlert)
+class AttendanceAlertAdmin(admin.ModelAdmin):
+    list_display = ('employee', 'date', 'alert_type', 'status', 'reporting_manager', 'company', 'updated_at')
+    list_filter = ('status', 'alert_type', 'company', 'date')
+    search_fields = ('employee__first_name', 'employee__last_name', 'employee__employee_id')
+    readonly_fields = ('created_at', 'updated_at', 'resolved_at')
+    raw_id_fields = ('employee', 'attendance', 'reporting_manager')
+
+
+@admin.register(PunchEvent)
+class PunchEventAdmin(admin.ModelAdmin):
+    list_display = ('employee', 'date', 'event_type', 'location', 'timestamp', 'source', 'compacted_at')
+    list_filter = ('event_type', 'location', 'source', 'date')
+    search_fields = ('employee__first_name', 'employee__last_name', 'employee__employee_id')
+    readonly_fields = ('created_at', 'compacted_at')
+    raw_id_fields = ('employee', 'recorded_by')
@@ -10,4 +10,34 @@ DATETIME_ISO_FORMAT = getattr(settings, 'ATTENDANCE_DATETIME_ISO_FORMAT', '%Y-%m
 DAY_NAME_FORMAT = getattr(settings, 'ATTENDANCE_DAY_NAME_FORMAT', '%A')
 DAY_NUMBER_FORMAT = getattr(settings, 'ATTENDANCE_DAY_NUMBER_FORMAT', '%d')
 ADMIN_ALERT_MESSAGE_MISSING_TIME = "In/Out Time Missing"
+ADMIN_ALERT_MESSAGE_MISSING_DAY = "No Attendance"
 
+
+# Leave statuses treated as approved (legacy rows use upper case)
+APPROVED_LEAVE_STATUSES = ['Approved', 'APPROVED']
+
+# Timesheet statuses whose seconds count towards monthly totals
+COUNTED_TIMESHEET_STATUSES = ['APPROVED', 'PENDING']
+
+# Bulk punch ingestion (device / door-controller exports)
+PUNCH_LOCATIONS = ['OFFICE', 'HOME']
+PUNCH_BATCH_MAX_SIZE = getattr(settings, 'ATTENDANCE_PUNCH_BATCH_MAX_SIZE', 10000)
+PUNCH_BULK_BATCH_SIZE = getattr(settings, 'ATTENDANCE_PUNCH_BULK_BATCH_SIZE', 500)
+
+# Streaming export
+EXPORT_CHUNK_SIZE = getattr(settings, 'ATTENDANCE_EXPORT_CHUNK_SIZE', 2000)
+EXPORT_FORMATS = ['csv', 'ndjson']
+
+# Bulk working-hours updates: employees per transaction
+WORKING_HOURS_EMPLOYEE_BATCH = getattr(settings, 'ATTENDANCE_WORKING_HOURS_EMPLOYEE_BATCH', 50)
+
+# Bulk timesheet approve/reject: most ids accepted per request
+TIMESHEET_BULK_DECISION_MAX_IDS = getattr(settings, 'ATTENDANCE_TIMESHEET_BULK_DECISION_MAX_IDS', 1000)
+
+# Punch event log: 'inline' folds each punch into Attendance in the request,
+# 'deferred' leaves it to `manage.py compact_punch_events`
+PUNCH_EVENT_COMPACTION = getattr(settings, 'ATTENDANCE_PUNCH_EVENT_COMPACTION', 'inline')
+PUNCH_EVENT_COMPACTION_BATCH_SIZE = getattr(settings, 'ATTENDANCE_PUNCH_EVENT_COMPACTION_BATCH_SIZE', 500)
+
+# Team availability ("who's out"): longest date range per request (a quarter)
+TEAM_AVAILABILITY_MAX_DAYS = getattr(settings, 'ATTENDANCE_TEAM_AVAILABILITY_MAX_DAYS', 92)
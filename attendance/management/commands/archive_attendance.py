@@ -0,0 +1,64 @@
+"""
+Management command to move closed years of attendance out of the live table.
+
+Archived rows live in ArchivedAttendance; monthly attendance, month
+summaries, the monthly grid and payroll read them from there
+transparently. Archived years are read-only until restored.
+
+Usage:
+    # Show row counts per year and which years are archived
+    python manage.py archive_attendance --list
+
+    # Archive one or more closed years
+    python manage.py archive_attendance --year 2022 --year 2023
+
+    # Move a year back into the live table
+    python manage.py archive_attendance --year 2022 --restore
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.db.models.functions import ExtractYear
+
+from attendance.models import Attendance, ArchivedAttendance
+from attendance.services import AttendanceArchiveService
+
+
+class Command(BaseCommand):
+    help = 'Archive closed attendance years into the archive table, or restore them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, action='append', help='Year to archive/restore (repeatable)')
+        parser.add_argument('--restore', action='store_true', help='Move the years back into the live table')
+        parser.add_argument('--list', action='store_true', help='Show rows per year in each table')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows moved per transaction (default: 2000)')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            archived = AttendanceArchiveService.archived_years()
+            for model, label in ((Attendance, 'live'), (ArchivedAttendance, 'archive')):
+                counts = model.objects.annotate(y=ExtractYear('date')).values('y').annotate(
+                    rows=Count('id')
+                ).order_by('y')
+                for row in counts:
+                    flag = ' (archived)' if row['y'] in archived else ''
+                    self.stdout.write(f"{label:8} {row['y']}: {row['rows']} rows{flag}")
+            return
+
+        years = sorted(set(options['year'] or []))
+        if not years:
+            raise CommandError('Pass --year (repeatable) or --list')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        for year in years:
+            if options['restore']:
+                moved = AttendanceArchiveService.restore_year(year, chunk_size=options['chunk_size'])
+                self.stdout.write(f"{year}: restored {moved} rows")
+            else:
+                try:
+                    moved = AttendanceArchiveService.archive_year(year, chunk_size=options['chunk_size'])
+                except ValueError as e:
+                    raise CommandError(str(e))
+                self.stdout.write(f"{year}: {moved} rows archived")
+
+        self.stdout.write(self.style.SUCCESS('Done'))
@@ -0,0 +1,98 @@
+"""
+Management command to benchmark the batch attendance calculations against
+the scalar AttendanceCalculationService methods and check they agree.
+
+Usage:
+    python manage.py benchmark_attendance_calculations
+
+    # Smaller run
+    python manage.py benchmark_attendance_calculations --rows 100000
+"""
+import time
+from datetime import timezone as dt_timezone
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from attendance.services import AttendanceCalculationService, HAS_NUMPY
+
+
+class Command(BaseCommand):
+    help = 'Benchmark vectorized vs scalar attendance calculations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Number of rows (default: 1000000)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+
+    def handle(self, *args, **options):
+        if not HAS_NUMPY:
+            raise CommandError('NumPy is not installed')
+        import numpy as np
+
+        rows = options['rows']
+        rng = np.random.default_rng(options['seed'])
+        day_start = np.datetime64('2026-01-05T00:00:00', 'us') + (rng.integers(0, 365, rows) * 86_400_000_000)
+
+        def times(offset_hours, spread_hours, missing_ratio):
+            values = day_start + (offset_hours * 3_600_000_000 + rng.integers(0, spread_hours * 3_600_000_000, rows))
+            values[rng.random(rows) < missing_ratio] = np.datetime64('NaT')
+            return values
+
+        office_in, office_out = times(8, 3, 0.1), times(16, 4, 0.2)
+        home_in, home_out = times(7, 2, 0.9), times(12, 2, 0.9)
+        scheduled = rng.choice([28800, 32400], rows)
+        day_types = rng.choice(['WORKING_DAY', 'WORKING_DAY', 'WORKING_DAY', 'LEAVE_DAY', 'HOLIDAY'], rows)
+
+        self.stdout.write(f'Preparing {rows} rows of Python datetimes...')
+
+        def to_python(values):
+            return [
+                None if v is None else v.replace(tzinfo=dt_timezone.utc)
+                for v in values.astype('datetime64[us]').tolist()
+            ]
+
+        py_office_in, py_office_out = to_python(office_in), to_python(office_out)
+        py_home_in, py_home_out = to_python(home_in), to_python(home_out)
+        py_scheduled = scheduled.tolist()
+        py_day_types = day_types.tolist()
+
+        # Scalar: the per-instance path used by Attendance.save()
+        start = time.perf_counter()
+        scalar = {'worked_seconds': [], 'extra_seconds': [], 'extra_time_status': [], 'admin_alert': []}
+        for i in range(rows):
+            row = SimpleNamespace(
+                office_in_time=py_office_in[i], office_out_time=py_office_out[i],
+                home_in_time=py_home_in[i], home_out_time=py_home_out[i],
+                in_time=None, out_time=None,
+                orignal_total_time=py_scheduled[i], day_type=py_day_types[i],
+                office_working_hours=None,
+            )
+            AttendanceCalculationService.apply_derived_fields(row)
+            scalar['worked_seconds'].append(row.seconds_actual_worked_time)
+            scalar['extra_seconds'].append(row.seconds_extra_time)
+            scalar['extra_time_status'].append(row.extra_time_status)
+            scalar['admin_alert'].append(row.admin_alert)
+        scalar_seconds = time.perf_counter() - start
+
+        # Batch from Python objects (includes datetime64 conversion)
+        start = time.perf_counter()
+        from_lists = AttendanceCalculationService.calculate_batch(
+            py_office_in, py_office_out, py_home_in, py_home_out, py_scheduled, day_types=py_day_types
+        )
+        list_seconds = time.perf_counter() - start
+
+        # Batch from datetime64 columns
+        start = time.perf_counter()
+        from_arrays = AttendanceCalculationService.calculate_batch(
+            office_in, office_out, home_in, home_out, scheduled, day_types=day_types
+        )
+        array_seconds = time.perf_counter() - start
+
+        for result, label in ((from_lists, 'list input'), (from_arrays, 'array input')):
+            for key, expected in scalar.items():
+                if result[key].tolist() != expected:
+                    raise CommandError(f'Mismatch in {key} ({label})')
+
+        self.stdout.write(f'Scalar:              {scalar_seconds:8.3f}s')
+        self.stdout.write(f'Batch (list input):  {list_seconds:8.3f}s  ({scalar_seconds / list_seconds:.1f}x)')
+        self.stdout.write(f'Batch (array input): {array_seconds:8.3f}s  ({scalar_seconds / array_seconds:.1f}x)')
+        self.stdout.write(self.style.SUCCESS(f'Results identical for all {rows} rows'))
@@ -0,0 +1,78 @@
+"""
+Management command to fold pending PunchEvent rows into Attendance.
+
+With ATTENDANCE_PUNCH_EVENT_COMPACTION = 'deferred', check-in/out only
+append punch events; run this as a worker (--loop) or frequently from cron.
+Several workers can run at once: events locked by another are skipped.
+
+Usage:
+    # Drain the pending backlog once
+    python manage.py compact_punch_events
+
+    # Keep running, polling every 5 seconds when idle
+    python manage.py compact_punch_events --loop --sleep 5
+
+    # Rebuild in/out times of a range from the full event log
+    python manage.py compact_punch_events --replay --start-date 2025-12-01 --end-date 2025-12-31
+"""
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance.constants import DATE_FORMAT, PUNCH_EVENT_COMPACTION_BATCH_SIZE
+from attendance.services import PunchEventService
+
+
+class Command(BaseCommand):
+    help = 'Compact pending punch events into attendance rows, or replay a range from the log'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=PUNCH_EVENT_COMPACTION_BATCH_SIZE,
+                            help=f'Events per transaction (default: {PUNCH_EVENT_COMPACTION_BATCH_SIZE})')
+        parser.add_argument('--employee', type=int, action='append', help='Employee ID (repeatable)')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new events')
+        parser.add_argument('--sleep', type=float, default=5, help='Seconds to wait when idle in --loop mode (default: 5)')
+        parser.add_argument('--replay', action='store_true', help='Rebuild punch times of a date range from all events')
+        parser.add_argument('--start-date', type=str, help=f'Replay from date ({DATE_FORMAT})')
+        parser.add_argument('--end-date', type=str, help=f'Replay to date ({DATE_FORMAT})')
+
+    def handle(self, *args, **options):
+        if options['replay']:
+            return self.replay(options)
+
+        total = {"events": 0, "created": 0, "updated": 0}
+        while True:
+            result = PunchEventService.compact(batch_size=options['batch_size'], employee_ids=options['employee'])
+            for key in total:
+                total[key] += result[key]
+            if result['events']:
+                self.stdout.write(
+                    f"{result['events']} events: {result['created']} rows created, {result['updated']} updated"
+                )
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
+
+        self.stdout.write(
+            f"Compacted {total['events']} events: {total['created']} rows created, {total['updated']} updated"
+        )
+        self.stdout.write(self.style.SUCCESS('Done'))
+
+    def replay(self, options):
+        if not (options['start_date'] and options['end_date']):
+            raise CommandError('--replay needs --start-date and --end-date')
+        try:
+            start_date = datetime.strptime(options['start_date'], DATE_FORMAT).date()
+            end_date = datetime.strptime(options['end_date'], DATE_FORMAT).date()
+        except ValueError:
+            raise CommandError(f'Dates must be in {DATE_FORMAT} format')
+        if start_date > end_date:
+            raise CommandError('--start-date must be on or before --end-date')
+
+        result = PunchEventService.replay(start_date, end_date, employee_ids=options['employee'])
+        self.stdout.write(
+            f"Replayed {result['days']} days: {result['created']} rows created, {result['updated']} updated"
+        )
+        self.stdout.write(self.style.SUCCESS('Done'))
@@ -0,0 +1,62 @@
+"""
+Management command to ingest a device punch export.
+
+Usage:
+    python manage.py ingest_punches punches.csv
+
+    # JSON export (list of {"employee_id", "timestamp", "location"})
+    python manage.py ingest_punches punches.json --format json
+
+    # Skip the Slack digest
+    python manage.py ingest_punches punches.csv --no-notify
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from attendance.services import PunchIngestionService
+
+
+class Command(BaseCommand):
+    help = 'Ingest biometric/door-controller punches from a CSV or JSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='Path to the CSV or JSON export')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'json'],
+            help='File format (default: from the file extension)',
+        )
+        parser.add_argument(
+            '--no-notify',
+            action='store_true',
+            help='Do not send the Slack batch digest',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('json' if path.lower().endswith('.json') else 'csv')
+
+        try:
+            with open(path, encoding='utf-8-sig') as f:
+                content = f.read()
+            if file_format == 'json':
+                punches = json.loads(content)
+                if isinstance(punches, dict):
+                    punches = punches.get('punches', [])
+            else:
+                punches = PunchIngestionService.parse_csv(content)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Could not read {path}: {e}')
+
+        result = PunchIngestionService.ingest(punches, notify=not options['no_notify'])
+
+        for error in result['errors']:
+            self.stdout.write(self.style.WARNING(f"Row {error['row']}: {error['message']}"))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Ingested {result['received']} punches: "
+                f"{result['created']} created, {result['updated']} updated, "
+                f"{result['rejected']} rejected"
+            )
+        )
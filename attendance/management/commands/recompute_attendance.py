@@ -0,0 +1,190 @@
+"""
+Management command to recompute derived attendance fields in bulk
+(worked/extra seconds, extra_time_status, admin alerts and day_type).
+
+Rows are sharded by employee, read with values() iterators, computed in
+batch and written back with bulk_update. Progress is checkpointed per
+shard so an interrupted run can be resumed.
+
+Usage:
+    python manage.py recompute_attendance
+
+    # Preview what would change
+    python manage.py recompute_attendance --dry-run --max-diffs 20
+
+    # A date range on 4 worker processes
+    python manage.py recompute_attendance --start-date 2025-01-01 --end-date 2025-12-31 --workers 4
+
+    # Apply the current ATTENDANCE_DEFAULT_TOTAL_TIME_SECONDS to every row
+    python manage.py recompute_attendance --reset-total-time
+
+    # Continue an interrupted run
+    python manage.py recompute_attendance --resume
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from attendance.constants import DATE_FORMAT
+from attendance.models import Attendance
+from attendance.services import AttendanceRecomputeService
+
+
+def _init_worker():
+    """Make sure each worker process opens its own DB connections"""
+    import django
+    django.setup()
+    connections.close_all()
+
+
+def _process_shard(index, employee_ids, options):
+    stats = AttendanceRecomputeService.recompute_shard(employee_ids, **options)
+    connections.close_all()
+    return index, stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute derived attendance fields in parallel, resumable batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start-date', type=str, help=f'From date ({DATE_FORMAT})')
+        parser.add_argument('--end-date', type=str, help=f'To date ({DATE_FORMAT})')
+        parser.add_argument('--employee', type=int, action='append', help='Employee ID (repeatable)')
+        parser.add_argument('--workers', type=int, default=1, help='Worker processes (default: 1, in-process)')
+        parser.add_argument('--shard-size', type=int, default=200, help='Employees per shard (default: 200)')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows per read/write chunk (default: 2000)')
+        parser.add_argument(
+            '--checkpoint',
+            type=str,
+            default='recompute_attendance.checkpoint.json',
+            help='Checkpoint file (default: recompute_attendance.checkpoint.json)',
+        )
+        parser.add_argument('--resume', action='store_true', help='Skip shards already done in the checkpoint')
+        parser.add_argument('--dry-run', action='store_true', help='Report differences without writing')
+        parser.add_argument('--max-diffs', type=int, default=50, help='Row diffs to print in dry-run (default: 50)')
+        parser.add_argument(
+            '--reset-total-time',
+            action='store_true',
+            help='Set orignal_total_time to ATTENDANCE_DEFAULT_TOTAL_TIME_SECONDS before recomputing',
+        )
+
+    def handle(self, *args, **options):
+        start_date = self._parse_date(options['start_date'], 'start-date')
+        end_date = self._parse_date(options['end_date'], 'end-date')
+        dry_run = options['dry_run']
+
+        signature = {
+            'start_date': options['start_date'],
+            'end_date': options['end_date'],
+            'employees': sorted(options['employee'] or []),
+            'reset_total_time': options['reset_total_time'],
+        }
+        checkpoint_path = options['checkpoint']
+        checkpoint = self._load_checkpoint(checkpoint_path, signature) if options['resume'] else None
+
+        if checkpoint:
+            shards = checkpoint['shards']
+            done = set(checkpoint['done'])
+            self.stdout.write(f'Resuming: {len(done)}/{len(shards)} shards already done')
+        else:
+            shards = self._build_shards(options['employee'], start_date, end_date, options['shard_size'])
+            done = set()
+            checkpoint = {'signature': signature, 'shards': shards, 'done': [], 'rows': 0, 'changed': 0}
+
+        shard_options = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'chunk_size': options['chunk_size'],
+            'dry_run': dry_run,
+            'total_time': (
+                getattr(settings, 'ATTENDANCE_DEFAULT_TOTAL_TIME_SECONDS', 32400)
+                if options['reset_total_time'] else None
+            ),
+            'max_diffs': options['max_diffs'] if dry_run else 0,
+        }
+        pending = [(i, shard) for i, shard in enumerate(shards) if i not in done]
+        field_counts = {}
+        diffs = []
+
+        def record(index, stats):
+            checkpoint['rows'] += stats['rows']
+            checkpoint['changed'] += stats['changed']
+            for field, count in stats['fields'].items():
+                field_counts[field] = field_counts.get(field, 0) + count
+            diffs.extend(stats['diffs'][:max(0, options['max_diffs'] - len(diffs))])
+            done.add(index)
+            checkpoint['done'] = sorted(done)
+            if not dry_run:
+                self._save_checkpoint(checkpoint_path, checkpoint)
+            self.stdout.write(
+                f'Shard {index + 1}/{len(shards)}: {stats["rows"]} rows, {stats["changed"]} changed'
+            )
+
+        if options['workers'] > 1 and len(pending) > 1:
+            # Child processes must not inherit the parent's DB connections
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+                futures = [pool.submit(_process_shard, i, shard, shard_options) for i, shard in pending]
+                for future in as_completed(futures):
+                    record(*future.result())
+        else:
+            for i, shard in pending:
+                record(*_process_shard(i, shard, shard_options))
+
+        if dry_run:
+            for diff in diffs:
+                changes = ', '.join(f'{f}: {old} -> {new}' for f, (old, new) in diff['changes'].items())
+                self.stdout.write(f"[{diff['id']}] employee {diff['employee_id']} {diff['date']}: {changes}")
+            for field, count in sorted(field_counts.items()):
+                self.stdout.write(f'  {field}: {count}')
+        elif os.path.exists(checkpoint_path) and len(done) == len(shards):
+            os.remove(checkpoint_path)
+
+        verb = 'Would update' if dry_run else 'Updated'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {checkpoint['changed']} of {checkpoint['rows']} attendance rows"
+            )
+        )
+
+    def _parse_date(self, value, name):
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, DATE_FORMAT).date()
+        except ValueError:
+            raise CommandError(f'Invalid --{name}. Use {DATE_FORMAT}')
+
+    def _build_shards(self, employee_ids, start_date, end_date, shard_size):
+        queryset = Attendance.objects.all()
+        if employee_ids:
+            queryset = queryset.filter(employee_id__in=employee_ids)
+        if start_date:
+            queryset = queryset.filter(date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(date__lte=end_date)
+        ids = list(queryset.order_by('employee_id').values_list('employee_id', flat=True).distinct())
+        return [ids[i:i + shard_size] for i in range(0, len(ids), shard_size)]
+
+    def _load_checkpoint(self, path, signature):
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get('signature') != signature:
+            raise CommandError(
+                f'Checkpoint {path} was written for different arguments; '
+                'run without --resume or delete it'
+            )
+        return checkpoint
+
+    def _save_checkpoint(self, path, checkpoint):
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,54 @@
+"""
+Management command for the nightly missing-day alert sweep.
+
+Opens MISSING_DAY entries in the AttendanceAlert queue for past working
+days without attendance or approved leave, and resolves the ones that no
+longer apply (leave approved later, holiday added, ...). Schedule it
+nightly, e.g. from cron.
+
+Usage:
+    # Yesterday (default)
+    python manage.py sweep_attendance_alerts
+
+    # Re-sweep the last 7 days
+    python manage.py sweep_attendance_alerts --days 7
+
+    # An explicit range for some employees
+    python manage.py sweep_attendance_alerts --start-date 2025-12-01 --end-date 2025-12-31 --employee 12
+"""
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from attendance.constants import DATE_FORMAT
+from attendance.services import AttendanceAlertService
+
+
+class Command(BaseCommand):
+    help = 'Open/resolve missing-day attendance alerts for recent working days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=1, help='Days back from yesterday to sweep (default: 1)')
+        parser.add_argument('--start-date', type=str, help=f'From date ({DATE_FORMAT}), overrides --days')
+        parser.add_argument('--end-date', type=str, help=f'To date ({DATE_FORMAT}, default: yesterday)')
+        parser.add_argument('--employee', type=int, action='append', help='Employee ID (repeatable)')
+
+    def handle(self, *args, **options):
+        yesterday = timezone.now().date() - timedelta(days=1)
+        try:
+            end_date = datetime.strptime(options['end_date'], DATE_FORMAT).date() if options['end_date'] else yesterday
+            start_date = (
+                datetime.strptime(options['start_date'], DATE_FORMAT).date() if options['start_date']
+                else end_date - timedelta(days=max(options['days'], 1) - 1)
+            )
+        except ValueError:
+            raise CommandError(f'Dates must be in {DATE_FORMAT} format')
+        if start_date > end_date:
+            raise CommandError('--start-date must be on or before --end-date')
+
+        result = AttendanceAlertService.sweep(start_date, end_date, employee_ids=options['employee'])
+        self.stdout.write(
+            f"{start_date} to {end_date}: {result['opened']} alerts opened, {result['resolved']} resolved"
+        )
+        self.stdout.write(self.style.SUCCESS('Done'))
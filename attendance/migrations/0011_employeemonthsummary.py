@@ -0,0 +1,39 @@
+# Generated by Django 5.2.9 on 2026-10-17 06:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0010_attendance_leave'),
+        ('employees', '0005_employee_address_line1_2_employee_address_line2_2_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeMonthSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('month', models.IntegerField()),
+                ('working_days', models.IntegerField(default=0)),
+                ('non_working_days', models.IntegerField(default=0)),
+                ('leave_days', models.IntegerField(default=0)),
+                ('half_days', models.IntegerField(default=0)),
+                ('seconds_worked', models.IntegerField(default=0)),
+                ('seconds_extra', models.IntegerField(default=0)),
+                ('seconds_to_compensate', models.IntegerField(default=0)),
+                ('seconds_expected', models.IntegerField(default=0)),
+                ('expected_day_units', models.CharField(blank=True, help_text="Expected half-day units per day of month (0/1/2), used for 'till today' totals", max_length=31)),
+                ('is_stale', models.BooleanField(default=False, help_text='Rebuild on next read')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='month_summaries', to='employees.employee')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['year', 'month'], name='attendance__year_4023ba_idx')],
+                'constraints': [models.UniqueConstraint(fields=('employee', 'year', 'month'), name='unique_employee_month_summary')],
+            },
+        ),
+    ]
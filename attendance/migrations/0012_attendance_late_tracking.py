@@ -0,0 +1,36 @@
+# Generated by Django 5.2.9 on 2026-10-17 06:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0011_employeemonthsummary'),
+        ('employees', '0005_employee_address_line1_2_employee_address_line2_2_and_more'),
+        ('leaves', '0004_leavebalance_rh_pending'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='is_late',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='late_minutes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='employeemonthsummary',
+            name='late_days',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['employee', 'is_late', 'date'], name='attendance__employe_f643b2_idx'),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.9 on 2026-10-17 06:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0012_attendance_late_tracking'),
+        ('employees', '0005_employee_address_line1_2_employee_address_line2_2_and_more'),
+        ('leaves', '0004_leavebalance_rh_pending'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceArchiveYear',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField(unique=True)),
+                ('row_count', models.IntegerField(default=0)),
+                ('archived_at', models.DateTimeField(auto_now=True)),
+                ('archived_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['year'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedAttendance',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('in_time', models.DateTimeField(blank=True, null=True)),
+                ('out_time', models.DateTimeField(blank=True, null=True)),
+                ('office_in_time', models.DateTimeField(blank=True, null=True)),
+                ('office_out_time', models.DateTimeField(blank=True, null=True)),
+                ('home_in_time', models.DateTimeField(blank=True, null=True)),
+                ('home_out_time', models.DateTimeField(blank=True, null=True)),
+                ('office_working_hours', models.CharField(default='09:00', max_length=10)),
+                ('orignal_total_time', models.IntegerField(default=32400)),
+                ('seconds_actual_worked_time', models.IntegerField(default=0)),
+                ('seconds_actual_working_time', models.IntegerField(default=0)),
+                ('seconds_extra_time', models.IntegerField(default=0)),
+                ('office_time_inside', models.IntegerField(default=0)),
+                ('office_seconds_worked', models.IntegerField(default=0)),
+                ('home_seconds_worked', models.IntegerField(default=0)),
+                ('is_late', models.BooleanField(default=False)),
+                ('late_minutes', models.IntegerField(default=0)),
+                ('day_type', models.CharField(choices=[('WORKING_DAY', 'Working Day'), ('HALF_DAY', 'Half Day'), ('LEAVE_DAY', 'Leave Day'), ('HOLIDAY', 'Holiday'), ('WEEKEND_OFF', 'Weekend Off'), ('ABSENT', 'Absent'), ('FUTURE_DAY', 'Future Day'), ('BEFORE_JOINING', 'Before Joining')], default='WORKING_DAY', max_length=20)),
+                ('extra_time_status', models.CharField(blank=True, choices=[('+', 'Overtime'), ('-', 'Undertime'), ('', 'No Extra Time')], default='', max_length=1)),
+                ('admin_alert', models.IntegerField(default=0)),
+                ('admin_alert_message', models.CharField(blank=True, max_length=200)),
+                ('day_text', models.TextField(blank=True)),
+                ('text', models.TextField(blank=True)),
+                ('standup_time', models.DateTimeField(blank=True, null=True)),
+                ('report_time', models.DateTimeField(blank=True, null=True)),
+                ('lunch_start_time', models.DateTimeField(blank=True, null=True)),
+                ('lunch_end_time', models.DateTimeField(blank=True, null=True)),
+                ('is_day_before_joining', models.BooleanField(default=False)),
+                ('is_working_from_home', models.BooleanField(default=False)),
+                ('timesheet_status', models.CharField(choices=[('PENDING', 'Pending'), ('APPROVED', 'Approved'), ('REJECTED', 'Rejected')], default='APPROVED', max_length=10)),
+                ('timesheet_submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('timesheet_approved_at', models.DateTimeField(blank=True, null=True)),
+                ('timesheet_admin_notes', models.TextField(blank=True)),
+                ('tracker_screenshot', models.CharField(blank=True, max_length=500, null=True)),
+                ('entry_type', models.CharField(choices=[('REGULAR', 'Regular'), ('TIMESHEET', 'Timesheet'), ('MANUAL', 'Manual')], default='REGULAR', max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_attendances', to='employees.employee')),
+                ('leave', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='leaves.leave')),
+                ('timesheet_approved_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-date', 'employee'],
+                'indexes': [models.Index(fields=['date'], name='attendance__date_0621f3_idx')],
+                'constraints': [models.UniqueConstraint(fields=('employee', 'date'), name='unique_employee_date_archived_attendance')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.9 on 2026-10-17 06:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0013_attendance_archive'),
+        ('employees', '0005_employee_address_line1_2_employee_address_line2_2_and_more'),
+        ('organizations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('alert_type', models.CharField(choices=[('MISSING_TIME', 'In/Out Time Missing'), ('MISSING_DAY', 'No Attendance')], max_length=20)),
+                ('message', models.CharField(blank=True, max_length=200)),
+                ('status', models.CharField(choices=[('OPEN', 'Open'), ('RESOLVED', 'Resolved')], default='OPEN', max_length=10)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('attendance', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='alerts', to='attendance.attendance')),
+                ('company', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='organizations.company')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_alerts', to='employees.employee')),
+                ('reporting_manager', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='employees.employee')),
+            ],
+            options={
+                'ordering': ['-date', 'employee'],
+                'indexes': [models.Index(fields=['reporting_manager', 'status', 'date'], name='attendance__reporti_960f65_idx'), models.Index(fields=['company', 'status', 'date'], name='attendance__company_a5ffca_idx'), models.Index(fields=['status', 'date'], name='attendance__status_73465f_idx')],
+                'constraints': [models.UniqueConstraint(fields=('employee', 'date'), name='unique_employee_date_attendance_alert')],
+            },
+        ),
+    ]
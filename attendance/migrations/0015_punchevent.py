@@ -0,0 +1,38 @@
+# Generated by Django 5.2.9 on 2026-10-17 06:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0014_attendancealert'),
+        ('employees', '0005_employee_address_line1_2_employee_address_line2_2_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PunchEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('event_type', models.CharField(choices=[('IN', 'Check In'), ('OUT', 'Check Out'), ('STANDUP', 'Standup'), ('REPORT', 'Report'), ('LUNCH_START', 'Lunch Start'), ('LUNCH_END', 'Lunch End')], max_length=20)),
+                ('location', models.CharField(blank=True, choices=[('OFFICE', 'Office'), ('HOME', 'Home')], max_length=10)),
+                ('timestamp', models.DateTimeField()),
+                ('is_working_from_home', models.BooleanField(default=False)),
+                ('notes', models.TextField(blank=True)),
+                ('source', models.CharField(choices=[('API', 'API'), ('SLACK', 'Slack')], default='API', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('compacted_at', models.DateTimeField(blank=True, null=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='punch_events', to='employees.employee')),
+                ('recorded_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['timestamp', 'id'],
+                'indexes': [models.Index(fields=['employee', 'date', 'timestamp'], name='attendance__employe_751767_idx'), models.Index(fields=['compacted_at', 'id'], name='attendance__compact_0af198_idx')],
+            },
+        ),
+    ]
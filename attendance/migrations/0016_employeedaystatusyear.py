@@ -0,0 +1,29 @@
+# Generated by Django 5.2.9 on 2026-10-17 06:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0015_punchevent'),
+        ('employees', '0005_employee_address_line1_2_employee_address_line2_2_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeDayStatusYear',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('day_bits', models.BinaryField(max_length=92)),
+                ('is_stale', models.BooleanField(default=False, help_text='Rebuild on next read')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='day_status_years', to='employees.employee')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('employee', 'year'), name='unique_employee_day_status_year')],
+            },
+        ),
+    ]
@@ -1,10 +1,10 @@
 from django.db import models
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from django.conf import settings
 from employees.models import Employee
 from auth_app.models import User
-from .services import AttendanceCalculationService
-from .constants import ADMIN_ALERT_MESSAGE_MISSING_TIME
+from .services import AttendanceCalculationService, AttendanceArchiveService, AttendanceRecomputeService
 
 
 class Attendance(models.Model):
@@ -63,6 +63,10 @@ class Attendance(models.Model):
     office_seconds_worked = models.IntegerField(default=0)
     home_seconds_worked = models.IntegerField(default=0)
 
+    # Late arrival (office check-in after the office_working_hours start)
+    is_late = models.BooleanField(default=False)
+    late_minutes = models.IntegerField(default=0)
+
     day_type = models.CharField(
         max_length=20,
         choices=DAY_TYPE_CHOICES,
@@ -161,12 +165,53 @@ class Attendance(models.Model):
             models.Index(fields=['employee', 'date']),
             models.Index(fields=['date']),
             models.Index(fields=['day_type']),
+            models.Index(fields=['employee', 'is_late', 'date']),
         ]
 
     def __str__(self):
         return f"{self.employee.get_full_name()} - {self.date}"
 
+    # Inputs of AttendanceCalculationService.apply_derived_fields()
+    CALCULATION_FIELDS = (
+        'office_in_time', 'office_out_time', 'home_in_time', 'home_out_time',
+        'in_time', 'out_time', 'orignal_total_time', 'office_working_hours', 'day_type',
+    )
+    # Changing these also re-runs the unique/FK checks of full_clean()
+    KEY_FIELDS = ('employee_id', 'date')
+    TRACKED_FIELDS = tuple(dict.fromkeys(
+        CALCULATION_FIELDS + tuple(AttendanceRecomputeService.DERIVED_FIELDS) + KEY_FIELDS
+    ))
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Stored lateness, so signals can adjust the monthly late counter by the change
+        instance._loaded_is_late = instance.__dict__.get('is_late')
+        instance._snapshot_tracked_fields()
+        return instance
+
+    def _snapshot_tracked_fields(self):
+        self._loaded_values = {f: self.__dict__[f] for f in self.TRACKED_FIELDS if f in self.__dict__}
+
+    def get_dirty_fields(self):
+        """
+        Tracked fields (times, derived values, employee/date) changed since
+        the row was loaded or last saved; all of them for new instances.
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if self._state.adding or loaded is None:
+            return set(self.TRACKED_FIELDS)
+        return {
+            f for f in self.TRACKED_FIELDS
+            if f not in loaded or self.__dict__.get(f) != loaded[f]
+        }
+
     def clean(self):
+        # Rows already in this table are in an open year unless the date moves
+        date_changed = 'date' in self.get_dirty_fields()
+        if self.date and date_changed and AttendanceArchiveService.is_archived(self.date.year):
+            raise ValidationError(f"Attendance for {self.date.year} is archived and read-only.")
+
         if self.in_time and self.out_time and self.out_time < self.in_time:
             raise ValidationError("Out time cannot be before in time.")
 
@@ -183,44 +228,361 @@ class Attendance(models.Model):
                 raise ValidationError(f"{label} out time must be timezone-aware.")
 
     def save(self, *args, **kwargs):
-        self.office_seconds_worked = AttendanceCalculationService.calculate_location_seconds(
-            self.office_in_time, self.office_out_time
-        )
-        self.home_seconds_worked = AttendanceCalculationService.calculate_location_seconds(
-            self.home_in_time, self.home_out_time
-        )
-
-        total_seconds = AttendanceCalculationService.calculate_total_worked_seconds(self)
-
-        self.in_time = AttendanceCalculationService.get_earliest_checkin(self)
-        self.out_time = AttendanceCalculationService.get_latest_checkout(self)
-
-        if total_seconds:
-            self.seconds_actual_worked_time = total_seconds
-            self.seconds_actual_working_time = total_seconds
-            self.office_time_inside = self.office_seconds_worked
-            self.seconds_extra_time = AttendanceCalculationService.calculate_extra_seconds(
-                total_seconds, self.orignal_total_time
+        """
+        Derived fields are recomputed and validated only when a tracked field
+        changed (see get_dirty_fields), so saves touching e.g. leave, notes or
+        timesheet status cost a single UPDATE. With update_fields, only
+        changes among those fields count, and derived fields are added to
+        the write when recomputed.
+        """
+        dirty = self.get_dirty_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            names = set(update_fields)
+            dirty = {f for f in dirty if f in names or f.removesuffix('_id') in names}
+
+        if dirty:
+            AttendanceCalculationService.apply_derived_fields(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(AttendanceRecomputeService.DERIVED_FIELDS)
+            if self._state.adding or dirty & set(self.KEY_FIELDS):
+                self.full_clean()
+            else:
+                # Only the changed fields (no FK lookups or unique query) plus clean()
+                self.clean_fields(exclude=[
+                    field.name for field in self._meta.concrete_fields
+                    if field.attname not in dirty and field.attname not in AttendanceRecomputeService.DERIVED_FIELDS
+                ])
+                self.clean()
+        super().save(*args, **kwargs)
+        self._snapshot_tracked_fields()
+
+
+class EmployeeMonthSummary(models.Model):
+    """
+    Per-employee monthly rollup behind monthSummary / compensationSummary.
+    Maintained by attendance, leave and holiday signals (see MonthSummaryService).
+    """
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name='month_summaries'
+    )
+    year = models.IntegerField()
+    month = models.IntegerField()
+
+    # Day counters (same buckets as the monthly sheet)
+    working_days = models.IntegerField(default=0)
+    non_working_days = models.IntegerField(default=0)
+    leave_days = models.IntegerField(default=0)
+    half_days = models.IntegerField(default=0)
+
+    # Time totals (APPROVED/PENDING timesheets only)
+    seconds_worked = models.IntegerField(default=0)
+    seconds_extra = models.IntegerField(default=0)
+    seconds_to_compensate = models.IntegerField(default=0)
+    seconds_expected = models.IntegerField(default=0)
+    late_days = models.IntegerField(default=0)
+    expected_day_units = models.CharField(
+        max_length=31,
+        blank=True,
+        help_text="Expected half-day units per day of month (0/1/2), used for 'till today' totals"
+    )
+
+    is_stale = models.BooleanField(default=False, help_text="Rebuild on next read")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['employee', 'year', 'month'],
+                name='unique_employee_month_summary'
             )
-            self.extra_time_status = AttendanceCalculationService.extra_time_status(
-                self.seconds_extra_time
+        ]
+        indexes = [
+            models.Index(fields=['year', 'month']),
+        ]
+
+    def __str__(self):
+        return f"{self.employee.get_full_name()} - {self.month}/{self.year}"
+
+    def expected_seconds_until(self, day):
+        """Expected working seconds from the 1st up to and including `day`"""
+        default_total_time = getattr(settings, 'ATTENDANCE_DEFAULT_TOTAL_TIME_SECONDS', 32400)
+        units = sum(int(u) for u in self.expected_day_units[:day])
+        return int(units * default_total_time / 2)
+
+
+class EmployeeDayStatusYear(models.Model):
+    """
+    Compact per-employee-year day status behind the team availability view.
+
+    `day_bits` packs a 2-bit code per day of the year (see
+    DayStatusBitmapService.CODES) as two bit planes of 46 bytes: present
+    (completed session), full-day leave or half-day leave. Holidays,
+    weekends, joining date and absences are derived at read time from the
+    calendar, so only attendance and leave writes touch the row.
+    """
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name='day_status_years'
+    )
+    year = models.IntegerField()
+    day_bits = models.BinaryField(max_length=92)
+    is_stale = models.BooleanField(default=False, help_text="Rebuild on next read")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['employee', 'year'],
+                name='unique_employee_day_status_year'
             )
-        else:
-            self.seconds_actual_worked_time = 0
-            self.seconds_actual_working_time = 0
-            self.office_time_inside = 0
-            self.seconds_extra_time = 0
-            self.extra_time_status = ''
-
-        if AttendanceCalculationService.should_flag_admin_alert(self):
-            self.admin_alert = 1
-            self.admin_alert_message = ADMIN_ALERT_MESSAGE_MISSING_TIME
-        else:
-            self.admin_alert = 0
-            self.admin_alert_message = ""
-
-        self.full_clean()
-        super().save(*args, **kwargs)
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.year}"
+
+
+class AttendanceArchiveYear(models.Model):
+    """A closed year whose attendance rows live in ArchivedAttendance"""
+    year = models.IntegerField(unique=True)
+    row_count = models.IntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now=True)
+    archived_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+
+    class Meta:
+        ordering = ['year']
+
+    def __str__(self):
+        return f"Attendance {self.year} (archived)"
+
+
+class ArchivedAttendance(models.Model):
+    """
+    Cold copy of Attendance rows for archived years, same columns and ids.
+    Read-only: rows are moved here (and back) by AttendanceArchiveService;
+    AttendanceArchiveService.queryset_for_range() picks the table to read.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name='archived_attendances'
+    )
+    date = models.DateField()
+
+    in_time = models.DateTimeField(null=True, blank=True)
+    out_time = models.DateTimeField(null=True, blank=True)
+    office_in_time = models.DateTimeField(null=True, blank=True)
+    office_out_time = models.DateTimeField(null=True, blank=True)
+    home_in_time = models.DateTimeField(null=True, blank=True)
+    home_out_time = models.DateTimeField(null=True, blank=True)
+
+    office_working_hours = models.CharField(max_length=10, default='09:00')
+    orignal_total_time = models.IntegerField(default=32400)
+
+    seconds_actual_worked_time = models.IntegerField(default=0)
+    seconds_actual_working_time = models.IntegerField(default=0)
+    seconds_extra_time = models.IntegerField(default=0)
+    office_time_inside = models.IntegerField(default=0)
+    office_seconds_worked = models.IntegerField(default=0)
+    home_seconds_worked = models.IntegerField(default=0)
+    is_late = models.BooleanField(default=False)
+    late_minutes = models.IntegerField(default=0)
+
+    day_type = models.CharField(max_length=20, choices=Attendance.DAY_TYPE_CHOICES, default='WORKING_DAY')
+    extra_time_status = models.CharField(
+        max_length=1, choices=Attendance.EXTRA_TIME_STATUS_CHOICES, default='', blank=True
+    )
+
+    admin_alert = models.IntegerField(default=0)
+    admin_alert_message = models.CharField(max_length=200, blank=True)
+    day_text = models.TextField(blank=True)
+    text = models.TextField(blank=True)
+
+    standup_time = models.DateTimeField(null=True, blank=True)
+    report_time = models.DateTimeField(null=True, blank=True)
+    lunch_start_time = models.DateTimeField(null=True, blank=True)
+    lunch_end_time = models.DateTimeField(null=True, blank=True)
+
+    is_day_before_joining = models.BooleanField(default=False)
+    is_working_from_home = models.BooleanField(default=False)
+
+    timesheet_status = models.CharField(
+        max_length=10, choices=Attendance.TIMESHEET_STATUS_CHOICES, default='APPROVED'
+    )
+    timesheet_submitted_at = models.DateTimeField(null=True, blank=True)
+    timesheet_approved_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    timesheet_approved_at = models.DateTimeField(null=True, blank=True)
+    timesheet_admin_notes = models.TextField(blank=True)
+    tracker_screenshot = models.CharField(max_length=500, null=True, blank=True)
+
+    entry_type = models.CharField(max_length=20, choices=Attendance.ENTRY_TYPE_CHOICES, default='REGULAR')
+
+    leave = models.ForeignKey(
+        'leaves.Leave', on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    updated_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+
+    class Meta:
+        ordering = ['-date', 'employee']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['employee', 'date'],
+                name='unique_employee_date_archived_attendance'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+
+    def __str__(self):
+        return f"{self.employee.get_full_name()} - {self.date} (archived)"
+
+
+class AttendanceAlert(models.Model):
+    """
+    Open/resolved attendance alerts per employee-day, the managers' inbox.
+    MISSING_TIME alerts follow Attendance.admin_alert on every write,
+    MISSING_DAY alerts come from the nightly sweep_attendance_alerts run.
+    reporting_manager and company are copied from the employee so the inbox
+    is a single indexed read (see AttendanceAlertService).
+    """
+    ALERT_TYPE_CHOICES = [
+        ('MISSING_TIME', 'In/Out Time Missing'),
+        ('MISSING_DAY', 'No Attendance'),
+    ]
+    STATUS_CHOICES = [
+        ('OPEN', 'Open'),
+        ('RESOLVED', 'Resolved'),
+    ]
+
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name='attendance_alerts'
+    )
+    date = models.DateField()
+    attendance = models.ForeignKey(
+        Attendance,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='alerts'
+    )
+    reporting_manager = models.ForeignKey(
+        Employee,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    company = models.ForeignKey(
+        'organizations.Company',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    alert_type = models.CharField(max_length=20, choices=ALERT_TYPE_CHOICES)
+    message = models.CharField(max_length=200, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='OPEN')
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date', 'employee']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['employee', 'date'],
+                name='unique_employee_date_attendance_alert'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['reporting_manager', 'status', 'date']),
+            models.Index(fields=['company', 'status', 'date']),
+            models.Index(fields=['status', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.employee.get_full_name()} - {self.date} {self.alert_type} ({self.status})"
+
+
+class PunchEvent(models.Model):
+    """
+    Append-only log of individual punches (check-in/out, Slack keywords).
+    Writers only INSERT here; PunchEventService.compact() folds pending
+    events into the day's Attendance row and stamps compacted_at. The log
+    is kept, so a day can be replayed from its events.
+    """
+    EVENT_TYPE_CHOICES = [
+        ('IN', 'Check In'),
+        ('OUT', 'Check Out'),
+        ('STANDUP', 'Standup'),
+        ('REPORT', 'Report'),
+        ('LUNCH_START', 'Lunch Start'),
+        ('LUNCH_END', 'Lunch End'),
+    ]
+    LOCATION_CHOICES = [
+        ('OFFICE', 'Office'),
+        ('HOME', 'Home'),
+    ]
+    SOURCE_CHOICES = [
+        ('API', 'API'),
+        ('SLACK', 'Slack'),
+    ]
+
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name='punch_events'
+    )
+    date = models.DateField()
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPE_CHOICES)
+    location = models.CharField(max_length=10, choices=LOCATION_CHOICES, blank=True)
+    timestamp = models.DateTimeField()
+    is_working_from_home = models.BooleanField(default=False)
+    notes = models.TextField(blank=True)
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES, default='API')
+    recorded_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    compacted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['timestamp', 'id']
+        indexes = [
+            models.Index(fields=['employee', 'date', 'timestamp']),
+            models.Index(fields=['compacted_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.date} {self.event_type} {self.location} @ {self.timestamp}"
 
 
 # =========================================================
@@ -1,7 +1,7 @@
 from rest_framework import serializers
 import os
-from .models import Attendance
-from datetime import datetime
+from .models import Attendance, AttendanceAlert
+from datetime import datetime, timedelta
 from calendar import monthrange
 from django.conf import settings
 from django.utils import formats
@@ -9,6 +9,7 @@ from .constants import (
     DATE_FORMAT, TIME_12HR_FORMAT, DAY_NAME_FORMAT, DAY_NUMBER_FORMAT,
     DATETIME_ISO_FORMAT, ADMIN_ALERT_MESSAGE_MISSING_TIME
 )
+from .services import AttendanceCalculationService, MonthSummaryService, get_leave_for_date, resolve_leave_info
 
 
 def format_seconds_to_time(seconds):
@@ -93,39 +94,6 @@ def format_datetime_to_iso(dt):
     return dt_utc.strftime(DATETIME_ISO_FORMAT)
 
 
-def get_leave_for_date(date, leaves_list):
-    """
-    Find leave that applies to a specific date.
-    Always returns the most recent application (highest ID).
-    Returns: (leave_object, is_rh, is_partial, partial_type)
-    """
-    applicable_leaves = []
-    for leave in leaves_list:
-        if leave.from_date <= date <= leave.to_date:
-            applicable_leaves.append(leave)
-            
-    if not applicable_leaves:
-        return (None, False, False, None)
-
-    # Sort by ID descending to get the most recent application first
-    applicable_leaves.sort(key=lambda l: l.id, reverse=True)
-    
-    leave = applicable_leaves[0]
-    
-    # Check if date is a Restricted Holiday
-    is_rh = False
-    if leave.leave_type == 'Restricted Holiday' and leave.rh_dates:
-        rh_date_strings = [str(d) for d in leave.rh_dates]
-        if str(date) in rh_date_strings:
-            is_rh = True
-            
-    # Check for partial leave
-    is_partial = bool(leave.day_status)
-    partial_type = leave.day_status
-    
-    return (leave, is_rh, is_partial, partial_type)
-
-
 class AttendanceListSerializer(serializers.ModelSerializer):
     """Lightweight serializer for attendance lists"""
     employee_name = serializers.CharField(source='employee.get_full_name', read_only=True)
@@ -155,6 +123,21 @@ class AttendanceListSerializer(serializers.ModelSerializer):
         return ", ".join(parts) if parts else ""
 
 
+class AttendanceAlertSerializer(serializers.ModelSerializer):
+    """Entry in the managers' attendance alert inbox"""
+    employee_name = serializers.CharField(source='employee.get_full_name', read_only=True)
+    employee_id = serializers.CharField(source='employee.employee_id', read_only=True)
+    
+    class Meta:
+        model = AttendanceAlert
+        fields = [
+            'id', 'employee', 'employee_id', 'employee_name', 'date',
+            'attendance', 'alert_type', 'message', 'status', 'resolved_at',
+            'reporting_manager', 'company', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
 class AttendanceDetailSerializer(serializers.ModelSerializer):
     """Detailed serializer matching API response format"""
     # Computed date fields
@@ -197,6 +180,7 @@ class AttendanceDetailSerializer(serializers.ModelSerializer):
             'day_type', 'extra_time_status',
             # Alerts
             'admin_alert', 'admin_alert_message',
+            'is_late', 'late_minutes',
             # Messages
             'day_text', 'text',
             # Flags
@@ -305,6 +289,22 @@ class AttendanceCreateUpdateSerializer(serializers.ModelSerializer):
             if data['out_time'] < data['in_time']:
                 raise serializers.ValidationError("Check-out time cannot be before check-in time.")
         return data
+    
+    def _classify_and_save(self, attendance):
+        """Set day_type (from the fresh in/out times) before the one save()"""
+        from django.utils import timezone
+        AttendanceCalculationService.apply_derived_fields(attendance)
+        AttendanceCalculationService.determine_day_type(attendance, today=timezone.now().date())
+        attendance.save()
+        return attendance
+    
+    def create(self, validated_data):
+        return self._classify_and_save(Attendance(**validated_data))
+    
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        return self._classify_and_save(instance)
 
 
 class CheckInSerializer(serializers.Serializer):
@@ -460,38 +460,34 @@ class MonthlyAttendanceSerializer(serializers.Serializer):
     data = serializers.DictField()
     
     @staticmethod
-    def serialize_monthly_data(attendance_records, employee, month, year, holidays_list, leaves_list):
-        """Create monthly attendance data structure matching API format"""
+    def serialize_monthly_data(attendance_records, employee, month, year, holidays_list, leaves_list, summary=None):
+        """
+        Create monthly attendance data structure matching API format.
+        monthSummary / compensationSummary come from `summary` (an
+        EmployeeMonthSummary); it is built in memory when not supplied.
+        Pass holidays_list=None to read holidays from the shared WorkCalendar.
+        """
         from django.utils import timezone
-        from holidays.models import Holiday
-        from leaves.models import Leave
+        from holidays.services import WorkCalendar
         
         # Get all days in the month
         num_days = monthrange(year, month)[1]
         today = timezone.now().date()
         
-        # Get holidays for the month
-        month_holidays = Holiday.objects.filter(
-            date__year=year,
-            date__month=month,
-            is_active=True
-        ).values_list('date', 'name')
-        holiday_dates = {h[0]: h[1] for h in month_holidays}
+        # Holidays for the month (already filtered to active ones by the caller)
+        if holidays_list is None:
+            holiday_dates = WorkCalendar.holidays_between(
+                datetime(year, month, 1).date(), datetime(year, month, num_days).date()
+            )
+        else:
+            holiday_dates = {h.date: h.name for h in holidays_list}
+        leaves_list = list(leaves_list)
         
         # Create attendance map
         attendance_map = {rec.date: rec for rec in attendance_records}
         
         # Build attendance array for all days in month
         attendance_array = []
-        total_seconds_worked = 0
-        total_seconds_extra = 0
-        seconds_to_compensate = 0
-        
-        # Counters for the summary
-        working_days_count = 0
-        non_working_days_count = 0
-        leave_days_count = 0
-        half_days_count = 0
         
         for day in range(1, num_days + 1):
             current_date = datetime(year, month, day).date()
@@ -505,59 +501,12 @@ class MonthlyAttendanceSerializer(serializers.Serializer):
             attendance = attendance_map.get(current_date)
             
             # Get leave info: Prioritize direct link if available, otherwise manual lookup
-            leave = getattr(attendance, 'leave', None) if attendance else None
-            if leave:
-                # Direct link exists - use it
-                is_rh = leave.leave_type == 'Restricted Holiday'
-                is_partial = bool(leave.day_status)
-                partial_type = leave.day_status
-                leave_info = (leave, is_rh, is_partial, partial_type)
-            else:
-                # Fallback to manual date-based lookup for records before the link was added
-                leave_info = get_leave_for_date(current_date, leaves_list)
-                leave, is_rh, is_partial, partial_type = leave_info
+            leave, is_rh, is_partial, partial_type = resolve_leave_info(attendance, current_date, leaves_list)
             
             # Determine day type
-            if is_before_joining:
-                day_type = "BEFORE_JOINING"
-                non_working_days_count += 1
-            elif is_holiday:
-                day_type = "HOLIDAY"
-                non_working_days_count += 1
-            elif is_weekend:
-                day_type = "WEEKEND_OFF"
-                non_working_days_count += 1
-            elif leave:
-                leave_status = getattr(leave, 'status', '')
-                if leave_status in ['Approved', 'APPROVED']:
-                    if is_partial:
-                        day_type = "WORKING_DAY"
-                        half_days_count += 1
-                        working_days_count += 1
-                    else:
-                        day_type = "LEAVE_DAY"
-                        leave_days_count += 1
-                else:
-                    # If leave is pending/rejected, it's still a working day or absent
-                    if is_future:
-                        day_type = "FUTURE_DAY"
-                        working_days_count += 1
-                    elif attendance and ((attendance.office_in_time and attendance.office_out_time) or (attendance.home_in_time and attendance.home_out_time)):
-                        day_type = "WORKING_DAY"
-                        working_days_count += 1
-                    else:
-                        day_type = "ABSENT" if not is_future else "FUTURE_DAY"
-                        working_days_count += 1
-            elif is_future:
-                day_type = "FUTURE_DAY"
-                working_days_count += 1
-            elif attendance and ((attendance.office_in_time and attendance.office_out_time) or (attendance.home_in_time and attendance.home_out_time)):
-                day_type = "WORKING_DAY"
-                working_days_count += 1
-            else:
-                # Past day with no check-in and no leave
-                day_type = "ABSENT"
-                working_days_count += 1
+            day_type, _ = AttendanceCalculationService.classify_month_day(
+                current_date, attendance, leave, is_partial, is_holiday, employee.joining_date, today
+            )
             
             # Default working hours
             default_office_hours = getattr(settings, 'ATTENDANCE_DEFAULT_WORKING_HOURS', '09:00')
@@ -572,13 +521,6 @@ class MonthlyAttendanceSerializer(serializers.Serializer):
                 home_out_time_str = format_datetime_to_iso(attendance.home_out_time) if attendance.home_out_time else ""
                 total_time_str = format_seconds_to_hms(attendance.seconds_actual_worked_time)
                 extra_time_str = format_seconds_to_hms(attendance.seconds_extra_time, include_sign=True)
-                
-                timesheet_status = getattr(attendance, 'timesheet_status', None)
-                if timesheet_status is None or timesheet_status in ['APPROVED', 'PENDING']:
-                    total_seconds_worked += attendance.seconds_actual_worked_time
-                    total_seconds_extra += attendance.seconds_extra_time
-                    if attendance.seconds_extra_time < 0:
-                        seconds_to_compensate += abs(attendance.seconds_extra_time)
             else:
                 office_hours = default_office_hours
                 total_time = default_total_time
@@ -667,44 +609,18 @@ class MonthlyAttendanceSerializer(serializers.Serializer):
             }
             attendance_array.append(day_record)
         
-        # Calculate summaries with "Till Today" logic
-        compensation_time_str = format_seconds_to_hms(seconds_to_compensate)
-        actual_working_hours = format_seconds_to_hours_mins(total_seconds_worked)
-        
-        calculation_limit_date = today if (year == today.year and month == today.month) else datetime(year, month, num_days).date()
-        total_working_days_expected = 0.0
+        # Summaries with "Till Today" logic
+        if summary is None:
+            summary = MonthSummaryService.build(
+                employee, year, month, attendance_map, set(holiday_dates), leaves_list, today=today
+            )
         
-        for day in range(1, num_days + 1):
-            current_date = datetime(year, month, day).date()
-            if current_date > calculation_limit_date:
-                continue
-                
-            is_weekend = current_date.weekday() >= 5
-            is_holiday = current_date in holiday_dates
-            is_before_joining = employee.joining_date and current_date < employee.joining_date
-            
-            if is_before_joining or is_weekend or is_holiday:
-                continue
-            
-            # Get leave info: Direct link or fallback
-            l = getattr(attendance_map.get(current_date), 'leave', None)
-            if l:
-                i_rh = l.leave_type == 'Restricted Holiday'
-                i_partial = bool(l.day_status)
-                p_type = l.day_status
-            else:
-                l_info = get_leave_for_date(current_date, leaves_list)
-                l, i_rh, i_partial, p_type = l_info
-            
-            l_status = getattr(l, 'status', '') if l else ''
-            
-            if l and l_status in ['Approved', 'APPROVED']:
-                if i_partial: total_working_days_expected += 0.5
-                # Full day leave (including RH) = 0 hours expected
-            else:
-                total_working_days_expected += 1.0
+        total_seconds_worked = summary.seconds_worked
+        seconds_to_compensate = summary.seconds_to_compensate
+        compensation_time_str = format_seconds_to_hms(seconds_to_compensate)
         
-        total_expected_seconds = int(total_working_days_expected * default_total_time)
+        limit_day = today.day if (year == today.year and month == today.month) else num_days
+        total_expected_seconds = summary.expected_seconds_until(limit_day)
         total_working_hours = format_seconds_to_hms(total_expected_seconds)
         actual_working_hours_formatted = format_seconds_to_hms(total_seconds_worked)
         
@@ -733,10 +649,10 @@ class MonthlyAttendanceSerializer(serializers.Serializer):
                 "completed_working_hours": actual_working_hours_formatted,
                 "pending_working_hours": pending_working_hours,
                 "total_working_hours": total_working_hours,
-                "WORKING_DAY": working_days_count,
-                "NON_WORKING_DAY": non_working_days_count,
-                "LEAVE_DAY": leave_days_count,
-                "HALF_DAY": half_days_count,
+                "WORKING_DAY": summary.working_days,
+                "NON_WORKING_DAY": summary.non_working_days,
+                "LEAVE_DAY": summary.leave_days,
+                "HALF_DAY": summary.half_days,
                 "admin_alert": "",
                 "admin_alert_message": "",
                 "seconds_actual_working_hours": total_expected_seconds,
@@ -767,16 +683,16 @@ class WeeklyTimesheetSubmitSerializer(serializers.Serializer):
     
     def validate_date(self, value):
         """Validate date is not weekend or holiday"""
-        from holidays.models import Holiday
+        from holidays.services import WorkCalendar
         
         # Check if date is weekend
         if value.weekday() >= 5:  # Saturday=5, Sunday=6
             raise serializers.ValidationError("Cannot submit timesheet for weekends.")
         
         # Check if date is a holiday
-        if Holiday.objects.filter(date=value, is_active=True).exists():
-            holiday = Holiday.objects.get(date=value, is_active=True)
-            raise serializers.ValidationError(f"Cannot submit timesheet for holiday: {holiday.name}")
+        holiday_name = WorkCalendar.holiday_name(value)
+        if holiday_name:
+            raise serializers.ValidationError(f"Cannot submit timesheet for holiday: {holiday_name}")
         
         return value
     
@@ -868,6 +784,34 @@ class WeeklyTimesheetSubmitSerializer(serializers.Serializer):
         return timezone.make_aware(dt)
 
 
+class WeeklyTimesheetBatchSubmitSerializer(serializers.Serializer):
+    """Serializer for submitting a whole week of timesheet entries at once"""
+    entries = WeeklyTimesheetSubmitSerializer(many=True)
+    
+    def validate_entries(self, value):
+        """One entry per date, all in the same Monday-Sunday week; home times parsed"""
+        if not value:
+            raise serializers.ValidationError("At least one entry is required.")
+        dates = [entry['date'] for entry in value]
+        if len(set(dates)) != len(dates):
+            raise serializers.ValidationError("Each date can only be submitted once.")
+        if len({d - timedelta(days=d.weekday()) for d in dates}) > 1:
+            raise serializers.ValidationError("All entries must belong to the same week.")
+        
+        child = self.fields['entries'].child
+        for entry in value:
+            try:
+                float(entry['total_time'])
+            except ValueError:
+                raise serializers.ValidationError(
+                    f"Invalid total_time format: {entry['total_time']}. Use format like '8' or '8.5'"
+                )
+            for field in ('home_in_time', 'home_out_time'):
+                time_str = (entry.get(field) or '').strip()
+                entry[field] = child.parse_time_string(time_str, entry['date']) if time_str else None
+        return value
+
+
 class WeeklyTimesheetSerializer(serializers.Serializer):
     """Serializer for weekly timesheet GET response"""
     
@@ -875,7 +819,7 @@ class WeeklyTimesheetSerializer(serializers.Serializer):
     def serialize_weekly_data(attendance_records, employee, week_start_date):
         """Create weekly attendance data structure matching API format"""
         from django.utils import timezone
-        from holidays.models import Holiday
+        from holidays.services import WorkCalendar
         from leaves.models import Leave
         from datetime import timedelta
         
@@ -889,12 +833,7 @@ class WeeklyTimesheetSerializer(serializers.Serializer):
         today = timezone.now().date()
         
         # Get holidays for the week
-        week_holidays = Holiday.objects.filter(
-            date__gte=week_days[0],
-            date__lte=week_days[6],
-            is_active=True
-        ).values_list('date', 'name')
-        holiday_dates = {h[0]: h[1] for h in week_holidays}
+        holiday_dates = WorkCalendar.holidays_between(week_days[0], week_days[6])
         
         # Get leaves for the week
         week_leaves = Leave.objects.filter(
@@ -1165,8 +1104,19 @@ class UpdateSessionSerializer(serializers.Serializer):
 
 
 class BulkUpdateWorkingHoursSerializer(serializers.Serializer):
-    """Serializer for bulk updating office_working_hours for a date range"""
-    employee = serializers.IntegerField(required=True, help_text="Employee ID")
+    """
+    Serializer for bulk updating office_working_hours for a date range.
+    Targets exactly one of: employee, employees, department or company.
+    """
+    employee = serializers.IntegerField(required=False, help_text="Employee ID")
+    employees = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        allow_empty=False,
+        help_text="List of employee IDs"
+    )
+    department = serializers.IntegerField(required=False, help_text="Department ID (all active employees)")
+    company = serializers.IntegerField(required=False, help_text="Company ID (all active employees)")
     start_date = serializers.DateField(required=True, help_text="Start date (YYYY-MM-DD)")
     end_date = serializers.DateField(required=True, help_text="End date (YYYY-MM-DD)")
     office_working_hours = serializers.CharField(
@@ -1175,8 +1125,10 @@ class BulkUpdateWorkingHoursSerializer(serializers.Serializer):
         help_text="Office working hours in HH:MM format (e.g., '09:00')"
     )
     
+    TARGET_FIELDS = ('employee', 'employees', 'department', 'company')
+    
     def validate(self, data):
-        """Validate date range and office_working_hours format"""
+        """Validate date range, office_working_hours format and target"""
         start_date = data.get('start_date')
         end_date = data.get('end_date')
         office_hours = data.get('office_working_hours')
@@ -1194,13 +1146,65 @@ class BulkUpdateWorkingHoursSerializer(serializers.Serializer):
                 'office_working_hours': 'Must be in HH:MM format (e.g., "09:00")'
             })
         
-        # Validate employee exists
+        targets = [f for f in self.TARGET_FIELDS if data.get(f) is not None]
+        if len(targets) != 1:
+            raise serializers.ValidationError(
+                'Provide exactly one of: employee, employees, department, company.'
+            )
+        
+        # Validate employees exist
         from employees.models import Employee
-        try:
-            Employee.objects.get(id=data['employee'])
-        except Employee.DoesNotExist:
+        if 'employee' in targets:
+            if not Employee.objects.filter(id=data['employee']).exists():
+                raise serializers.ValidationError({
+                    'employee': f'Employee with ID {data["employee"]} does not exist.'
+                })
+        elif 'employees' in targets:
+            requested = set(data['employees'])
+            found = set(Employee.objects.filter(id__in=requested).values_list('id', flat=True))
+            missing = sorted(requested - found)
+            if missing:
+                raise serializers.ValidationError({
+                    'employees': f'Employees with IDs {missing} do not exist.'
+                })
+        
+        return data
+
+
+class BulkTimesheetDecisionSerializer(serializers.Serializer):
+    """
+    Serializer for bulk approving/rejecting PENDING timesheet entries.
+    Targets either explicit attendance `ids` or a filter (employee and/or week).
+    """
+    action = serializers.ChoiceField(choices=['approve', 'reject'])
+    admin_notes = serializers.CharField(required=False, allow_blank=True, default='')
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        allow_empty=False,
+        help_text="Attendance IDs"
+    )
+    employee = serializers.IntegerField(required=False, help_text="Employee ID (filter mode)")
+    week_start = serializers.DateField(required=False, help_text="Any date in the week, Monday-Sunday (filter mode)")
+    status = serializers.ChoiceField(choices=['PENDING'], default='PENDING', help_text="Only PENDING entries can be decided")
+    
+    def validate(self, data):
+        """Either ids or a filter, and notes when rejecting"""
+        from .constants import TIMESHEET_BULK_DECISION_MAX_IDS
+        
+        if data.get('ids') is not None:
+            if data.get('employee') is not None or data.get('week_start') is not None:
+                raise serializers.ValidationError('Provide either ids or a filter (employee, week_start), not both.')
+            if len(data['ids']) > TIMESHEET_BULK_DECISION_MAX_IDS:
+                raise serializers.ValidationError({
+                    'ids': f'At most {TIMESHEET_BULK_DECISION_MAX_IDS} ids per request.'
+                })
+        elif data.get('employee') is None and data.get('week_start') is None:
+            raise serializers.ValidationError('Provide ids or at least one of: employee, week_start.')
+        
+        data['admin_notes'] = data.get('admin_notes', '').strip()
+        if data['action'] == 'reject' and not data['admin_notes']:
             raise serializers.ValidationError({
-                'employee': f'Employee with ID {data["employee"]} does not exist.'
+                'admin_notes': 'Admin notes are required when rejecting a timesheet'
             })
-        
         return data
@@ -1,6 +1,67 @@
+from calendar import monthrange
+from datetime import date as date_cls, datetime as datetime_cls, timedelta, timezone as dt_timezone
 from django.utils import timezone
 from django.conf import settings
 
+# Optional NumPy import (batch calculations fall back to the scalar methods)
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    np = None
+    HAS_NUMPY = False
+
+from .constants import (
+    ADMIN_ALERT_MESSAGE_MISSING_DAY,
+    ADMIN_ALERT_MESSAGE_MISSING_TIME,
+    APPROVED_LEAVE_STATUSES,
+    COUNTED_TIMESHEET_STATUSES,
+)
+
+
+def get_leave_for_date(date, leaves_list):
+    """
+    Find leave that applies to a specific date.
+    Always returns the most recent application (highest ID).
+    Returns: (leave_object, is_rh, is_partial, partial_type)
+    """
+    applicable_leaves = []
+    for leave in leaves_list:
+        if leave.from_date <= date <= leave.to_date:
+            applicable_leaves.append(leave)
+            
+    if not applicable_leaves:
+        return (None, False, False, None)
+
+    # Sort by ID descending to get the most recent application first
+    applicable_leaves.sort(key=lambda l: l.id, reverse=True)
+    
+    leave = applicable_leaves[0]
+    
+    # Check if date is a Restricted Holiday
+    is_rh = False
+    if leave.leave_type == 'Restricted Holiday' and leave.rh_dates:
+        rh_date_strings = [str(d) for d in leave.rh_dates]
+        if str(date) in rh_date_strings:
+            is_rh = True
+            
+    # Check for partial leave
+    is_partial = bool(leave.day_status)
+    partial_type = leave.day_status
+    
+    return (leave, is_rh, is_partial, partial_type)
+
+
+def resolve_leave_info(attendance, date, leaves_list):
+    """
+    Leave info for a day: prioritize the direct attendance -> leave link,
+    otherwise fall back to a date-based lookup (records before the link was added).
+    """
+    leave = getattr(attendance, 'leave', None) if attendance else None
+    if leave:
+        return (leave, leave.leave_type == 'Restricted Holiday', bool(leave.day_status), leave.day_status)
+    return get_leave_for_date(date, leaves_list)
+
 
 class AttendanceCalculationService:
 
@@ -69,6 +130,273 @@ class AttendanceCalculationService:
 
         return not (attendance.in_time and attendance.out_time)
 
+    @staticmethod
+    def calculate_late_seconds(office_in_time, office_working_hours):
+        """
+        Seconds the office check-in (local time) falls after the shift
+        start in office_working_hours ("HH:MM"); 0 when on time.
+        """
+        if not office_in_time:
+            return 0
+        try:
+            hour, minute = map(int, (
+                office_working_hours or getattr(settings, 'ATTENDANCE_DEFAULT_WORKING_HOURS', '09:00')
+            ).split(':'))
+        except ValueError:
+            hour, minute = 9, 0
+        if timezone.is_aware(office_in_time):
+            office_in_time = timezone.localtime(office_in_time)
+        checked_in = office_in_time.hour * 3600 + office_in_time.minute * 60 + office_in_time.second
+        return max(0, checked_in - (hour * 3600 + minute * 60))
+
+    @staticmethod
+    def apply_late_fields(attendance):
+        """Set is_late / late_minutes from the office check-in"""
+        late_seconds = AttendanceCalculationService.calculate_late_seconds(
+            attendance.office_in_time, attendance.office_working_hours
+        )
+        attendance.is_late = late_seconds > 0
+        attendance.late_minutes = late_seconds // 60
+
+    @staticmethod
+    def apply_derived_fields(attendance):
+        """
+        Recompute the seconds, in/out and admin alert fields from the
+        location times. Called by Attendance.save() and by bulk writers
+        that bypass save().
+        """
+        attendance.office_seconds_worked = AttendanceCalculationService.calculate_location_seconds(
+            attendance.office_in_time, attendance.office_out_time
+        )
+        attendance.home_seconds_worked = AttendanceCalculationService.calculate_location_seconds(
+            attendance.home_in_time, attendance.home_out_time
+        )
+
+        total_seconds = AttendanceCalculationService.calculate_total_worked_seconds(attendance)
+
+        attendance.in_time = AttendanceCalculationService.get_earliest_checkin(attendance)
+        attendance.out_time = AttendanceCalculationService.get_latest_checkout(attendance)
+
+        if total_seconds:
+            attendance.seconds_actual_worked_time = total_seconds
+            attendance.seconds_actual_working_time = total_seconds
+            attendance.office_time_inside = attendance.office_seconds_worked
+            attendance.seconds_extra_time = AttendanceCalculationService.calculate_extra_seconds(
+                total_seconds, attendance.orignal_total_time
+            )
+            attendance.extra_time_status = AttendanceCalculationService.extra_time_status(
+                attendance.seconds_extra_time
+            )
+        else:
+            attendance.seconds_actual_worked_time = 0
+            attendance.seconds_actual_working_time = 0
+            attendance.office_time_inside = 0
+            attendance.seconds_extra_time = 0
+            attendance.extra_time_status = ''
+
+        if AttendanceCalculationService.should_flag_admin_alert(attendance):
+            attendance.admin_alert = 1
+            attendance.admin_alert_message = ADMIN_ALERT_MESSAGE_MISSING_TIME
+        else:
+            attendance.admin_alert = 0
+            attendance.admin_alert_message = ""
+
+        AttendanceCalculationService.apply_late_fields(attendance)
+
+    # ---------------------------------------------------------
+    # Batch (vectorized) variants
+    # ---------------------------------------------------------
+
+    ALERT_EXEMPT_DAY_TYPES = ('HOLIDAY', 'WEEKEND_OFF', 'LEAVE_DAY')
+
+    @staticmethod
+    def to_datetime64(values):
+        """
+        Sequence of datetimes (aware or naive, None for missing) as a
+        datetime64[us] array with NaT for missing values. Aware values are
+        converted to UTC so differences match timedelta arithmetic.
+        """
+        if isinstance(values, np.ndarray) and values.dtype.kind == 'M':
+            return values.astype('datetime64[us]')
+        # Exact integer microseconds since the epoch (timedelta // timedelta)
+        aware_epoch = datetime_cls(1970, 1, 1, tzinfo=dt_timezone.utc)
+        naive_epoch = datetime_cls(1970, 1, 1)
+        one_us = timedelta(microseconds=1)
+        nat = np.iinfo(np.int64).min
+        return np.array([
+            nat if v is None else (v - (aware_epoch if v.tzinfo else naive_epoch)) // one_us
+            for v in values
+        ], dtype='int64').view('datetime64[us]')
+
+    @staticmethod
+    def calculate_location_seconds_batch(in_times, out_times):
+        """
+        Vectorized calculate_location_seconds: 0 where either side is
+        missing, else the difference truncated to whole seconds.
+        """
+        in_arr = AttendanceCalculationService.to_datetime64(in_times)
+        out_arr = AttendanceCalculationService.to_datetime64(out_times)
+        valid = ~(np.isnat(in_arr) | np.isnat(out_arr))
+        diff_us = np.where(valid, (out_arr - in_arr).astype('int64'), 0)
+        # int(timedelta.total_seconds()) truncates towards zero
+        seconds = np.abs(diff_us) // 1_000_000
+        return np.where(diff_us < 0, -seconds, seconds)
+
+    @staticmethod
+    def calculate_batch(office_in, office_out, home_in, home_out, scheduled,
+                        day_types=None, in_times=None, out_times=None):
+        """
+        Derived fields for a whole batch in one pass, identical to what
+        apply_derived_fields() computes row by row.
+
+        Inputs are equal-length sequences (datetimes/None, or datetime64
+        arrays with NaT); `in_times`/`out_times` are the legacy in/out
+        values and `day_types` the stored day_type per row.
+        Returns a dict of arrays: office_seconds, home_seconds,
+        worked_seconds, extra_seconds, extra_time_status, admin_alert.
+        """
+        if not HAS_NUMPY:
+            return AttendanceCalculationService._calculate_batch_scalar(
+                office_in, office_out, home_in, home_out, scheduled, day_types, in_times, out_times
+            )
+
+        to_dt64 = AttendanceCalculationService.to_datetime64
+        office_in, office_out = to_dt64(office_in), to_dt64(office_out)
+        home_in, home_out = to_dt64(home_in), to_dt64(home_out)
+        size = len(office_in)
+        scheduled = np.asarray(scheduled, dtype='int64')
+
+        office_seconds = AttendanceCalculationService.calculate_location_seconds_batch(office_in, office_out)
+        home_seconds = AttendanceCalculationService.calculate_location_seconds_batch(home_in, home_out)
+        worked = office_seconds + home_seconds
+        extra = np.where(worked != 0, worked - scheduled, 0)
+        extra_status = np.full(size, '', dtype='<U1')
+        extra_status[extra > 0] = '+'
+        extra_status[extra < 0] = '-'
+
+        has_office_in, has_office_out = ~np.isnat(office_in), ~np.isnat(office_out)
+        has_home_in, has_home_out = ~np.isnat(home_in), ~np.isnat(home_out)
+        has_in = has_office_in | has_home_in
+        has_out = has_office_out | has_home_out
+        if in_times is not None:
+            has_in |= ~np.isnat(to_dt64(in_times))
+        if out_times is not None:
+            has_out |= ~np.isnat(to_dt64(out_times))
+
+        alert = (has_office_in & ~has_office_out) | (has_home_in & ~has_home_out) | ~(has_in & has_out)
+        if day_types is not None:
+            alert &= ~np.isin(np.asarray(day_types), AttendanceCalculationService.ALERT_EXEMPT_DAY_TYPES)
+
+        return {
+            'office_seconds': office_seconds,
+            'home_seconds': home_seconds,
+            'worked_seconds': worked,
+            'extra_seconds': extra,
+            'extra_time_status': extra_status,
+            'admin_alert': alert.astype('int64'),
+        }
+
+    @staticmethod
+    def _calculate_batch_scalar(office_in, office_out, home_in, home_out, scheduled,
+                                day_types=None, in_times=None, out_times=None):
+        """calculate_batch without NumPy, one row at a time via the scalar methods"""
+        from types import SimpleNamespace
+
+        size = len(office_in)
+        day_types = day_types if day_types is not None else [''] * size
+        in_times = in_times if in_times is not None else [None] * size
+        out_times = out_times if out_times is not None else [None] * size
+        result = {key: [] for key in (
+            'office_seconds', 'home_seconds', 'worked_seconds',
+            'extra_seconds', 'extra_time_status', 'admin_alert'
+        )}
+        for i in range(size):
+            row = SimpleNamespace(
+                office_in_time=office_in[i], office_out_time=office_out[i],
+                home_in_time=home_in[i], home_out_time=home_out[i],
+                in_time=in_times[i], out_time=out_times[i],
+                orignal_total_time=scheduled[i], day_type=day_types[i],
+                office_working_hours=None,  # late fields are not part of the batch result
+            )
+            AttendanceCalculationService.apply_derived_fields(row)
+            result['office_seconds'].append(row.office_seconds_worked)
+            result['home_seconds'].append(row.home_seconds_worked)
+            result['worked_seconds'].append(row.seconds_actual_worked_time)
+            result['extra_seconds'].append(row.seconds_extra_time)
+            result['extra_time_status'].append(row.extra_time_status)
+            result['admin_alert'].append(row.admin_alert)
+        return result
+
+    @staticmethod
+    def apply_derived_fields_batch(attendances):
+        """
+        apply_derived_fields() for a list of (unsaved or to-be-bulk-updated)
+        Attendance instances, computing the numbers with calculate_batch.
+        """
+        attendances = list(attendances)
+        if not attendances:
+            return attendances
+        for attendance in attendances:
+            attendance.in_time = AttendanceCalculationService.get_earliest_checkin(attendance)
+            attendance.out_time = AttendanceCalculationService.get_latest_checkout(attendance)
+
+        result = AttendanceCalculationService.calculate_batch(
+            [a.office_in_time for a in attendances],
+            [a.office_out_time for a in attendances],
+            [a.home_in_time for a in attendances],
+            [a.home_out_time for a in attendances],
+            [a.orignal_total_time for a in attendances],
+            day_types=[a.day_type for a in attendances],
+            in_times=[a.in_time for a in attendances],
+            out_times=[a.out_time for a in attendances],
+        )
+        for i, attendance in enumerate(attendances):
+            attendance.office_seconds_worked = int(result['office_seconds'][i])
+            attendance.home_seconds_worked = int(result['home_seconds'][i])
+            attendance.seconds_actual_worked_time = int(result['worked_seconds'][i])
+            attendance.seconds_actual_working_time = attendance.seconds_actual_worked_time
+            attendance.office_time_inside = attendance.office_seconds_worked if attendance.seconds_actual_worked_time else 0
+            attendance.seconds_extra_time = int(result['extra_seconds'][i])
+            attendance.extra_time_status = str(result['extra_time_status'][i])
+            attendance.admin_alert = int(result['admin_alert'][i])
+            attendance.admin_alert_message = ADMIN_ALERT_MESSAGE_MISSING_TIME if attendance.admin_alert else ""
+            AttendanceCalculationService.apply_late_fields(attendance)
+        return attendances
+
+    @staticmethod
+    def has_completed_session(attendance):
+        """True when an office or home session has both in and out times"""
+        return bool(
+            (attendance.office_in_time and attendance.office_out_time) or
+            (attendance.home_in_time and attendance.home_out_time)
+        )
+
+    @staticmethod
+    def classify_month_day(current_date, attendance, leave, is_partial, is_holiday, joining_date, today):
+        """
+        Day type as shown on the monthly attendance sheet.
+        Returns (day_type, summary_bucket) where summary_bucket is one of
+        WORKING_DAY, NON_WORKING_DAY, LEAVE_DAY or HALF_DAY.
+        """
+        if joining_date and current_date < joining_date:
+            return 'BEFORE_JOINING', 'NON_WORKING_DAY'
+        if is_holiday:
+            return 'HOLIDAY', 'NON_WORKING_DAY'
+        if current_date.weekday() >= 5:  # Saturday=5, Sunday=6
+            return 'WEEKEND_OFF', 'NON_WORKING_DAY'
+
+        if leave and getattr(leave, 'status', '') in APPROVED_LEAVE_STATUSES:
+            if is_partial:
+                return 'WORKING_DAY', 'HALF_DAY'
+            return 'LEAVE_DAY', 'LEAVE_DAY'
+
+        # Pending/rejected leaves fall through to the regular working day rules
+        if current_date > today:
+            return 'FUTURE_DAY', 'WORKING_DAY'
+        if attendance and AttendanceCalculationService.has_completed_session(attendance):
+            return 'WORKING_DAY', 'WORKING_DAY'
+        return 'ABSENT', 'WORKING_DAY'
+
     @staticmethod
     def determine_day_type(attendance, today=None):
         """
@@ -77,52 +405,2280 @@ class AttendanceCalculationService:
         """
         if not today:
             today = timezone.now().date()
-            
-        date = attendance.date
-        
-        # 1. Check if date is before joining (Highest Priority)
-        if attendance.employee.joining_date and date < attendance.employee.joining_date:
-            attendance.day_type = 'BEFORE_JOINING'
-            return
 
-        # 2. Check for leaves
         from leaves.models import Leave
-        leave = Leave.objects.filter(
+        from holidays.services import WorkCalendar
+
+        date = attendance.date
+        joining_date = attendance.employee.joining_date
+        before_joining = bool(joining_date and date < joining_date)
+
+        on_leave = not before_joining and Leave.objects.filter(
             employee=attendance.employee,
             from_date__lte=date,
             to_date__gte=date,
-            status__in=['Approved', 'APPROVED']
+            status__in=APPROVED_LEAVE_STATUSES
+        ).exists()
+        is_holiday = not (before_joining or on_leave) and WorkCalendar.is_holiday(date)
+
+        attendance.day_type = AttendanceCalculationService.resolve_day_type(
+            date, joining_date, on_leave, is_holiday,
+            AttendanceCalculationService.has_work_time(attendance), today
+        )
+
+    @staticmethod
+    def has_work_time(attendance):
+        """True when any in/out pair (legacy, office or home) is complete"""
+        return bool(
+            (attendance.in_time and attendance.out_time) or
+            AttendanceCalculationService.has_completed_session(attendance)
+        )
+
+    @staticmethod
+    def resolve_day_type(date, joining_date, on_leave, is_holiday, has_work_time, today):
+        """
+        Stored day_type from pre-fetched facts, so bulk writers can classify
+        without per-row queries.
+        """
+        # 1. Before joining (Highest Priority)
+        if joining_date and date < joining_date:
+            return 'BEFORE_JOINING'
+        # 2. Approved leave
+        if on_leave:
+            return 'LEAVE_DAY'
+        # 3. Holiday
+        if is_holiday:
+            return 'HOLIDAY'
+        # 4. Future dates
+        if date > today:
+            return 'FUTURE_DAY'
+        # 5. Weekends
+        if date.weekday() >= 5:  # Saturday=5, Sunday=6
+            return 'WEEKEND_OFF'
+        # If has work time recorded
+        if has_work_time:
+            return 'WORKING_DAY'
+        # Default for past working days with no activity
+        if date < today:
+            return 'ABSENT'
+        return 'WORKING_DAY'
+
+
+class MonthSummaryService:
+    """
+    Maintains EmployeeMonthSummary rows so the monthly sheet's summary
+    blocks are a single-row read.
+
+    Day counters and expected time only depend on the calendar, joining date
+    and leaves; worked/extra seconds only depend on attendance rows. Writes
+    refresh the part they affect, holiday changes mark rows stale.
+    """
+
+    # Expected half-day units per day, stored as one digit per day of month
+    BUCKET_EXPECTED_UNITS = {
+        'WORKING_DAY': 2,
+        'HALF_DAY': 1,
+        'LEAVE_DAY': 0,
+        'NON_WORKING_DAY': 0,
+    }
+
+    @staticmethod
+    def month_bounds(year, month):
+        num_days = monthrange(year, month)[1]
+        return date_cls(year, month, 1), date_cls(year, month, num_days)
+
+    @staticmethod
+    def months_between(from_date, to_date):
+        """(year, month) pairs covering the date range"""
+        year, month = from_date.year, from_date.month
+        months = []
+        while (year, month) <= (to_date.year, to_date.month):
+            months.append((year, month))
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return months
+
+    @staticmethod
+    def build(employee, year, month, attendance_map, holiday_dates, leaves_list, today=None):
+        """
+        Compute an unsaved EmployeeMonthSummary: day buckets from the already
+        loaded month data, seconds and late days from one aggregate query.
+        """
+        from .models import EmployeeMonthSummary
+
+        today = today or timezone.now().date()
+        default_total_time = getattr(settings, 'ATTENDANCE_DEFAULT_TOTAL_TIME_SECONDS', 32400)
+        num_days = monthrange(year, month)[1]
+
+        summary = EmployeeMonthSummary(employee=employee, year=year, month=month)
+        counts = {'WORKING_DAY': 0, 'NON_WORKING_DAY': 0, 'LEAVE_DAY': 0, 'HALF_DAY': 0}
+        units = []
+
+        for day in range(1, num_days + 1):
+            current_date = date_cls(year, month, day)
+            attendance = attendance_map.get(current_date)
+            leave, _, is_partial, _ = resolve_leave_info(attendance, current_date, leaves_list)
+            _, bucket = AttendanceCalculationService.classify_month_day(
+                current_date, attendance, leave, is_partial,
+                current_date in holiday_dates, employee.joining_date, today
+            )
+            counts[bucket] += 1
+            # Half days are also counted as working days on the sheet
+            if bucket == 'HALF_DAY':
+                counts['WORKING_DAY'] += 1
+            units.append(MonthSummaryService.BUCKET_EXPECTED_UNITS[bucket])
+
+        # Seconds and late days in one grouped query, as refresh_seconds() keeps them
+        start_date, end_date = MonthSummaryService.month_bounds(year, month)
+        totals = MonthSummaryService.aggregate_seconds(
+            AttendanceArchiveService.queryset_for_range(start_date, end_date).filter(employee=employee),
+            late_days=True,
+        )
+        summary.seconds_worked = totals['worked']
+        summary.seconds_extra = totals['extra']
+        summary.seconds_to_compensate = totals['compensate']
+        summary.late_days = totals['late']
+
+        summary.working_days = counts['WORKING_DAY']
+        summary.non_working_days = counts['NON_WORKING_DAY']
+        summary.leave_days = counts['LEAVE_DAY']
+        summary.half_days = counts['HALF_DAY']
+        summary.expected_day_units = ''.join(str(u) for u in units)
+        summary.seconds_expected = int(sum(units) * default_total_time / 2)
+        summary.is_stale = False
+        return summary
+
+    @staticmethod
+    def load_month_data(employee, year, month):
+        """Attendance map, holiday dates and leaves for one employee-month"""
+        from holidays.services import WorkCalendar
+        from leaves.models import Leave
+
+        start_date, end_date = MonthSummaryService.month_bounds(year, month)
+        attendance_map = {
+            rec.date: rec for rec in AttendanceArchiveService.queryset_for_range(
+                start_date, end_date
+            ).filter(employee=employee).select_related('leave')
+        }
+        holiday_dates = WorkCalendar.holidays_between(start_date, end_date)
+        leaves_list = list(Leave.objects.filter(
+            employee=employee, from_date__lte=end_date, to_date__gte=start_date
+        ))
+        return attendance_map, holiday_dates, leaves_list
+
+    @staticmethod
+    def save(summary):
+        """Upsert a built summary on (employee, year, month)"""
+        from .models import EmployeeMonthSummary
+
+        fields = [
+            'working_days', 'non_working_days', 'leave_days', 'half_days',
+            'seconds_worked', 'seconds_extra', 'seconds_to_compensate',
+            'seconds_expected', 'expected_day_units', 'late_days', 'is_stale',
+        ]
+        obj, _ = EmployeeMonthSummary.objects.update_or_create(
+            employee=summary.employee, year=summary.year, month=summary.month,
+            defaults={f: getattr(summary, f) for f in fields}
+        )
+        return obj
+
+    @staticmethod
+    def refresh(employee, year, month):
+        """Fully recompute and persist one employee-month"""
+        data = MonthSummaryService.load_month_data(employee, year, month)
+        return MonthSummaryService.save(MonthSummaryService.build(employee, year, month, *data))
+
+    @staticmethod
+    def get_summary(employee, year, month, attendance_map=None, holiday_dates=None, leaves_list=None):
+        """
+        Read the stored summary, rebuilding it when missing or stale.
+        Callers that already loaded the month's rows can pass them in to
+        avoid reloading.
+        """
+        from .models import EmployeeMonthSummary
+
+        summary = EmployeeMonthSummary.objects.filter(
+            employee=employee, year=year, month=month
         ).first()
-        
-        if leave:
-            attendance.day_type = 'LEAVE_DAY'
-            return
+        if summary and not summary.is_stale:
+            return summary
 
-        # 3. Check for holidays
+        if attendance_map is None or holiday_dates is None or leaves_list is None:
+            return MonthSummaryService.refresh(employee, year, month)
+        return MonthSummaryService.save(MonthSummaryService.build(
+            employee, year, month, attendance_map, holiday_dates, leaves_list
+        ))
+
+    @staticmethod
+    def refresh_seconds(employee_id, year, month, late_days=False):
+        """
+        Re-aggregate worked/extra/compensation seconds after an attendance
+        write. Only touches an existing row; missing rows are built on read.
+        Bulk writers pass late_days=True to also recount late_days, which
+        single saves keep up to date with adjust_late_days().
+        """
+        from .models import Attendance, EmployeeMonthSummary
+
+        start_date, end_date = MonthSummaryService.month_bounds(year, month)
+        totals = MonthSummaryService.aggregate_seconds(Attendance.objects.filter(
+            employee_id=employee_id,
+            date__gte=start_date,
+            date__lte=end_date,
+        ), late_days=late_days)
+
+        values = {
+            'seconds_worked': totals['worked'],
+            'seconds_extra': totals['extra'],
+            'seconds_to_compensate': totals['compensate'],
+        }
+        if late_days:
+            values['late_days'] = totals['late']
+        return EmployeeMonthSummary.objects.filter(
+            employee_id=employee_id, year=year, month=month
+        ).update(**values)
+
+    @staticmethod
+    def aggregate_seconds(rows, late_days=False):
+        """
+        {"worked", "extra", "compensate"[, "late"]} over one employee-month's
+        attendance rows; only counted timesheets add seconds.
+        """
+        from django.db.models import Count, Q, Sum, Case, When, F, Value, IntegerField
+        from django.db.models.functions import Coalesce
+
+        counted = Q(timesheet_status__in=COUNTED_TIMESHEET_STATUSES)
+        aggregates = {
+            'worked': Coalesce(Sum('seconds_actual_worked_time', filter=counted), Value(0)),
+            'extra': Coalesce(Sum('seconds_extra_time', filter=counted), Value(0)),
+            'compensate': Coalesce(Sum(Case(
+                When(seconds_extra_time__lt=0, then=-F('seconds_extra_time')),
+                default=Value(0),
+                output_field=IntegerField(),
+            ), filter=counted), Value(0)),
+        }
+        if late_days:
+            aggregates['late'] = Count('id', filter=Q(is_late=True))
+        return rows.aggregate(**aggregates)
+
+    @staticmethod
+    def adjust_late_days(employee_id, year, month, delta):
+        """Atomically shift the stored late_days counter (no-op if the row is not built yet)"""
+        from django.db.models import F
+        from .models import EmployeeMonthSummary
+
+        if not delta:
+            return 0
+        return EmployeeMonthSummary.objects.filter(
+            employee_id=employee_id, year=year, month=month
+        ).update(late_days=F('late_days') + delta)
+
+    @staticmethod
+    def refresh_range(employee, from_date, to_date):
+        """Recompute the employee's existing summaries overlapping a date range"""
+        from .models import EmployeeMonthSummary
+
+        months = MonthSummaryService.months_between(from_date, to_date)
+        existing = EmployeeMonthSummary.objects.filter(
+            employee=employee,
+            year__gte=from_date.year,
+            year__lte=to_date.year,
+        ).values_list('year', 'month')
+        for year, month in set(existing) & set(months):
+            MonthSummaryService.refresh(employee, year, month)
+
+    @staticmethod
+    def mark_stale(**filters):
+        """Flag summaries for lazy rebuild, e.g. mark_stale(year=2026, month=1)"""
+        from .models import EmployeeMonthSummary
+        return EmployeeMonthSummary.objects.filter(**filters).update(is_stale=True)
+
+
+class MonthlyGridService:
+    """
+    Employees x days matrix of monthly sheet day types, built from a few
+    set-based queries. Day types follow AttendanceCalculationService.classify_month_day.
+    """
+
+    NON_WORKING_DAY_TYPES = ('BEFORE_JOINING', 'HOLIDAY', 'WEEKEND_OFF')
+
+    @staticmethod
+    def load_month_data(employees, year, month):
+        """Completed sessions, attendance leave links, leaves and holidays for all employees"""
+        from django.db.models import Q
+        from holidays.services import WorkCalendar
+        from leaves.models import Leave
+
+        start_date, end_date = MonthSummaryService.month_bounds(year, month)
+
+        completed = set()
+        linked_leave_ids = {}
+        attendance_rows = AttendanceArchiveService.queryset_for_range(
+            start_date, end_date
+        ).filter(employee__in=employees).values_list(
+            'employee_id', 'date', 'leave_id',
+            'office_in_time', 'office_out_time', 'home_in_time', 'home_out_time'
+        )
+        for emp_id, day, leave_id, office_in, office_out, home_in, home_out in attendance_rows.iterator(chunk_size=5000):
+            if (office_in and office_out) or (home_in and home_out):
+                completed.add((emp_id, day.day))
+            if leave_id:
+                linked_leave_ids[(emp_id, day.day)] = leave_id
+
+        leaves = Leave.objects.filter(
+            Q(employee__in=employees, from_date__lte=end_date, to_date__gte=start_date) |
+            Q(id__in=set(linked_leave_ids.values()))
+        ).only('id', 'employee_id', 'from_date', 'to_date', 'status', 'day_status', 'leave_type')
+
+        holiday_days = {d.day for d in WorkCalendar.holidays_between(start_date, end_date)}
+        return completed, linked_leave_ids, list(leaves), holiday_days
+
+    @staticmethod
+    def build(employees, year, month, today=None):
+        """
+        Returns a list of (employee, day_types, half_days) with day_types
+        indexed by day - 1 and half_days the set of approved partial-leave days.
+        """
+        today = today or timezone.now().date()
+        start_date, end_date = MonthSummaryService.month_bounds(year, month)
+        num_days = end_date.day
+        employees = list(employees)
+        completed, linked_leave_ids, leaves, holiday_days = MonthlyGridService.load_month_data(
+            employees, year, month
+        )
+
+        # Calendar template shared by every employee
+        template = []
+        for day in range(1, num_days + 1):
+            current_date = date_cls(year, month, day)
+            if day in holiday_days:
+                template.append('HOLIDAY')
+            elif current_date.weekday() >= 5:  # Saturday=5, Sunday=6
+                template.append('WEEKEND_OFF')
+            elif current_date > today:
+                template.append('FUTURE_DAY')
+            else:
+                template.append('ABSENT')
+        regular_days = [day for day in range(1, num_days + 1) if template[day - 1] in ('FUTURE_DAY', 'ABSENT')]
+
+        # Date-based leave per employee-day; the most recent application (highest id) wins
+        leaves_by_id = {leave.id: leave for leave in leaves}
+        day_leave = {}
+        for leave in sorted(leaves, key=lambda l: l.id):
+            if leave.from_date > end_date or leave.to_date < start_date:
+                continue
+            first = max(leave.from_date, start_date).day
+            last = min(leave.to_date, end_date).day
+            for day in range(first, last + 1):
+                day_leave[(leave.employee_id, day)] = leave
+        # The direct attendance -> leave link takes priority
+        for key, leave_id in linked_leave_ids.items():
+            if leave_id in leaves_by_id:
+                day_leave[key] = leaves_by_id[leave_id]
+
+        rows = []
+        for employee in employees:
+            day_types = list(template)
+            half_days = set()
+            first_day = 1
+            joining_date = employee.joining_date
+            if joining_date and joining_date > start_date:
+                first_day = min(num_days + 1, (joining_date - start_date).days + 1)
+                day_types[:first_day - 1] = ['BEFORE_JOINING'] * (first_day - 1)
+
+            for day in regular_days:
+                if day < first_day:
+                    continue
+                leave = day_leave.get((employee.id, day))
+                if leave and leave.status in APPROVED_LEAVE_STATUSES:
+                    if leave.day_status:
+                        day_types[day - 1] = 'WORKING_DAY'
+                        half_days.add(day)
+                    else:
+                        day_types[day - 1] = 'LEAVE_DAY'
+                elif day_types[day - 1] == 'ABSENT' and (employee.id, day) in completed:
+                    day_types[day - 1] = 'WORKING_DAY'
+            rows.append((employee, day_types, half_days))
+        return rows
+
+    @staticmethod
+    def summarize(day_types, half_days):
+        """Day counters with the same buckets as monthSummary"""
+        non_working = sum(1 for t in day_types if t in MonthlyGridService.NON_WORKING_DAY_TYPES)
+        leave_days = day_types.count('LEAVE_DAY')
+        return {
+            "WORKING_DAY": len(day_types) - non_working - leave_days,
+            "NON_WORKING_DAY": non_working,
+            "LEAVE_DAY": leave_days,
+            "HALF_DAY": len(half_days),
+        }
+
+
+class DayStatusBitmapService:
+    """
+    Maintains the EmployeeDayStatusYear bitmaps and answers team
+    availability ("who's out") with bitwise operations over them.
+
+    Day i of the year (Jan 1 = 0) is bit i of two planes; the 2-bit code is
+    low | high << 1. Attendance writes flip PRESENT bits in place, leave
+    writes rebuild the employee-year, and rows missing or marked stale are
+    rebuilt on read. Leave precedence follows MonthlyGridService.
+    """
+
+    CODES = {'PRESENT': 1, 'LEAVE': 2, 'HALF_DAY': 3}
+    PLANE_BYTES = 46  # 366 bits
+
+    @staticmethod
+    def pack(low, high):
+        size = DayStatusBitmapService.PLANE_BYTES
+        return low.to_bytes(size, 'little') + high.to_bytes(size, 'little')
+
+    @staticmethod
+    def unpack(day_bits):
+        size = DayStatusBitmapService.PLANE_BYTES
+        data = bytes(day_bits)
+        return int.from_bytes(data[:size], 'little'), int.from_bytes(data[size:2 * size], 'little')
+
+    @staticmethod
+    def planes(day_bits):
+        """{code name: day mask} of a stored bitmap"""
+        low, high = DayStatusBitmapService.unpack(day_bits)
+        return {'PRESENT': low & ~high, 'LEAVE': high & ~low, 'HALF_DAY': low & high}
+
+    @staticmethod
+    def day_index(day):
+        return day.timetuple().tm_yday - 1
+
+    @staticmethod
+    def is_completed(attendance):
+        return bool(
+            (attendance.office_in_time and attendance.office_out_time)
+            or (attendance.home_in_time and attendance.home_out_time)
+        )
+
+    @staticmethod
+    def build(employee_ids, year):
+        """{employee_id: day_bits} for a year, from a few set-based queries"""
+        from django.db.models import Q
+        from leaves.models import Leave
+
+        start_date, end_date = date_cls(year, 1, 1), date_cls(year, 12, 31)
+        day_index = DayStatusBitmapService.day_index
+        low = dict.fromkeys(employee_ids, 0)
+        high = dict.fromkeys(employee_ids, 0)
+
+        linked_leave_ids = {}
+        attendance_rows = AttendanceArchiveService.queryset_for_range(
+            start_date, end_date
+        ).filter(employee_id__in=employee_ids).values_list(
+            'employee_id', 'date', 'leave_id',
+            'office_in_time', 'office_out_time', 'home_in_time', 'home_out_time'
+        )
+        for emp_id, day, leave_id, office_in, office_out, home_in, home_out in attendance_rows.iterator(chunk_size=5000):
+            if (office_in and office_out) or (home_in and home_out):
+                low[emp_id] |= 1 << day_index(day)
+            if leave_id:
+                linked_leave_ids[(emp_id, day_index(day))] = leave_id
+
+        leaves = Leave.objects.filter(
+            Q(employee_id__in=employee_ids, from_date__lte=end_date, to_date__gte=start_date) |
+            Q(id__in=set(linked_leave_ids.values()))
+        ).only('id', 'employee_id', 'from_date', 'to_date', 'status', 'day_status')
+
+        # Date-based leave per employee-day; the most recent application wins,
+        # the direct attendance -> leave link takes priority
+        leaves_by_id = {leave.id: leave for leave in leaves}
+        day_leave = {}
+        for leave in sorted(leaves_by_id.values(), key=lambda l: l.id):
+            if leave.from_date > end_date or leave.to_date < start_date:
+                continue
+            for index in range(day_index(max(leave.from_date, start_date)), day_index(min(leave.to_date, end_date)) + 1):
+                day_leave[(leave.employee_id, index)] = leave
+        for key, leave_id in linked_leave_ids.items():
+            if leave_id in leaves_by_id:
+                day_leave[key] = leaves_by_id[leave_id]
+
+        for (emp_id, index), leave in day_leave.items():
+            if emp_id not in low or leave.status not in APPROVED_LEAVE_STATUSES:
+                continue
+            bit = 1 << index
+            high[emp_id] |= bit
+            if leave.day_status:
+                low[emp_id] |= bit
+            else:
+                low[emp_id] &= ~bit
+
+        return {emp_id: DayStatusBitmapService.pack(low[emp_id], high[emp_id]) for emp_id in employee_ids}
+
+    @staticmethod
+    def refresh(employee_ids, year):
+        """Rebuild and upsert the bitmaps of some employees for a year"""
+        from django.db import connection
+        from .models import EmployeeDayStatusYear
+
+        bitmaps = DayStatusBitmapService.build(list(employee_ids), year)
+        kwargs = {'update_conflicts': True, 'update_fields': ['day_bits', 'is_stale', 'updated_at']}
+        if connection.features.supports_update_conflicts_with_target:
+            kwargs['unique_fields'] = ['employee', 'year']
+        EmployeeDayStatusYear.objects.bulk_create([
+            EmployeeDayStatusYear(employee_id=emp_id, year=year, day_bits=day_bits, is_stale=False)
+            for emp_id, day_bits in bitmaps.items()
+        ], batch_size=500, **kwargs)
+        return bitmaps
+
+    @staticmethod
+    def get_bitmaps(employee_ids, year):
+        """{employee_id: day_bits}, rebuilding missing or stale rows in one batch"""
+        from .models import EmployeeDayStatusYear
+
+        bitmaps = {}
+        for emp_id, day_bits, is_stale in EmployeeDayStatusYear.objects.filter(
+            employee_id__in=employee_ids, year=year
+        ).values_list('employee_id', 'day_bits', 'is_stale'):
+            if not is_stale:
+                bitmaps[emp_id] = day_bits
+        missing = [emp_id for emp_id in employee_ids if emp_id not in bitmaps]
+        if missing:
+            bitmaps.update(DayStatusBitmapService.refresh(missing, year))
+        return bitmaps
+
+    @staticmethod
+    def refresh_range(employee_ids, from_date, to_date):
+        """Rebuild the employees' existing bitmaps overlapping a date range (leave writes)"""
+        from collections import defaultdict
+        from .models import EmployeeDayStatusYear
+
+        by_year = defaultdict(list)
+        for emp_id, year in EmployeeDayStatusYear.objects.filter(
+            employee_id__in=employee_ids, year__gte=from_date.year, year__lte=to_date.year
+        ).values_list('employee_id', 'year'):
+            by_year[year].append(emp_id)
+        for year, ids in by_year.items():
+            DayStatusBitmapService.refresh(ids, year)
+
+    @staticmethod
+    def mark_stale(**filters):
+        """Flag bitmaps for lazy rebuild, e.g. mark_stale(employee_id=12)"""
+        from .models import EmployeeDayStatusYear
+        return EmployeeDayStatusYear.objects.filter(**filters).update(is_stale=True)
+
+    @staticmethod
+    def sync(attendances, deleted=False):
+        """
+        Set or clear the PRESENT bit of each written (or deleted) row's day
+        in the existing bitmaps; leave days keep their code and missing rows
+        are built on first read. Used by Attendance signals and bulk writers.
+        """
+        from django.db import transaction
+        from .models import EmployeeDayStatusYear
+
+        attendances = list(attendances)
+        if not attendances:
+            return 0
+        with transaction.atomic():
+            rows = {
+                (row.employee_id, row.year): row for row in EmployeeDayStatusYear.objects.filter(
+                    employee_id__in={att.employee_id for att in attendances},
+                    year__in={att.date.year for att in attendances},
+                ).select_for_update()
+            }
+            planes = {}
+            for att in attendances:
+                key = (att.employee_id, att.date.year)
+                if key not in rows:
+                    continue
+                if key not in planes:
+                    planes[key] = list(DayStatusBitmapService.unpack(rows[key].day_bits))
+                low, high = planes[key]
+                bit = 1 << DayStatusBitmapService.day_index(att.date)
+                if high & bit:
+                    continue
+                planes[key][0] = low & ~bit if deleted or not DayStatusBitmapService.is_completed(att) else low | bit
+
+            changed = []
+            now = timezone.now()
+            for key, (low, high) in planes.items():
+                day_bits = DayStatusBitmapService.pack(low, high)
+                if day_bits != bytes(rows[key].day_bits):
+                    rows[key].day_bits = day_bits
+                    rows[key].updated_at = now
+                    changed.append(rows[key])
+            EmployeeDayStatusYear.objects.bulk_update(changed, ['day_bits', 'updated_at'])
+        return len(changed)
+
+    @staticmethod
+    def calendar_masks(year):
+        """(weekend mask, holiday mask, {index: holiday name}) of a year"""
+        from holidays.services import WorkCalendar
+
+        start_date = date_cls(year, 1, 1)
+        weekend = 0
+        for index in range((date_cls(year, 12, 31) - start_date).days + 1):
+            if (start_date + timedelta(days=index)).weekday() >= 5:  # Saturday=5, Sunday=6
+                weekend |= 1 << index
+        holidays = {
+            DayStatusBitmapService.day_index(day): name
+            for day, name in WorkCalendar.holidays_between(start_date, date_cls(year, 12, 31)).items()
+        }
+        holiday = 0
+        for index in holidays:
+            holiday |= 1 << index
+        return weekend, holiday, holidays
+
+    @staticmethod
+    def mask_dates(mask, year):
+        """Dates of the set bits of a day mask"""
+        start_date = date_cls(year, 1, 1)
+        dates = []
+        while mask:
+            lowest = mask & -mask
+            dates.append(start_date + timedelta(days=lowest.bit_length() - 1))
+            mask ^= lowest
+        return dates
+
+    @staticmethod
+    def availability(employees, start_date, end_date, today=None):
+        """
+        Who is out in [start_date, end_date]: returns (calendar, rows) with
+        calendar {date: {'is_weekend', 'holiday'}} and rows a list of
+        (employee, {'LEAVE_DAY': [...], 'HALF_DAY': [...], 'ABSENT': [...]}).
+        Absent = past working day after joining with no completed session
+        and no approved leave, as in the monthly sheet.
+        """
+        today = today or timezone.now().date()
+        employees = list(employees)
+        employee_ids = [employee.id for employee in employees]
+        index = DayStatusBitmapService.day_index
+
+        calendar = {}
+        out = {employee.id: {'LEAVE_DAY': [], 'HALF_DAY': [], 'ABSENT': []} for employee in employees}
+        for year in range(start_date.year, end_date.year + 1):
+            first, last = max(start_date, date_cls(year, 1, 1)), min(end_date, date_cls(year, 12, 31))
+            in_range = ((1 << (index(last) - index(first) + 1)) - 1) << index(first)
+            weekend, holiday, holiday_names = DayStatusBitmapService.calendar_masks(year)
+            past = (1 << (index(today) + 1)) - 1 if today.year == year else (-1 if today.year > year else 0)
+            for offset in range((last - first).days + 1):
+                day = first + timedelta(days=offset)
+                calendar[day] = {
+                    'is_weekend': bool(weekend >> index(day) & 1),
+                    'holiday': holiday_names.get(index(day), ''),
+                }
+
+            working = in_range & ~weekend & ~holiday
+            bitmaps = DayStatusBitmapService.get_bitmaps(employee_ids, year)
+            for employee in employees:
+                mask = working
+                joining_date = employee.joining_date
+                if joining_date and joining_date.year > year:
+                    continue
+                if joining_date and joining_date.year == year:
+                    mask &= ~((1 << index(joining_date)) - 1)
+                planes = DayStatusBitmapService.planes(bitmaps[employee.id])
+                leave, half_day = planes['LEAVE'] & mask, planes['HALF_DAY'] & mask
+                absent = mask & past & ~planes['PRESENT'] & ~leave & ~half_day
+                for key, value in (('LEAVE_DAY', leave), ('HALF_DAY', half_day), ('ABSENT', absent)):
+                    out[employee.id][key].extend(DayStatusBitmapService.mask_dates(value, year))
+
+        return calendar, [(employee, out[employee.id]) for employee in employees]
+
+
+class PunchIngestionService:
+    """
+    Batch ingestion of raw (employee_id, timestamp, location) punches from
+    biometric / door-controller exports.
+
+    Punches are grouped per employee and local date; the earliest punch of
+    a location becomes its in time and the latest its out time (merged with
+    whatever the row already holds). Rows are written with bulk_create /
+    bulk_update and Slack is told once per company after commit, instead of
+    the per-row post_save notifications.
+    """
+
+    CSV_FIELDS = ('employee_id', 'timestamp', 'location')
+    TIME_FIELDS = {
+        'OFFICE': ('office_in_time', 'office_out_time'),
+        'HOME': ('home_in_time', 'home_out_time'),
+    }
+    UPDATE_FIELDS = [
+        'in_time', 'out_time',
+        'office_in_time', 'office_out_time', 'home_in_time', 'home_out_time',
+        'office_seconds_worked', 'home_seconds_worked',
+        'seconds_actual_worked_time', 'seconds_actual_working_time',
+        'office_time_inside', 'seconds_extra_time', 'extra_time_status',
+        'admin_alert', 'admin_alert_message', 'day_type',
+        'is_late', 'late_minutes',
+        'updated_by', 'updated_at',
+    ]
+
+    @staticmethod
+    def bulk_create(created_rows, batch_size=None):
+        """
+        bulk_create new Attendance rows and make sure they carry their ids.
+        Backends without RETURNING (MySQL/TiDB) leave the pks unset, so they
+        are re-read by (employee, date) before alerts and bitmaps use them.
+        """
+        from .models import Attendance
+
+        Attendance.objects.bulk_create(created_rows, batch_size=batch_size)
+        missing = [att for att in created_rows if att.pk is None]
+        if missing:
+            ids = {
+                (emp_id, day): pk
+                for emp_id, day, pk in Attendance.objects.filter(
+                    employee_id__in={att.employee_id for att in missing},
+                    date__in={att.date for att in missing},
+                ).values_list('employee_id', 'date', 'id')
+            }
+            for att in missing:
+                att.pk = ids[(att.employee_id, att.date)]
+        return created_rows
+
+    @staticmethod
+    def parse_csv(text):
+        """Rows of a device CSV export (header: employee_id,timestamp[,location])"""
+        import csv
+        import io
+        reader = csv.DictReader(io.StringIO(text))
+        return [
+            {field: (row.get(field) or '').strip() for field in PunchIngestionService.CSV_FIELDS}
+            for row in reader
+        ]
+
+    @staticmethod
+    def parse_punch(row):
+        """(employee_code, aware timestamp, location) or raises ValueError"""
+        from django.utils.dateparse import parse_datetime
+        from .constants import PUNCH_LOCATIONS
+
+        employee_code = str(row.get('employee_id') or '').strip()
+        if not employee_code:
+            raise ValueError("employee_id is required")
+
+        raw_timestamp = row.get('timestamp')
+        timestamp = raw_timestamp if hasattr(raw_timestamp, 'tzinfo') else parse_datetime(str(raw_timestamp or '').strip())
+        if timestamp is None:
+            raise ValueError(f"Invalid timestamp: {raw_timestamp}")
+        if not timezone.is_aware(timestamp):
+            timestamp = timezone.make_aware(timestamp)
+
+        location = (row.get('location') or 'OFFICE').strip().upper()
+        if location not in PUNCH_LOCATIONS:
+            raise ValueError(f"Invalid location: {location}")
+        return employee_code, timestamp, location
+
+    @staticmethod
+    def ingest(rows, user=None, notify=True):
+        """
+        Upsert attendance for a batch of punches.
+        Returns counts plus per-row errors ({"row": index, "message": ...}).
+        """
+        from collections import defaultdict
+        from django.db import transaction
+        from employees.models import Employee
+        from holidays.services import WorkCalendar
+        from leaves.models import Leave
+        from .constants import PUNCH_BULK_BATCH_SIZE
+        from .models import Attendance
+
+        errors = []
+        parsed = []
+        for index, row in enumerate(rows):
+            try:
+                parsed.append((index,) + PunchIngestionService.parse_punch(row))
+            except (ValueError, TypeError, AttributeError) as e:
+                errors.append({"row": index, "message": str(e)})
+
+        employees = {
+            emp.employee_id: emp for emp in Employee.objects.filter(
+                employee_id__in={code for _, code, _, _ in parsed}
+            ).select_related('company')
+        }
+
+        # (employee_pk, date) -> {location: [timestamps]}
+        grouped = defaultdict(lambda: defaultdict(list))
+        row_indexes = defaultdict(list)
+        for index, code, timestamp, location in parsed:
+            employee = employees.get(code)
+            if not employee:
+                errors.append({"row": index, "message": f"Unknown employee_id: {code}"})
+                continue
+            key = (employee.id, timezone.localtime(timestamp).date())
+            grouped[key][location].append(timestamp)
+            row_indexes[key].append(index)
+
+        result = {"received": len(rows), "created": 0, "updated": 0, "rejected": 0, "errors": errors}
+        if not grouped:
+            result["rejected"] = len(errors)
+            return result
+
+        employees_by_pk = {emp.id: emp for emp in employees.values()}
+        employee_ids = {emp_id for emp_id, _ in grouped}
+        dates = {day for _, day in grouped}
+        min_date, max_date = min(dates), max(dates)
+
+        # Same calendar rules as check-in, resolved in two queries
+        holiday_dates = set(WorkCalendar.holidays_between(min_date, max_date))
+        leave_ranges = defaultdict(list)
+        for emp_id, from_date, to_date in Leave.objects.filter(
+            employee_id__in=employee_ids,
+            from_date__lte=max_date,
+            to_date__gte=min_date,
+            status__in=APPROVED_LEAVE_STATUSES,
+        ).values_list('employee_id', 'from_date', 'to_date'):
+            leave_ranges[emp_id].append((from_date, to_date))
+        archived_years = AttendanceArchiveService.archived_years()
+
+        for key in list(grouped):
+            emp_id, day = key
+            reason = None
+            if day.year in archived_years:
+                reason = f"Attendance for {day.year} is archived and read-only."
+            elif day.weekday() >= 5:
+                reason = f"{day} is a weekend"
+            elif day in holiday_dates:
+                reason = f"{day} is a holiday"
+            elif any(f <= day <= t for f, t in leave_ranges[emp_id]):
+                reason = f"Approved leave on {day}"
+            if reason:
+                errors.extend({"row": index, "message": reason} for index in row_indexes[key])
+                del grouped[key]
+
+        today = timezone.now().date()
+        now = timezone.now()
+        default_hours = getattr(settings, 'ATTENDANCE_DEFAULT_WORKING_HOURS', '09:00')
+        default_total_time = getattr(settings, 'ATTENDANCE_DEFAULT_TOTAL_TIME_SECONDS', 32400)
+        created_rows, updated_rows = [], []
+
+        with transaction.atomic():
+            existing = {
+                (att.employee_id, att.date): att
+                for att in Attendance.objects.select_for_update().filter(
+                    employee_id__in=employee_ids, date__in=dates
+                )
+            }
+            for key, locations in grouped.items():
+                emp_id, day = key
+                attendance = existing.get(key)
+                is_new = attendance is None
+                if is_new:
+                    attendance = Attendance(
+                        employee_id=emp_id,
+                        date=day,
+                        office_working_hours=default_hours,
+                        orignal_total_time=default_total_time,
+                        timesheet_status='APPROVED',
+                        timesheet_approved_by=user,
+                        timesheet_approved_at=now,
+                        created_by=user,
+                    )
+
+                for location, timestamps in locations.items():
+                    in_field, out_field = PunchIngestionService.TIME_FIELDS[location]
+                    times = sorted(
+                        [t for t in (getattr(attendance, in_field), getattr(attendance, out_field)) if t] + timestamps
+                    )
+                    setattr(attendance, in_field, times[0])
+                    setattr(attendance, out_field, times[-1] if len(times) > 1 else None)
+
+                attendance.day_type = AttendanceCalculationService.resolve_day_type(
+                    day, employees_by_pk[emp_id].joining_date, False, False,
+                    AttendanceCalculationService.has_work_time(attendance), today
+                )
+                attendance.updated_by = user
+                attendance.updated_at = now
+                (created_rows if is_new else updated_rows).append(attendance)
+
+            AttendanceCalculationService.apply_derived_fields_batch(created_rows + updated_rows)
+            PunchIngestionService.bulk_create(created_rows, batch_size=PUNCH_BULK_BATCH_SIZE)
+            Attendance.objects.bulk_update(
+                updated_rows, PunchIngestionService.UPDATE_FIELDS, batch_size=PUNCH_BULK_BATCH_SIZE
+            )
+
+            # bulk writes skip post_save, so keep the month summaries, alerts and day bitmaps in step here
+            for emp_id, year, month in {(a.employee_id, a.date.year, a.date.month) for a in created_rows + updated_rows}:
+                MonthSummaryService.refresh_seconds(emp_id, year, month, late_days=True)
+            AttendanceAlertService.sync(created_rows + updated_rows)
+            DayStatusBitmapService.sync(created_rows + updated_rows)
+
+            if notify and (created_rows or updated_rows):
+                transaction.on_commit(lambda: PunchIngestionService.notify_batch(
+                    employees_by_pk, created_rows, updated_rows
+                ))
+
+        result.update({
+            "created": len(created_rows),
+            "updated": len(updated_rows),
+            "rejected": len(errors),
+            "errors": sorted(errors, key=lambda e: e["row"]),
+        })
+        return result
+
+    @staticmethod
+    def notify_batch(employees_by_pk, created_rows, updated_rows):
+        """One management-channel digest per company for the whole batch"""
+        import logging
+        from collections import defaultdict
+        from notifications.slack_utils import SlackNotificationService
+
+        per_company = defaultdict(lambda: {"company": None, "employees": set(), "created": 0, "updated": 0})
+        for rows, counter in ((created_rows, "created"), (updated_rows, "updated")):
+            for attendance in rows:
+                employee = employees_by_pk[attendance.employee_id]
+                if not employee.company_id:
+                    continue
+                stats = per_company[employee.company_id]
+                stats["company"] = employee.company
+                stats["employees"].add(employee.id)
+                stats[counter] += 1
+
+        for stats in per_company.values():
+            try:
+                SlackNotificationService.notify_punch_batch(
+                    stats["company"], len(stats["employees"]), stats["created"], stats["updated"]
+                )
+            except Exception as e:
+                logging.getLogger(__name__).error(f"Error sending punch batch notification: {e}")
+
+
+class PunchEventService:
+    """
+    Append-only punch log (PunchEvent) and its compaction into Attendance.
+
+    Check-in/out and the Slack keyword handler only INSERT events, without
+    locking the Attendance row. compact_day() folds a day's pending events
+    into its row inline (with save(), so the usual signals run), compact()
+    does the same for any backlog in bulk, and replay() rebuilds the punch
+    fields of a range from the full log.
+    """
+
+    MARKER_FIELDS = {
+        'STANDUP': 'standup_time',
+        'REPORT': 'report_time',
+        'LUNCH_START': 'lunch_start_time',
+        'LUNCH_END': 'lunch_end_time',
+    }
+    PUNCH_FIELDS = ['office_in_time', 'office_out_time', 'home_in_time', 'home_out_time'] + list(MARKER_FIELDS.values())
+    UPDATE_FIELDS = PunchIngestionService.UPDATE_FIELDS + list(MARKER_FIELDS.values()) + [
+        'is_working_from_home', 'day_text', 'text',
+        'timesheet_status', 'timesheet_submitted_at', 'timesheet_approved_by', 'timesheet_approved_at',
+    ]
+
+    @staticmethod
+    def record(employee, day, punches, user=None, source='API', notes='', is_working_from_home=False):
+        """
+        Append punches [(event_type, location, timestamp)] for one employee-day
+        in a single INSERT. `notes` go on the first punch.
+        """
+        from .models import PunchEvent
+
+        return PunchEvent.objects.bulk_create([
+            PunchEvent(
+                employee=employee,
+                date=day,
+                event_type=event_type,
+                location=location or '',
+                timestamp=timestamp,
+                is_working_from_home=is_working_from_home,
+                notes=notes if index == 0 else '',
+                source=source,
+                recorded_by=user,
+            )
+            for index, (event_type, location, timestamp) in enumerate(punches)
+        ])
+
+    @staticmethod
+    def fold(attendance, events, is_new=False, times_only=False):
+        """
+        Apply events to an Attendance instance in the order they were
+        recorded. Check-ins keep the earliest time and check-outs the latest,
+        except manual WFH times, which replace the stored ones; markers,
+        flags and notes take the last event's value.
+        times_only (replay) leaves notes and timesheet status alone.
+        """
+        for event in sorted(events, key=lambda e: e.id):
+            if event.event_type in PunchEventService.MARKER_FIELDS:
+                setattr(attendance, PunchEventService.MARKER_FIELDS[event.event_type], event.timestamp)
+                continue
+
+            in_field, out_field = PunchIngestionService.TIME_FIELDS[event.location or 'OFFICE']
+            field = in_field if event.event_type == 'IN' else out_field
+            current = getattr(attendance, field)
+            if current is None or (event.is_working_from_home and event.location == 'HOME'):
+                setattr(attendance, field, event.timestamp)
+            else:
+                pick = min if event.event_type == 'IN' else max
+                setattr(attendance, field, pick(current, event.timestamp))
+            if times_only:
+                continue
+
+            if event.event_type == 'OUT':
+                if event.notes:
+                    attendance.text = event.notes
+            else:
+                attendance.is_working_from_home = event.is_working_from_home
+                if event.notes:
+                    attendance.day_text = event.notes
+                # Office check-ins are auto-approved; WFH needs an admin unless recorded by one
+                user = event.recorded_by
+                approved = bool(user and (user.is_staff or user.is_superuser))
+                if event.is_working_from_home:
+                    attendance.timesheet_status = 'APPROVED' if approved else 'PENDING'
+                    attendance.timesheet_submitted_at = event.created_at
+                    if approved:
+                        attendance.timesheet_approved_by = user
+                        attendance.timesheet_approved_at = event.created_at
+                elif is_new or attendance.timesheet_status in ('', 'PENDING'):
+                    attendance.timesheet_status = 'APPROVED'
+                    attendance.timesheet_approved_by = user
+                    attendance.timesheet_approved_at = event.created_at
+            if event.recorded_by_id:
+                attendance.updated_by_id = event.recorded_by_id
+        return attendance
+
+    @staticmethod
+    def covered_fields(events):
+        """The punch fields the given events write to"""
+        fields = set()
+        for event in events:
+            if event.event_type in PunchEventService.MARKER_FIELDS:
+                fields.add(PunchEventService.MARKER_FIELDS[event.event_type])
+            else:
+                in_field, out_field = PunchIngestionService.TIME_FIELDS[event.location or 'OFFICE']
+                fields.add(in_field if event.event_type == 'IN' else out_field)
+        return fields
+
+    @staticmethod
+    def _new_attendance(employee_id, day, events):
+        from .models import Attendance
+
+        first = min(events, key=lambda e: (e.timestamp, e.id or 0))
+        return Attendance(
+            employee_id=employee_id,
+            date=day,
+            office_working_hours=getattr(settings, 'ATTENDANCE_DEFAULT_WORKING_HOURS', '09:00'),
+            orignal_total_time=getattr(settings, 'ATTENDANCE_DEFAULT_TOTAL_TIME_SECONDS', 32400),
+            created_by_id=first.recorded_by_id,
+            updated_by_id=first.recorded_by_id,
+        )
+
+    @staticmethod
+    def project(employee, day):
+        """
+        The day's Attendance as it will look once pending events are
+        compacted: the stored row (read without a lock) with pending events
+        folded in memory. Not saved; None when there is neither.
+        """
+        from .models import Attendance, PunchEvent
+
+        attendance = Attendance.objects.filter(employee=employee, date=day).first()
+        events = list(PunchEvent.objects.filter(
+            employee=employee, date=day, compacted_at__isnull=True
+        ).select_related('recorded_by'))
+        if not events:
+            return attendance
+        is_new = attendance is None
+        if is_new:
+            attendance = PunchEventService._new_attendance(employee.id, day, events)
+            attendance.employee = employee
+        PunchEventService.fold(attendance, events, is_new=is_new)
+        AttendanceCalculationService.determine_day_type(attendance)
+        AttendanceCalculationService.apply_derived_fields(attendance)
+        return attendance
+
+    @staticmethod
+    def compact_day(employee, day):
+        """
+        Fold the day's pending events into its row and save it. Concurrent
+        calls serialize on the pending events; later ones find none left.
+        """
+        from django.db import transaction
+        from .models import Attendance, PunchEvent
+
+        with transaction.atomic():
+            events = list(PunchEvent.objects.select_for_update(of=('self',)).filter(
+                employee=employee, date=day, compacted_at__isnull=True
+            ).select_related('recorded_by'))
+            attendance = Attendance.objects.select_for_update().filter(employee=employee, date=day).first()
+            if not events:
+                return attendance
+
+            is_new = attendance is None
+            if is_new:
+                attendance = PunchEventService._new_attendance(employee.id, day, events)
+                attendance.employee = employee
+            PunchEventService.fold(attendance, events, is_new=is_new)
+            AttendanceCalculationService.determine_day_type(attendance, today=timezone.now().date())
+            attendance.save()
+            PunchEvent.objects.filter(id__in=[e.id for e in events]).update(compacted_at=timezone.now())
+        return attendance
+
+    @staticmethod
+    def settle(employee, day):
+        """
+        The day's row after a punch, per ATTENDANCE_PUNCH_EVENT_COMPACTION.
+        'inline' compacts the day now (one short lock on this employee-day's
+        row). 'deferred' answers from the projection without locking, except
+        for the day's first punch: there is no row to contend on yet, so it is
+        created inline and the caller always gets a stored id.
+        """
+        from .constants import PUNCH_EVENT_COMPACTION
+
+        if PUNCH_EVENT_COMPACTION == 'deferred':
+            attendance = PunchEventService.project(employee, day)
+            if attendance is None or attendance.pk:
+                return attendance
+        return PunchEventService.compact_day(employee, day)
+
+    @staticmethod
+    def _write_days(grouped, existing, times_only=False):
+        """
+        Classify, derive and bulk-write the folded rows of `grouped`.
+        Returns (created_rows, updated_rows).
+        """
+        from .constants import PUNCH_BULK_BATCH_SIZE
+        from .models import Attendance
+
+        employee_ids = {emp_id for emp_id, _ in grouped}
+        dates = [day for _, day in grouped]
+        holidays, leave_ranges, joining_dates = AttendanceRecomputeService.load_calendar(
+            list(employee_ids), min(dates), max(dates)
+        )
+        today = timezone.now().date()
+        now = timezone.now()
+        created_rows, updated_rows = [], []
+        for (emp_id, day), events in grouped.items():
+            attendance = existing.get((emp_id, day))
+            is_new = attendance is None
+            if is_new:
+                attendance = PunchEventService._new_attendance(emp_id, day, events)
+            PunchEventService.fold(attendance, events, is_new=is_new, times_only=times_only)
+            attendance.day_type = AttendanceCalculationService.resolve_day_type(
+                day, joining_dates.get(emp_id),
+                any(f <= day <= t for f, t in leave_ranges.get(emp_id, ())),
+                day in holidays,
+                AttendanceCalculationService.has_work_time(attendance), today
+            )
+            attendance.updated_at = now
+            (created_rows if is_new else updated_rows).append(attendance)
+
+        rows = created_rows + updated_rows
+        AttendanceCalculationService.apply_derived_fields_batch(rows)
+        PunchIngestionService.bulk_create(created_rows, batch_size=PUNCH_BULK_BATCH_SIZE)
+        Attendance.objects.bulk_update(updated_rows, PunchEventService.UPDATE_FIELDS, batch_size=PUNCH_BULK_BATCH_SIZE)
+
+        # bulk writes skip post_save, so keep the month summaries, alerts and day bitmaps in step here
+        for emp_id, year, month in {(a.employee_id, a.date.year, a.date.month) for a in rows}:
+            MonthSummaryService.refresh_seconds(emp_id, year, month, late_days=True)
+        AttendanceAlertService.sync(rows)
+        DayStatusBitmapService.sync(rows)
+        return created_rows, updated_rows
+
+    @staticmethod
+    def notify_compacted(created_rows, updated_rows):
+        """
+        The Slack notifications post_save would have sent for bulk-compacted
+        rows (daily punch-in, late alert, missing entry, timing update).
+        """
+        import logging
+        from employees.models import Employee
+        from notifications.slack_utils import SlackNotificationService
+
+        rows = [(att, True) for att in created_rows] + [(att, False) for att in updated_rows]
+        employees = Employee.objects.select_related('company').in_bulk({att.employee_id for att, _ in rows})
+        for att, created in rows:
+            att.employee = employees[att.employee_id]
+            try:
+                SlackNotificationService.notify_attendance_saved(att, created)
+            except Exception as e:
+                logging.getLogger(__name__).error(f"Error sending compacted attendance notification: {e}")
+
+    @staticmethod
+    def compact(batch_size=500, employee_ids=None, notify=True):
+        """
+        Fold up to `batch_size` pending events (oldest first) into their rows
+        with bulk writes. Locked events are skipped, so several workers can
+        run side by side. Events for archived years are stamped without
+        effect. Bulk writes skip post_save, so the attendance Slack
+        notifications are sent here once the batch commits.
+        Returns {"events", "created", "updated"}.
+        """
+        from collections import defaultdict
+        from django.db import connection, transaction
+        from .models import Attendance, PunchEvent
+
+        created_rows, updated_rows = [], []
+        with transaction.atomic():
+            pending = PunchEvent.objects.select_for_update(
+                skip_locked=connection.features.has_select_for_update_skip_locked, of=('self',)
+            ).filter(compacted_at__isnull=True)
+            if employee_ids:
+                pending = pending.filter(employee_id__in=employee_ids)
+            events = list(pending.select_related('recorded_by').order_by('id')[:batch_size])
+            if not events:
+                return {"events": 0, "created": 0, "updated": 0}
+
+            archived_years = AttendanceArchiveService.archived_years()
+            grouped = defaultdict(list)
+            for event in events:
+                if event.date.year not in archived_years:
+                    grouped[(event.employee_id, event.date)].append(event)
+
+            if grouped:
+                existing = {
+                    (att.employee_id, att.date): att
+                    for att in Attendance.objects.select_for_update().filter(
+                        employee_id__in={emp_id for emp_id, _ in grouped},
+                        date__in={day for _, day in grouped},
+                    )
+                }
+                created_rows, updated_rows = PunchEventService._write_days(grouped, existing)
+            PunchEvent.objects.filter(id__in=[e.id for e in events]).update(compacted_at=timezone.now())
+        if notify and (created_rows or updated_rows):
+            # After commit, so Slack calls never hold the row locks
+            transaction.on_commit(lambda: PunchEventService.notify_compacted(created_rows, updated_rows))
+        return {"events": len(events), "created": len(created_rows), "updated": len(updated_rows)}
+
+    @staticmethod
+    def replay(start_date, end_date, employee_ids=None):
+        """
+        Rebuild the in/out and marker times of every day in the range that has
+        events from the whole log (compacted or not), for recomputation after
+        a bad edit. Only the fields some event of the day writes to are reset;
+        times from other writers (ingestion, timesheets, manual edits), notes
+        and timesheet status are left as they are. Archived years are skipped.
+        Returns {"days": n, "created": n, "updated": n}.
+        """
+        from collections import defaultdict
+        from django.db import transaction
+        from .models import Attendance, PunchEvent
+
+        events = PunchEvent.objects.filter(date__gte=start_date, date__lte=end_date)
+        if employee_ids:
+            events = events.filter(employee_id__in=employee_ids)
+        archived_years = AttendanceArchiveService.archived_in_range(start_date, end_date)
+        if archived_years:
+            events = events.exclude(date__year__in=archived_years)
+        grouped = defaultdict(list)
+        for event in events.select_related('recorded_by'):
+            grouped[(event.employee_id, event.date)].append(event)
+        if not grouped:
+            return {"days": 0, "created": 0, "updated": 0}
+
+        with transaction.atomic():
+            existing = {}
+            for att in Attendance.objects.select_for_update().filter(
+                employee_id__in={emp_id for emp_id, _ in grouped},
+                date__gte=start_date, date__lte=end_date,
+            ):
+                day_events = grouped.get((att.employee_id, att.date))
+                if day_events:
+                    # Only fields the log covers: times set by other writers stay
+                    for field in PunchEventService.covered_fields(day_events):
+                        setattr(att, field, None)
+                    existing[(att.employee_id, att.date)] = att
+            created_rows, updated_rows = PunchEventService._write_days(grouped, existing, times_only=True)
+            PunchEvent.objects.filter(
+                id__in=[e.id for day_events in grouped.values() for e in day_events],
+                compacted_at__isnull=True,
+            ).update(compacted_at=timezone.now())
+        return {"days": len(grouped), "created": len(created_rows), "updated": len(updated_rows)}
+
+
+class TimesheetSubmissionService:
+    """
+    Whole-week timesheet submission: entries are checked against one
+    preloaded holiday/leave/attendance set and written with bulk
+    operations in a single transaction, with one management digest.
+    """
+
+    UPDATE_FIELDS = PunchIngestionService.UPDATE_FIELDS + [
+        'is_working_from_home', 'text', 'day_text', 'tracker_screenshot', 'entry_type',
+        'timesheet_status', 'timesheet_submitted_at', 'timesheet_approved_by', 'timesheet_approved_at',
+    ]
+
+    @staticmethod
+    def submit_week(employee, entries, user=None, notify=True):
+        """
+        Submit validated WeeklyTimesheetSubmitSerializer entries (home times
+        already parsed to aware datetimes) for one employee.
+        All-or-nothing: returns (rows, errors) and writes nothing when any
+        entry is rejected ({"date": ..., "message": ...}).
+        """
+        from django.db import transaction
+        from holidays.services import WorkCalendar
+        from leaves.models import Leave
+        from .constants import DATE_FORMAT
+        from .models import Attendance
+
+        dates = [entry['date'] for entry in entries]
+        start_date, end_date = min(dates), max(dates)
+        holidays = WorkCalendar.holidays_between(start_date, end_date)
+        leaves = list(Leave.objects.filter(
+            employee=employee,
+            from_date__lte=end_date,
+            to_date__gte=start_date,
+            status__in=APPROVED_LEAVE_STATUSES,
+        ).only('id', 'leave_type', 'from_date', 'to_date', 'day_status'))
+        leave_days = WorkCalendar.leave_index(leaves, start_date, end_date)
+        full_day_leaves = WorkCalendar.leave_index(
+            [leave for leave in leaves if leave.day_status is None], start_date, end_date
+        )
+
+        errors = []
+        for entry in entries:
+            day = entry['date']
+            full_day_leave = full_day_leaves.get(day)
+            if day.weekday() >= 5:
+                message = f"Cannot submit timesheet on weekends. {day.strftime('%A')} is a weekend."
+            elif day in holidays:
+                message = f"Cannot submit timesheet on holidays. {holidays[day]} is a holiday."
+            elif full_day_leave:
+                message = (
+                    f"Cannot submit timesheet for this day. You have an approved full-day "
+                    f"{full_day_leave.leave_type} from {full_day_leave.from_date.strftime(DATE_FORMAT)} "
+                    f"to {full_day_leave.to_date.strftime(DATE_FORMAT)}."
+                )
+            elif AttendanceArchiveService.is_archived(day.year):
+                message = f"Attendance for {day.year} is archived and read-only."
+            else:
+                continue
+            errors.append({"date": day.strftime(DATE_FORMAT), "message": message})
+        if errors:
+            return [], errors
+
+        now = timezone.now()
+        today = now.date()
+        default_hours = getattr(settings, 'ATTENDANCE_DEFAULT_WORKING_HOURS', '09:00')
+        default_total_time = getattr(settings, 'ATTENDANCE_DEFAULT_TOTAL_TIME_SECONDS', 32400)
+        created_rows, updated_rows = [], []
+
+        with transaction.atomic():
+            existing = {
+                att.date: att for att in Attendance.objects.select_for_update().filter(
+                    employee=employee, date__in=dates
+                )
+            }
+            for day, attendance in existing.items():
+                # Resubmission is only allowed after a rejection
+                if attendance.timesheet_status in ['PENDING', 'APPROVED']:
+                    errors.append({
+                        "date": day.strftime(DATE_FORMAT),
+                        "message": f"Timesheet already submitted for this date. Status: {attendance.get_timesheet_status_display()}"
+                    })
+            if errors:
+                return [], sorted(errors, key=lambda e: e["date"])
+
+            for entry in entries:
+                day = entry['date']
+                attendance = existing.get(day)
+                is_new = attendance is None
+                if is_new:
+                    attendance = Attendance(
+                        employee=employee,
+                        date=day,
+                        office_working_hours=default_hours,
+                        orignal_total_time=default_total_time,
+                        created_by=user,
+                    )
+
+                total_time_seconds = int(float(entry['total_time']) * 3600)
+                is_working_from_home = entry.get('is_working_from_home', False)
+                comments = entry.get('comments', '').strip()
+                home_in_time = home_out_time = None
+                if is_working_from_home:
+                    home_in_time = entry.get('home_in_time')
+                    home_out_time = entry.get('home_out_time')
+                    # Missing times default to the office start plus total_time
+                    if not home_in_time:
+                        hour, minute = map(int, (attendance.office_working_hours or '09:00').split(':'))
+                        home_in_time = timezone.make_aware(
+                            datetime_cls.combine(day, datetime_cls.min.time().replace(hour=hour, minute=minute))
+                        )
+                    if not home_out_time:
+                        home_out_time = home_in_time + timedelta(seconds=total_time_seconds)
+                    if home_out_time < home_in_time:
+                        errors.append({"date": day.strftime(DATE_FORMAT), "message": "Home out time cannot be before in time."})
+                        continue
+
+                if entry.get('tracker_screenshot'):
+                    attendance.tracker_screenshot = entry['tracker_screenshot']
+                attendance.is_working_from_home = is_working_from_home
+                attendance.home_in_time = home_in_time
+                attendance.home_out_time = home_out_time
+                attendance.text = comments
+                attendance.day_text = comments
+                attendance.seconds_actual_worked_time = total_time_seconds
+                attendance.timesheet_submitted_at = now
+                # Non-WFH days are auto-approved, WFH days wait for an admin
+                if is_working_from_home:
+                    attendance.timesheet_status = 'PENDING'
+                    attendance.timesheet_approved_by = None
+                    attendance.timesheet_approved_at = None
+                else:
+                    attendance.timesheet_status = 'APPROVED'
+                    attendance.timesheet_approved_by = user
+                    attendance.timesheet_approved_at = now
+                attendance.entry_type = 'TIMESHEET'
+                attendance.updated_by = user
+                attendance.updated_at = now
+                attendance.day_type = AttendanceCalculationService.resolve_day_type(
+                    day, employee.joining_date, day in leave_days, False,
+                    AttendanceCalculationService.has_work_time(attendance), today
+                )
+                (created_rows if is_new else updated_rows).append(attendance)
+            if errors:
+                return [], errors
+
+            rows = created_rows + updated_rows
+            AttendanceCalculationService.apply_derived_fields_batch(rows)
+            PunchIngestionService.bulk_create(created_rows)
+            Attendance.objects.bulk_update(updated_rows, TimesheetSubmissionService.UPDATE_FIELDS)
+
+            # bulk writes skip post_save, so keep the month summaries, alerts and day bitmaps in step here
+            for year, month in {(a.date.year, a.date.month) for a in rows}:
+                MonthSummaryService.refresh_seconds(employee.id, year, month, late_days=True)
+            AttendanceAlertService.sync(rows)
+            DayStatusBitmapService.sync(rows)
+
+            if notify:
+                transaction.on_commit(lambda: TimesheetSubmissionService.notify_week(employee, rows))
+
+        return sorted(rows, key=lambda a: a.date), []
+
+    @staticmethod
+    def notify_week(employee, rows):
+        """One management-channel message for the submitted week"""
+        import logging
+        from notifications.slack_utils import SlackNotificationService
+
+        try:
+            SlackNotificationService.notify_weekly_timesheet_submitted(employee, sorted(rows, key=lambda a: a.date))
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Error sending weekly timesheet notification: {e}")
+
+
+class TimesheetApprovalService:
+    """
+    Bulk approve/reject of PENDING timesheet entries: the target rows are
+    resolved (and hierarchy-scoped) in one query, changed with a single
+    UPDATE and each employee gets one digest message.
+    """
+
+    @staticmethod
+    def decide(queryset, action, user=None, admin_notes='', notify=True):
+        """
+        Approve or reject the PENDING rows of `queryset`, which the caller
+        has already narrowed to what `user` may decide on.
+        Returns the decided rows as [(id, employee_id, date)].
+        """
+        from collections import defaultdict
+        from django.db import transaction
+        from .models import Attendance
+
+        new_status = 'APPROVED' if action == 'approve' else 'REJECTED'
+        now = timezone.now()
+
+        with transaction.atomic():
+            rows = list(
+                queryset.filter(timesheet_status='PENDING')
+                .select_for_update(of=('self',))
+                .order_by('employee_id', 'date')
+                .values_list('id', 'employee_id', 'date')
+            )
+            if not rows:
+                return []
+            Attendance.objects.filter(id__in=[row[0] for row in rows]).update(
+                timesheet_status=new_status,
+                timesheet_approved_by=user,
+                timesheet_approved_at=now,
+                timesheet_admin_notes=admin_notes,
+                updated_by=user,
+                updated_at=now,
+            )
+
+            # update() skips post_save; rejected days drop out of the month totals
+            for emp_id, year, month in {(emp_id, day.year, day.month) for _, emp_id, day in rows}:
+                MonthSummaryService.refresh_seconds(emp_id, year, month)
+
+            if notify:
+                dates_by_employee = defaultdict(list)
+                for _, emp_id, day in rows:
+                    dates_by_employee[emp_id].append(day)
+                transaction.on_commit(lambda: TimesheetApprovalService.notify_digest(
+                    dates_by_employee, new_status.capitalize()
+                ))
+        return rows
+
+    @staticmethod
+    def notify_digest(dates_by_employee, status_display):
+        """One DM per employee listing the decided days"""
+        import logging
+        from employees.models import Employee
+        from notifications.slack_utils import SlackNotificationService
+
+        for employee in Employee.objects.filter(id__in=dates_by_employee).select_related('company'):
+            try:
+                SlackNotificationService.notify_timesheet_decisions(
+                    employee, dates_by_employee[employee.id], status_display
+                )
+            except Exception as e:
+                logging.getLogger(__name__).error(f"Error sending timesheet decision digest: {e}")
+
+
+class AttendanceExportService:
+    """
+    Constant-memory attendance dumps: a `.values_list()` projection read in
+    keyset pages ordered by (date, id) and encoded row by row. Server-side
+    cursors are not available on MySQL, so each page is its own LIMIT query.
+    """
+
+    # (output column, queryset lookup)
+    COLUMNS = [
+        ('id', 'id'),
+        ('employee_id', 'employee__employee_id'),
+        ('first_name', 'employee__first_name'),
+        ('last_name', 'employee__last_name'),
+        ('date', 'date'),
+        ('day_type', 'day_type'),
+        ('office_in_time', 'office_in_time'),
+        ('office_out_time', 'office_out_time'),
+        ('home_in_time', 'home_in_time'),
+        ('home_out_time', 'home_out_time'),
+        ('office_working_hours', 'office_working_hours'),
+        ('seconds_actual_worked_time', 'seconds_actual_worked_time'),
+        ('seconds_extra_time', 'seconds_extra_time'),
+        ('extra_time_status', 'extra_time_status'),
+        ('is_working_from_home', 'is_working_from_home'),
+        ('entry_type', 'entry_type'),
+        ('timesheet_status', 'timesheet_status'),
+        ('admin_alert', 'admin_alert'),
+    ]
+
+    class Echo:
+        """File-like object whose write() returns the value, for csv.writer"""
+        def write(self, value):
+            return value
+
+    @staticmethod
+    def iter_rows(queryset, chunk_size=None):
+        """Rows of `queryset` in (date, id) order, `chunk_size` per query"""
+        from django.db.models import Q
+        from .constants import EXPORT_CHUNK_SIZE
+
+        chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+        lookups = [lookup for _, lookup in AttendanceExportService.COLUMNS]
+        date_index, id_index = lookups.index('date'), lookups.index('id')
+        queryset = queryset.order_by('date', 'id').values_list(*lookups)
+        page = queryset
+        while True:
+            rows = list(page[:chunk_size])
+            yield from rows
+            if len(rows) < chunk_size:
+                return
+            last_date, last_id = rows[-1][date_index], rows[-1][id_index]
+            page = queryset.filter(Q(date__gt=last_date) | Q(date=last_date, id__gt=last_id))
+
+    @staticmethod
+    def format_value(value, empty=''):
+        if value is None:
+            return empty
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return value
+
+    @staticmethod
+    def stream_csv(queryset, chunk_size=None):
+        import csv
+        writer = csv.writer(AttendanceExportService.Echo())
+        yield writer.writerow([column for column, _ in AttendanceExportService.COLUMNS])
+        for row in AttendanceExportService.iter_rows(queryset, chunk_size):
+            yield writer.writerow([AttendanceExportService.format_value(v) for v in row])
+
+    @staticmethod
+    def stream_ndjson(queryset, chunk_size=None):
+        import json
+        columns = [column for column, _ in AttendanceExportService.COLUMNS]
+        for row in AttendanceExportService.iter_rows(queryset, chunk_size):
+            yield json.dumps(
+                dict(zip(columns, (AttendanceExportService.format_value(v, empty=None) for v in row)))
+            ) + '\n'
+
+
+class AttendanceRecomputeService:
+    """
+    Recomputes stored derived fields (seconds, alerts, day_type) straight
+    from `.values()` rows, without Attendance.save() / full_clean / signals.
+    Used by the recompute_attendance command, one shard of employees at a time.
+    """
+
+    READ_FIELDS = [
+        'id', 'employee_id', 'date', 'day_type',
+        'in_time', 'out_time',
+        'office_in_time', 'office_out_time', 'home_in_time', 'home_out_time',
+        'orignal_total_time', 'office_working_hours',
+        'office_seconds_worked', 'home_seconds_worked',
+        'seconds_actual_worked_time', 'seconds_actual_working_time',
+        'office_time_inside', 'seconds_extra_time', 'extra_time_status',
+        'admin_alert', 'admin_alert_message',
+        'is_late', 'late_minutes',
+    ]
+    DERIVED_FIELDS = [
+        'day_type', 'in_time', 'out_time',
+        'office_seconds_worked', 'home_seconds_worked',
+        'seconds_actual_worked_time', 'seconds_actual_working_time',
+        'office_time_inside', 'seconds_extra_time', 'extra_time_status',
+        'admin_alert', 'admin_alert_message',
+        'is_late', 'late_minutes',
+    ]
+
+    @staticmethod
+    def load_calendar(employee_ids, start_date, end_date):
+        """Holidays, approved leave ranges and joining dates for a shard"""
+        from collections import defaultdict
+        from employees.models import Employee
         from holidays.models import Holiday
-        if Holiday.objects.filter(date=date, is_active=True).exists():
-            attendance.day_type = 'HOLIDAY'
-            return
+        from leaves.models import Leave
 
-        # 4. Check for future dates
-        if date > today:
-            attendance.day_type = 'FUTURE_DAY'
-            return
+        holiday_filter = {'is_active': True}
+        leave_filter = {'employee_id__in': employee_ids, 'status__in': APPROVED_LEAVE_STATUSES}
+        if start_date:
+            holiday_filter['date__gte'] = start_date
+            leave_filter['to_date__gte'] = start_date
+        if end_date:
+            holiday_filter['date__lte'] = end_date
+            leave_filter['from_date__lte'] = end_date
 
-        # 5. Check for weekends
-        if date.weekday() >= 5: # Saturday=5, Sunday=6
-            attendance.day_type = 'WEEKEND_OFF'
-            return
+        holidays = set(Holiday.objects.filter(**holiday_filter).values_list('date', flat=True))
+        leave_ranges = defaultdict(list)
+        for emp_id, from_date, to_date in Leave.objects.filter(**leave_filter).values_list(
+            'employee_id', 'from_date', 'to_date'
+        ):
+            leave_ranges[emp_id].append((from_date, to_date))
+        joining_dates = dict(Employee.objects.filter(id__in=employee_ids).values_list('id', 'joining_date'))
+        return holidays, leave_ranges, joining_dates
 
-        # If has work time recorded
-        if (attendance.in_time and attendance.out_time) or \
-           (attendance.office_in_time and attendance.office_out_time) or \
-           (attendance.home_in_time and attendance.home_out_time):
-            attendance.day_type = 'WORKING_DAY'
-            return
+    @staticmethod
+    def recompute_rows(rows, holidays, leave_ranges, joining_dates, today, total_time=None):
+        """
+        Returns [(row, new_values)] for the rows whose derived fields change.
+        `total_time` overrides orignal_total_time (e.g. after a settings change).
+        """
+        from types import SimpleNamespace
 
-        # Default for past working days with no activity
-        if date < today:
-            attendance.day_type = 'ABSENT'
-        else:
-            attendance.day_type = 'WORKING_DAY'
+        if not rows:
+            return []
+        records = []
+        for row in rows:
+            record = SimpleNamespace(**row)
+            if total_time is not None:
+                record.orignal_total_time = total_time
+            record.day_type = AttendanceCalculationService.resolve_day_type(
+                record.date,
+                joining_dates.get(record.employee_id),
+                any(f <= record.date <= t for f, t in leave_ranges.get(record.employee_id, ())),
+                record.date in holidays,
+                AttendanceCalculationService.has_work_time(record),
+                today,
+            )
+            records.append(record)
+
+        AttendanceCalculationService.apply_derived_fields_batch(records)
+
+        fields = list(AttendanceRecomputeService.DERIVED_FIELDS)
+        if total_time is not None:
+            fields.append('orignal_total_time')
+        changed = []
+        for row, record in zip(rows, records):
+            new_values = {f: getattr(record, f) for f in fields if getattr(record, f) != row[f]}
+            if new_values:
+                changed.append((row, new_values))
+        return changed
+
+    @staticmethod
+    def recompute_shard(employee_ids, start_date=None, end_date=None, chunk_size=2000,
+                        dry_run=False, total_time=None, max_diffs=0):
+        """
+        Recompute one shard of employees. Reads with a values() iterator,
+        computes chunk by chunk and writes changes back with bulk_update.
+        Returns stats: rows, changed, per-field counts and up to `max_diffs` diffs.
+        """
+        from collections import Counter
+        from django.db import transaction
+        from .models import Attendance
+
+        holidays, leave_ranges, joining_dates = AttendanceRecomputeService.load_calendar(
+            employee_ids, start_date, end_date
+        )
+        queryset = Attendance.objects.filter(employee_id__in=employee_ids)
+        if start_date:
+            queryset = queryset.filter(date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(date__lte=end_date)
+        rows_iter = queryset.order_by('employee_id', 'date').values(
+            *AttendanceRecomputeService.READ_FIELDS
+        ).iterator(chunk_size=chunk_size)
+
+        today = timezone.now().date()
+        stats = {'rows': 0, 'changed': 0, 'fields': Counter(), 'diffs': []}
+        months = set()
+
+        def flush(chunk):
+            changed = AttendanceRecomputeService.recompute_rows(
+                chunk, holidays, leave_ranges, joining_dates, today, total_time
+            )
+            stats['rows'] += len(chunk)
+            stats['changed'] += len(changed)
+            for row, new_values in changed:
+                stats['fields'].update(new_values.keys())
+                if len(stats['diffs']) < max_diffs:
+                    stats['diffs'].append({
+                        'id': row['id'],
+                        'employee_id': row['employee_id'],
+                        'date': str(row['date']),
+                        'changes': {f: [str(row[f]), str(v)] for f, v in new_values.items()},
+                    })
+            if dry_run or not changed:
+                return
+
+            update_fields = sorted({f for _, new_values in changed for f in new_values})
+            now = timezone.now()
+            objs = []
+            alert_rows = []
+            for row, new_values in changed:
+                obj = Attendance(id=row['id'], updated_at=now)
+                for f in update_fields:
+                    setattr(obj, f, new_values.get(f, row[f]))
+                objs.append(obj)
+                if {'seconds_actual_worked_time', 'seconds_extra_time', 'is_late'} & new_values.keys():
+                    months.add((row['employee_id'], row['date'].year, row['date'].month))
+                if 'admin_alert' in new_values or 'admin_alert_message' in new_values:
+                    alert_rows.append(Attendance(
+                        id=row['id'], employee_id=row['employee_id'], date=row['date'],
+                        admin_alert=new_values.get('admin_alert', row['admin_alert']),
+                        admin_alert_message=new_values.get('admin_alert_message', row['admin_alert_message']),
+                    ))
+            with transaction.atomic():
+                # updated_at too, it versions cached salary previews
+                Attendance.objects.bulk_update(objs, update_fields + ['updated_at'], batch_size=500)
+                AttendanceAlertService.sync(alert_rows)
+
+        chunk = []
+        for row in rows_iter:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                flush(chunk)
+                chunk = []
+        flush(chunk)
+
+        # bulk_update skips post_save, so refresh the affected month summaries
+        for emp_id, year, month in months:
+            MonthSummaryService.refresh_seconds(emp_id, year, month, late_days=True)
+
+        stats['fields'] = dict(stats['fields'])
+        return stats
+
+
+class WorkingHoursService:
+    """Set-based office_working_hours updates for many employees and days"""
+
+    UPDATE_FIELDS = ['office_working_hours', 'updated_by', 'updated_at'] + [
+        f for f in AttendanceRecomputeService.DERIVED_FIELDS if f != 'day_type'
+    ]
+
+    @staticmethod
+    def bulk_set(employee_ids, start_date, end_date, office_hours, user=None):
+        """
+        Set office_working_hours on every day in the range for the given
+        employees: one query for existing rows and bulk_update for them,
+        bulk_create for missing days. Employees are processed in batches,
+        each in its own short transaction.
+        Returns {"updated": n, "created": n, "employees": n}.
+        Raises ValueError when the range reaches an archived year.
+        """
+        from datetime import timedelta
+        from django.db import transaction
+        from .constants import WORKING_HOURS_EMPLOYEE_BATCH
+        from .models import Attendance
+
+        archived = AttendanceArchiveService.archived_in_range(start_date, end_date)
+        if archived:
+            raise ValueError(f"Attendance for {', '.join(map(str, archived))} is archived and read-only.")
+        employee_ids = sorted(set(employee_ids))
+        days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+        default_total_time = getattr(settings, 'ATTENDANCE_DEFAULT_TOTAL_TIME_SECONDS', 32400)
+        today = timezone.now().date()
+        result = {"updated": 0, "created": 0, "employees": len(employee_ids)}
+
+        for i in range(0, len(employee_ids), WORKING_HOURS_EMPLOYEE_BATCH):
+            batch_ids = employee_ids[i:i + WORKING_HOURS_EMPLOYEE_BATCH]
+            holidays, leave_ranges, joining_dates = AttendanceRecomputeService.load_calendar(
+                batch_ids, start_date, end_date
+            )
+            now = timezone.now()
+
+            with transaction.atomic():
+                existing = list(Attendance.objects.select_for_update().filter(
+                    employee_id__in=batch_ids, date__gte=start_date, date__lte=end_date
+                ))
+                existing_keys = {(att.employee_id, att.date) for att in existing}
+                seconds_before = [
+                    (att.seconds_actual_worked_time, att.seconds_extra_time, att.is_late) for att in existing
+                ]
+                for att in existing:
+                    att.office_working_hours = office_hours
+                    att.updated_by = user
+                    att.updated_at = now
+
+                created = []
+                for emp_id in batch_ids:
+                    for day in days:
+                        if (emp_id, day) in existing_keys:
+                            continue
+                        att = Attendance(
+                            employee_id=emp_id,
+                            date=day,
+                            office_working_hours=office_hours,
+                            orignal_total_time=default_total_time,
+                            created_by=user,
+                            updated_by=user,
+                        )
+                        att.day_type = AttendanceCalculationService.resolve_day_type(
+                            day,
+                            joining_dates.get(emp_id),
+                            any(f <= day <= t for f, t in leave_ranges.get(emp_id, ())),
+                            day in holidays,
+                            False,
+                            today,
+                        )
+                        created.append(att)
+
+                AttendanceCalculationService.apply_derived_fields_batch(existing + created)
+                Attendance.objects.bulk_update(existing, WorkingHoursService.UPDATE_FIELDS, batch_size=500)
+                PunchIngestionService.bulk_create(created, batch_size=500)
+                AttendanceAlertService.sync(existing + created)
+
+                # bulk writes skip post_save; new rows add no seconds, so only
+                # months where a stored row's seconds or lateness moved need refreshing
+                months = {
+                    (att.employee_id, att.date.year, att.date.month)
+                    for att, before in zip(existing, seconds_before)
+                    if before != (att.seconds_actual_worked_time, att.seconds_extra_time, att.is_late)
+                }
+                for emp_id, year, month in months:
+                    MonthSummaryService.refresh_seconds(emp_id, year, month, late_days=True)
+
+            result["updated"] += len(existing)
+            result["created"] += len(created)
+        return result
+
+
+class LeaveAttendanceSyncService:
+    """
+    Set-based Leave -> Attendance synchronisation: one read of the range,
+    in-memory classification against preloaded holidays/leaves, then
+    bulk_create / bulk_update. Bulk writes do not fire Attendance post_save,
+    so no per-day Slack messages are sent.
+    """
+
+    UPDATE_FIELDS = ['leave', 'updated_at'] + AttendanceRecomputeService.DERIVED_FIELDS
+
+    @staticmethod
+    def _classify(rows, employee_ids, start_date, end_date):
+        """Set day_type and derived fields on rows of some employees"""
+        holidays, leave_ranges, joining_dates = AttendanceRecomputeService.load_calendar(
+            list(employee_ids), start_date, end_date
+        )
+        today = timezone.now().date()
+        for att in rows:
+            att.day_type = AttendanceCalculationService.resolve_day_type(
+                att.date,
+                joining_dates.get(att.employee_id),
+                any(f <= att.date <= t for f, t in leave_ranges.get(att.employee_id, ())),
+                att.date in holidays,
+                AttendanceCalculationService.has_work_time(att),
+                today,
+            )
+        AttendanceCalculationService.apply_derived_fields_batch(rows)
+
+    @staticmethod
+    def apply(leave):
+        """Link every day of an approved leave, creating missing attendance rows"""
+        return LeaveAttendanceSyncService.apply_many([leave])
+
+    @staticmethod
+    def apply_many(leaves):
+        """
+        apply() for a batch of leaves (bulk approval): one locking read per
+        employee range, one calendar load and one bulk write for all of them.
+        Overlapping days go to the later leave, as applying one by one would.
+        Days in archived years are left alone.
+        """
+        from datetime import timedelta
+        from django.db import transaction
+        from django.db.models import Q
+        from .models import Attendance
+
+        leaves = sorted(leaves, key=lambda leave: leave.id)
+        if not leaves:
+            return 0, 0
+        spans = LeaveAttendanceSyncService.employee_spans(leaves)
+        archived_years = AttendanceArchiveService.archived_years()
+        now = timezone.now()
+
+        with transaction.atomic():
+            match = Q()
+            for emp_id, (from_date, to_date) in spans.items():
+                match |= Q(employee_id=emp_id, date__gte=from_date, date__lte=to_date)
+            existing = {
+                (att.employee_id, att.date): att
+                for att in Attendance.objects.select_for_update().filter(match)
+            }
+            touched, created = {}, []
+            for leave in leaves:
+                for i in range((leave.to_date - leave.from_date).days + 1):
+                    key = (leave.employee_id, leave.from_date + timedelta(days=i))
+                    if key[1].year in archived_years:
+                        continue
+                    att = touched.get(key) or existing.get(key)
+                    if att is None:
+                        att = Attendance(employee_id=key[0], date=key[1])
+                        created.append(att)
+                    touched[key] = att
+                    att.leave_id = leave.id
+                    att.updated_at = now
+            # Rows in the locked range outside any leave (gaps between two leaves) stay as they are
+            updated = [att for key, att in touched.items() if key in existing]
+
+            LeaveAttendanceSyncService._classify(
+                created + updated, spans, min(f for f, _ in spans.values()), max(t for _, t in spans.values())
+            )
+            PunchIngestionService.bulk_create(created, batch_size=500)
+            Attendance.objects.bulk_update(updated, LeaveAttendanceSyncService.UPDATE_FIELDS, batch_size=500)
+            AttendanceAlertService.sync(created + updated)
+        return len(created), len(updated)
+
+    @staticmethod
+    def revert(leave):
+        """Unlink a leave that is no longer approved and reclassify its days"""
+        return LeaveAttendanceSyncService.revert_many([leave])
+
+    @staticmethod
+    def revert_many(leaves):
+        """revert() for a batch of leaves, with one read, classification and bulk_update"""
+        from django.db import transaction
+        from .models import Attendance
+
+        with transaction.atomic():
+            affected = list(Attendance.objects.select_for_update().filter(
+                leave_id__in=[leave.id for leave in leaves]
+            ).order_by('employee_id', 'date'))
+            if not affected:
+                return 0
+            now = timezone.now()
+            for att in affected:
+                att.leave_id = None
+                att.updated_at = now
+
+            dates = [att.date for att in affected]
+            LeaveAttendanceSyncService._classify(
+                affected, {att.employee_id for att in affected}, min(dates), max(dates)
+            )
+            Attendance.objects.bulk_update(affected, LeaveAttendanceSyncService.UPDATE_FIELDS, batch_size=500)
+            AttendanceAlertService.sync(affected)
+        return len(affected)
+
+    @staticmethod
+    def employee_spans(leaves):
+        """{employee_id: (first from_date, last to_date)} over some leaves"""
+        spans = {}
+        for leave in leaves:
+            from_date, to_date = spans.get(leave.employee_id, (leave.from_date, leave.to_date))
+            spans[leave.employee_id] = (min(from_date, leave.from_date), max(to_date, leave.to_date))
+        return spans
+
+
+class AttendanceArchiveService:
+    """
+    Moves closed years of attendance into ArchivedAttendance (and back) and
+    routes date-bounded reads to the table holding them, so the hot table
+    and its (employee, date) index only grow with open years.
+    """
+
+    @staticmethod
+    def archived_years():
+        from .models import AttendanceArchiveYear
+        return set(AttendanceArchiveYear.objects.values_list('year', flat=True))
+
+    @staticmethod
+    def is_archived(year):
+        from .models import AttendanceArchiveYear
+        return AttendanceArchiveYear.objects.filter(year=year).exists()
+
+    @staticmethod
+    def archived_in_range(start_date, end_date):
+        """Archived years between the two dates, in order"""
+        archived = AttendanceArchiveService.archived_years()
+        return [year for year in range(start_date.year, end_date.year + 1) if year in archived]
+
+    @staticmethod
+    def queryset_for_range(start_date, end_date):
+        """
+        Attendance or ArchivedAttendance queryset for [start_date, end_date].
+        Raises ValueError for ranges mixing archived and open years; use
+        records_for_range() for those.
+        """
+        from .models import Attendance, ArchivedAttendance
+
+        archived = AttendanceArchiveService.archived_years()
+        stores = {year in archived for year in range(start_date.year, end_date.year + 1)}
+        if len(stores) > 1:
+            raise ValueError(
+                f"{start_date} to {end_date} spans archived and open years; use records_for_range()"
+            )
+        model = ArchivedAttendance if stores == {True} else Attendance
+        return model.objects.filter(date__gte=start_date, date__lte=end_date)
+
+    @staticmethod
+    def records_for_range(start_date, end_date, **filters):
+        """Rows from both tables for a range that may cross the archive boundary, by date"""
+        from .models import Attendance, ArchivedAttendance
+
+        archived = AttendanceArchiveService.archived_years()
+        records = []
+        for model, in_store in ((ArchivedAttendance, True), (Attendance, False)):
+            years = [y for y in range(start_date.year, end_date.year + 1) if (y in archived) == in_store]
+            if years:
+                records.extend(model.objects.filter(
+                    date__gte=start_date, date__lte=end_date, date__year__in=years, **filters
+                ).select_related('leave'))
+        return sorted(records, key=lambda rec: (rec.date, rec.employee_id))
+
+    @staticmethod
+    def _move(source, target, year, chunk_size, raw_delete):
+        """Copy one year from source to target table in id-ordered chunks, deleting as it goes"""
+        from django.db import connection, transaction
+
+        fields = [f.attname for f in source._meta.concrete_fields]
+        moved = 0
+        while True:
+            with transaction.atomic():
+                rows = list(source.objects.filter(date__year=year).order_by('id').values(*fields)[:chunk_size])
+                if not rows:
+                    break
+                target.objects.bulk_create([target(**row) for row in rows], batch_size=500)
+                ids = [row['id'] for row in rows]
+                if raw_delete:
+                    # Plain DELETE: Attendance post_delete handlers would rebuild
+                    # month summaries as if the days had been removed
+                    from .models import AttendanceAlert
+                    AttendanceAlert.objects.filter(attendance_id__in=ids).update(attendance=None)
+                    with connection.cursor() as cursor:
+                        cursor.execute(
+                            f"DELETE FROM {connection.ops.quote_name(source._meta.db_table)} "
+                            f"WHERE id IN ({', '.join(['%s'] * len(ids))})",
+                            ids
+                        )
+                else:
+                    source.objects.filter(id__in=ids).delete()
+            moved += len(rows)
+        return moved
+
+    @staticmethod
+    def archive_year(year, user=None, chunk_size=2000):
+        """
+        Move a closed year into ArchivedAttendance. The year is registered
+        first, so attendance writes for it are rejected while rows move.
+        """
+        from .models import Attendance, ArchivedAttendance, AttendanceArchiveYear
+
+        if year >= timezone.now().year:
+            raise ValueError(f"Only closed years can be archived, {year} is still open")
+
+        archive, _ = AttendanceArchiveYear.objects.update_or_create(year=year, defaults={'archived_by': user})
+        AttendanceArchiveService._move(Attendance, ArchivedAttendance, year, chunk_size, raw_delete=True)
+        archive.row_count = ArchivedAttendance.objects.filter(date__year=year).count()
+        archive.save(update_fields=['row_count', 'archived_at'])
+        return archive.row_count
+
+    @staticmethod
+    def restore_year(year, chunk_size=2000):
+        """Move an archived year back into the live Attendance table"""
+        from .models import Attendance, ArchivedAttendance, AttendanceArchiveYear
+
+        moved = AttendanceArchiveService._move(ArchivedAttendance, Attendance, year, chunk_size, raw_delete=False)
+        AttendanceArchiveYear.objects.filter(year=year).delete()
+        return moved
+
+
+class AttendanceAlertService:
+    """
+    Maintains the AttendanceAlert queue: one row per employee-day, opened,
+    switched or resolved in place by attendance writes (sync) and by the
+    nightly missing-day sweep (sweep).
+    """
+
+    UPDATE_FIELDS = [
+        'attendance', 'reporting_manager', 'company', 'alert_type',
+        'message', 'status', 'resolved_at', 'updated_at',
+    ]
+
+    @staticmethod
+    def _open(alert, alert_type, message, attendance_id, manager_id, company_id, now):
+        """Point an alert row at an open state; True when anything changed"""
+        values = {
+            'alert_type': alert_type, 'message': message, 'attendance_id': attendance_id,
+            'reporting_manager_id': manager_id, 'company_id': company_id,
+            'status': 'OPEN', 'resolved_at': None,
+        }
+        if all(getattr(alert, f) == v for f, v in values.items()):
+            return False
+        for f, v in values.items():
+            setattr(alert, f, v)
+        alert.updated_at = now
+        return True
+
+    @staticmethod
+    def _resolve(alert, now):
+        alert.status = 'RESOLVED'
+        alert.resolved_at = now
+        alert.updated_at = now
+
+    @staticmethod
+    def _write(to_create, to_update):
+        from .models import AttendanceAlert
+        AttendanceAlert.objects.bulk_create(to_create, batch_size=500, ignore_conflicts=True)
+        AttendanceAlert.objects.bulk_update(to_update, AttendanceAlertService.UPDATE_FIELDS, batch_size=500)
+
+    @staticmethod
+    def sync(attendances):
+        """
+        Open a MISSING_TIME alert for each row with admin_alert set and
+        resolve the day's alert otherwise. Used by Attendance post_save and
+        by the bulk writers, which call it with the rows they wrote.
+        """
+        from employees.models import Employee
+        from .models import AttendanceAlert
+
+        attendances = list(attendances)
+        if not attendances:
+            return 0
+        now = timezone.now()
+        employee_ids = {att.employee_id for att in attendances}
+        dates = [att.date for att in attendances]
+
+        existing = {
+            (alert.employee_id, alert.date): alert for alert in AttendanceAlert.objects.filter(
+                employee_id__in=employee_ids, date__gte=min(dates), date__lte=max(dates)
+            )
+        }
+        needs_employee = any(att.admin_alert for att in attendances)
+        employees = dict(
+            (emp_id, (manager_id, company_id)) for emp_id, manager_id, company_id in
+            Employee.objects.filter(id__in=employee_ids).values_list('id', 'reporting_manager_id', 'company_id')
+        ) if needs_employee else {}
+
+        to_create, to_update = [], []
+        for att in attendances:
+            alert = existing.get((att.employee_id, att.date))
+            if att.admin_alert:
+                manager_id, company_id = employees.get(att.employee_id, (None, None))
+                if alert is None:
+                    to_create.append(AttendanceAlert(
+                        employee_id=att.employee_id, date=att.date, attendance_id=att.pk,
+                        reporting_manager_id=manager_id, company_id=company_id,
+                        alert_type='MISSING_TIME', message=att.admin_alert_message,
+                    ))
+                elif AttendanceAlertService._open(
+                    alert, 'MISSING_TIME', att.admin_alert_message, att.pk, manager_id, company_id, now
+                ):
+                    to_update.append(alert)
+            elif alert and alert.status == 'OPEN':
+                alert.attendance_id = att.pk
+                AttendanceAlertService._resolve(alert, now)
+                to_update.append(alert)
+
+        AttendanceAlertService._write(to_create, to_update)
+        return len(to_create) + len(to_update)
+
+    @staticmethod
+    def sweep(start_date, end_date, employee_ids=None, batch_size=500, today=None):
+        """
+        Open MISSING_DAY alerts for past working days (after joining) with
+        no attendance row and no approved leave, and resolve MISSING_DAY
+        alerts in the range that no longer apply. Rows that do exist are
+        left to sync(). Returns {"opened": n, "resolved": n}, where opened
+        counts new alerts and resolved ones raised again.
+        """
+        from collections import defaultdict
+        from employees.models import Employee
+        from holidays.services import WorkCalendar
+        from leaves.models import Leave
+        from .models import Attendance, AttendanceAlert
+
+        today = today or timezone.now().date()
+        end_date = min(end_date, today - timedelta(days=1))
+        result = {"opened": 0, "resolved": 0}
+        if start_date > end_date:
+            return result
+
+        working_days = [day for day, kind in WorkCalendar.days_between(start_date, end_date) if kind == 'working']
+        employees = Employee.objects.filter(is_active=True)
+        if employee_ids:
+            employees = employees.filter(id__in=employee_ids)
+        employees = list(employees.order_by('id').values_list(
+            'id', 'joining_date', 'reporting_manager_id', 'company_id'
+        ))
+        now = timezone.now()
+
+        for i in range(0, len(employees), batch_size):
+            batch = employees[i:i + batch_size]
+            batch_ids = [emp[0] for emp in batch]
+            present = set(Attendance.objects.filter(
+                employee_id__in=batch_ids, date__gte=start_date, date__lte=end_date
+            ).values_list('employee_id', 'date'))
+            leave_ranges = defaultdict(list)
+            for emp_id, from_date, to_date in Leave.objects.filter(
+                employee_id__in=batch_ids, status__in=APPROVED_LEAVE_STATUSES,
+                from_date__lte=end_date, to_date__gte=start_date,
+            ).values_list('employee_id', 'from_date', 'to_date'):
+                leave_ranges[emp_id].append((from_date, to_date))
+            existing = {
+                (alert.employee_id, alert.date): alert for alert in AttendanceAlert.objects.filter(
+                    employee_id__in=batch_ids, date__gte=start_date, date__lte=end_date
+                )
+            }
+
+            missing = set()
+            to_create, to_update = [], []
+            reopened = resolved = 0
+            for emp_id, joining_date, manager_id, company_id in batch:
+                for day in working_days:
+                    if (joining_date and day < joining_date) or (emp_id, day) in present:
+                        continue
+                    if any(f <= day <= t for f, t in leave_ranges.get(emp_id, ())):
+                        continue
+                    missing.add((emp_id, day))
+                    alert = existing.get((emp_id, day))
+                    if alert is None:
+                        to_create.append(AttendanceAlert(
+                            employee_id=emp_id, date=day,
+                            reporting_manager_id=manager_id, company_id=company_id,
+                            alert_type='MISSING_DAY', message=ADMIN_ALERT_MESSAGE_MISSING_DAY,
+                        ))
+                    else:
+                        was_open = alert.status == 'OPEN'
+                        if AttendanceAlertService._open(
+                            alert, 'MISSING_DAY', ADMIN_ALERT_MESSAGE_MISSING_DAY, None, manager_id, company_id, now
+                        ):
+                            to_update.append(alert)
+                            # Already-open alerts that only switch type or manager are not new
+                            reopened += not was_open
+
+            for key, alert in existing.items():
+                if alert.status == 'OPEN' and alert.alert_type == 'MISSING_DAY' and key not in missing:
+                    AttendanceAlertService._resolve(alert, now)
+                    to_update.append(alert)
+                    resolved += 1
+
+            AttendanceAlertService._write(to_create, to_update)
+            result["opened"] += len(to_create) + reopened
+            result["resolved"] += resolved
+        return result
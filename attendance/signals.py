@@ -1,45 +1,177 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from django.utils import timezone
-from datetime import timedelta
 from leaves.models import Leave
+from holidays.models import Holiday
+from employees.models import Employee
 from .models import Attendance
+from .constants import APPROVED_LEAVE_STATUSES
 
 @receiver(post_save, sender=Leave)
 def sync_leave_to_attendance(sender, instance, created, **kwargs):
     """
     Synchronize Leave status with Attendance records.
-    When a leave is approved, create/update corresponding attendance records.
+    When a leave is approved, create/update corresponding attendance records;
+    otherwise (e.g. cancelled or rejected) revert the linked records.
+    Done set-based, see LeaveAttendanceSyncService.
     """
-    from .services import AttendanceCalculationService
-
-    if instance.status in ['Approved', 'APPROVED']:
-        # Iterate through the date range of the leave
-        current_date = instance.from_date
-        while current_date <= instance.to_date:
-            # Skip weekends (Sat=5, Sun=6)
-            # determine_day_type handles this better, but we only create if it's a working day
-            # Actually, let's create/update and then let determine_day_type fix it
-            
-            att, created = Attendance.objects.get_or_create(
-                employee=instance.employee,
-                date=current_date
-            )
-            att.leave = instance
-            AttendanceCalculationService.determine_day_type(att)
-            att.save()
-            
-            current_date += timedelta(days=1)
+    from .services import LeaveAttendanceSyncService
+
+    if instance.status in APPROVED_LEAVE_STATUSES:
+        LeaveAttendanceSyncService.apply(instance)
     else:
-        # If leave is not approved (e.g., cancelled or rejected), 
-        # find affected attendances and revert them
-        affected_attendances = Attendance.objects.filter(leave=instance)
-        for att in affected_attendances:
-            att.leave = None
-            AttendanceCalculationService.determine_day_type(att)
-            att.save()
+        LeaveAttendanceSyncService.revert(instance)
 
 @receiver(post_delete, sender=Leave)
 def cleanup_attendance_on_leave_delete(sender, instance, **kwargs):
     """Clear leave link if leave is deleted"""
     Attendance.objects.filter(leave=instance).update(leave=None)
+
+
+# ---------------------------------------------------------
+# EmployeeMonthSummary maintenance
+# (registered after sync_leave_to_attendance so leave-driven
+#  attendance writes are already in place)
+# ---------------------------------------------------------
+
+# Attendance fields the month seconds aggregate reads
+MONTH_SUMMARY_INPUTS = {'seconds_actual_worked_time', 'seconds_extra_time', 'timesheet_status', 'date', 'employee'}
+
+
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def refresh_month_summary_seconds(sender, instance, update_fields=None, **kwargs):
+    """Re-aggregate the month's worked/extra seconds"""
+    from .services import MonthSummaryService
+    if update_fields is not None and not set(update_fields) & MONTH_SUMMARY_INPUTS:
+        return
+    MonthSummaryService.refresh_seconds(instance.employee_id, instance.date.year, instance.date.month)
+
+
+@receiver(post_save, sender=Attendance)
+def update_month_late_days(sender, instance, created, update_fields=None, **kwargs):
+    """Shift the monthly late counter by this row's change in is_late"""
+    from .services import MonthSummaryService
+    if update_fields is not None and 'is_late' not in update_fields:
+        return
+    year, month = instance.date.year, instance.date.month
+    previous = False if created else getattr(instance, '_loaded_is_late', None)
+    if previous is None:
+        # Instance not loaded from the DB, so the old value is unknown
+        MonthSummaryService.refresh_seconds(instance.employee_id, year, month, late_days=True)
+    else:
+        MonthSummaryService.adjust_late_days(
+            instance.employee_id, year, month, int(instance.is_late) - int(previous)
+        )
+    instance._loaded_is_late = instance.is_late
+
+
+@receiver(post_save, sender=Attendance)
+def sync_attendance_alert(sender, instance, update_fields=None, **kwargs):
+    """Open or resolve the day's entry in the alert queue"""
+    from .services import AttendanceAlertService
+    if update_fields is not None and 'admin_alert' not in update_fields:
+        return
+    AttendanceAlertService.sync([instance])
+
+
+@receiver(post_delete, sender=Attendance)
+def remove_month_late_day(sender, instance, **kwargs):
+    """A deleted late day no longer counts"""
+    if getattr(instance, '_loaded_is_late', instance.is_late):
+        from .services import MonthSummaryService
+        MonthSummaryService.adjust_late_days(instance.employee_id, instance.date.year, instance.date.month, -1)
+
+
+@receiver(post_save, sender=Leave)
+@receiver(post_delete, sender=Leave)
+def refresh_month_summary_on_leave(sender, instance, **kwargs):
+    """Leave changes move days between working/leave/half-day buckets"""
+    from .services import MonthSummaryService
+    MonthSummaryService.refresh_range(instance.employee, instance.from_date, instance.to_date)
+
+
+@receiver(pre_save, sender=Holiday)
+def mark_month_summary_stale_on_holiday_move(sender, instance, **kwargs):
+    """A holiday moved to another month also invalidates the old month"""
+    from .services import MonthSummaryService
+    if not instance.pk:
+        return
+    old_date = Holiday.objects.filter(pk=instance.pk).values_list('date', flat=True).first()
+    if old_date and old_date != instance.date:
+        MonthSummaryService.mark_stale(year=old_date.year, month=old_date.month)
+
+
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def mark_month_summary_stale_on_holiday(sender, instance, **kwargs):
+    """Holidays affect every employee; rebuild lazily on next read"""
+    from .services import MonthSummaryService
+    MonthSummaryService.mark_stale(year=instance.date.year, month=instance.date.month)
+
+
+@receiver(pre_save, sender=Employee)
+def refresh_employee_dependents(sender, instance, **kwargs):
+    """
+    Days before joining are counted as non-working, so a joining-date change
+    marks the summaries stale; open alerts follow the employee's current
+    reporting manager and company.
+    """
+    from .models import AttendanceAlert
+    from .services import MonthSummaryService
+    if not instance.pk:
+        return
+    previous = Employee.objects.filter(pk=instance.pk).values(
+        'joining_date', 'reporting_manager_id', 'company_id'
+    ).first()
+    if not previous:
+        return
+    if previous['joining_date'] != instance.joining_date:
+        MonthSummaryService.mark_stale(employee_id=instance.pk)
+    if (previous['reporting_manager_id'], previous['company_id']) != (
+        instance.reporting_manager_id, instance.company_id
+    ):
+        AttendanceAlert.objects.filter(employee_id=instance.pk, status='OPEN').update(
+            reporting_manager_id=instance.reporting_manager_id, company_id=instance.company_id
+        )
+
+
+# ---------------------------------------------------------
+# EmployeeDayStatusYear maintenance (team availability)
+# Holidays, weekends and joining dates are applied at read time.
+# ---------------------------------------------------------
+
+# Attendance fields the PRESENT bit reads
+DAY_STATUS_TIME_FIELDS = {'office_in_time', 'office_out_time', 'home_in_time', 'home_out_time'}
+DAY_STATUS_INPUTS = DAY_STATUS_TIME_FIELDS | {'employee', 'date'}
+
+
+@receiver(post_save, sender=Attendance)
+def sync_day_status_bitmap(sender, instance, created, update_fields=None, **kwargs):
+    """Flip the day's PRESENT bit when the in/out times change"""
+    from .services import DayStatusBitmapService
+    if update_fields is not None and not set(update_fields) & DAY_STATUS_INPUTS:
+        return
+    dirty = instance.get_dirty_fields()
+    if not created and dirty & set(Attendance.KEY_FIELDS):
+        # Moved to another employee/day: rebuild both years lazily
+        loaded = getattr(instance, '_loaded_values', {})
+        DayStatusBitmapService.mark_stale(
+            employee_id__in={instance.employee_id, loaded.get('employee_id', instance.employee_id)},
+            year__in={instance.date.year, getattr(loaded.get('date'), 'year', instance.date.year)},
+        )
+    elif created or dirty & DAY_STATUS_TIME_FIELDS:
+        DayStatusBitmapService.sync([instance])
+
+
+@receiver(post_delete, sender=Attendance)
+def clear_day_status_bit(sender, instance, **kwargs):
+    from .services import DayStatusBitmapService
+    DayStatusBitmapService.sync([instance], deleted=True)
+
+
+@receiver(post_save, sender=Leave)
+@receiver(post_delete, sender=Leave)
+def refresh_day_status_on_leave(sender, instance, **kwargs):
+    """Leave changes move days in/out of the LEAVE and HALF_DAY codes"""
+    from .services import DayStatusBitmapService
+    DayStatusBitmapService.refresh_range([instance.employee_id], instance.from_date, instance.to_date)
@@ -0,0 +1,423 @@
+from datetime import date, datetime, time
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from departments.models import Department, Designation
+from employees.models import Employee
+from holidays.models import Holiday
+from leaves.models import Leave
+from .models import Attendance, EmployeeMonthSummary
+from .services import MonthSummaryService
+
+
+class EmployeeMonthSummaryTest(TestCase):
+    """Stored month summary stays in line with a full rebuild"""
+
+    def setUp(self):
+        department = Department.objects.create(name="Engineering")
+        designation = Designation.objects.create(name="Engineer", department=department)
+        self.employee = Employee.objects.create(
+            employee_id="EMP-T-0001",
+            first_name="Test",
+            last_name="Employee",
+            email="summary@test.com",
+            phone="+919999999999",
+            department=department,
+            designation=designation,
+            joining_date=date(2025, 1, 6),
+        )
+        MonthSummaryService.refresh(self.employee, 2025, 1)
+
+    def _aware(self, day, hour):
+        return timezone.make_aware(datetime.combine(day, time(hour, 0)))
+
+    def assertMatchesRebuild(self):
+        stored = EmployeeMonthSummary.objects.get(employee=self.employee, year=2025, month=1)
+        rebuilt = MonthSummaryService.build(
+            self.employee, 2025, 1, *MonthSummaryService.load_month_data(self.employee, 2025, 1)
+        )
+        for field in ('working_days', 'non_working_days', 'leave_days', 'half_days',
+                      'seconds_worked', 'seconds_extra', 'seconds_to_compensate',
+                      'expected_day_units', 'late_days'):
+            self.assertEqual(getattr(stored, field), getattr(rebuilt, field), field)
+        return stored
+
+    def test_summary_follows_writes(self):
+        """Attendance, leave and holiday writes keep the row consistent"""
+        Attendance.objects.create(
+            employee=self.employee, date=date(2025, 1, 7),
+            office_in_time=self._aware(date(2025, 1, 7), 9),
+            office_out_time=self._aware(date(2025, 1, 7), 17),
+        )
+        Leave.objects.create(
+            employee=self.employee, leave_type='Casual Leave',
+            from_date=date(2025, 1, 8), to_date=date(2025, 1, 8),
+            reason="Personal", status='Approved',
+        )
+        summary = self.assertMatchesRebuild()
+        self.assertEqual(summary.leave_days, 1)
+        self.assertEqual(summary.seconds_to_compensate, 3600)
+
+        Holiday.objects.create(name="Test Holiday", date=date(2025, 1, 9), country="India")
+        self.assertTrue(EmployeeMonthSummary.objects.get(employee=self.employee, year=2025, month=1).is_stale)
+        summary = MonthSummaryService.get_summary(self.employee, 2025, 1)
+        self.assertFalse(summary.is_stale)
+        self.assertMatchesRebuild()
+
+    def test_monthly_grid_matches_monthly_sheet(self):
+        """Grid day types are the ones the monthly sheet shows"""
+        from .serializers import MonthlyAttendanceSerializer
+        from .services import MonthlyGridService
+
+        Attendance.objects.create(
+            employee=self.employee, date=date(2025, 1, 7),
+            office_in_time=self._aware(date(2025, 1, 7), 9),
+            office_out_time=self._aware(date(2025, 1, 7), 18),
+        )
+        Leave.objects.create(
+            employee=self.employee, leave_type='Casual Leave',
+            from_date=date(2025, 1, 8), to_date=date(2025, 1, 9),
+            reason="Personal", status='Approved',
+        )
+        Leave.objects.create(
+            employee=self.employee, leave_type='Casual Leave',
+            from_date=date(2025, 1, 13), to_date=date(2025, 1, 13),
+            reason="Appointment", status='Approved', day_status='First Half',
+        )
+        Holiday.objects.create(name="Test Holiday", date=date(2025, 1, 14), country="India")
+
+        [(_, day_types, half_days)] = MonthlyGridService.build([self.employee], 2025, 1)
+        sheet = MonthlyAttendanceSerializer.serialize_monthly_data(
+            Attendance.objects.filter(employee=self.employee).select_related('leave'),
+            self.employee, 1, 2025,
+            Holiday.objects.filter(is_active=True),
+            Leave.objects.filter(employee=self.employee),
+        )['data']
+        self.assertEqual(day_types, [d['day_type'] for d in sheet['attendance']])
+        self.assertEqual(half_days, {13})
+        summary = MonthlyGridService.summarize(day_types, half_days)
+        for key in ('WORKING_DAY', 'NON_WORKING_DAY', 'LEAVE_DAY', 'HALF_DAY'):
+            self.assertEqual(summary[key], sheet['monthSummary'][key], key)
+
+    def test_punch_ingestion_upserts_attendance(self):
+        """Punches are grouped per employee-day and merged with existing rows"""
+        from .services import PunchIngestionService
+
+        result = PunchIngestionService.ingest([
+            {"employee_id": "EMP-T-0001", "timestamp": self._aware(date(2025, 1, 7), 9).isoformat()},
+            {"employee_id": "EMP-T-0001", "timestamp": self._aware(date(2025, 1, 8), 9).isoformat()},
+            {"employee_id": "EMP-T-0001", "timestamp": self._aware(date(2025, 1, 11), 9).isoformat()},
+            {"employee_id": "UNKNOWN", "timestamp": self._aware(date(2025, 1, 7), 9).isoformat()},
+        ], notify=False)
+        self.assertEqual((result["created"], result["updated"], result["rejected"]), (2, 0, 2))
+
+        csv_rows = PunchIngestionService.parse_csv(
+            "employee_id,timestamp,location\n"
+            f"EMP-T-0001,{self._aware(date(2025, 1, 7), 18).isoformat()},OFFICE\n"
+        )
+        result = PunchIngestionService.ingest(csv_rows, notify=False)
+        self.assertEqual((result["created"], result["updated"]), (0, 1))
+
+        attendance = Attendance.objects.get(employee=self.employee, date=date(2025, 1, 7))
+        self.assertEqual(attendance.seconds_actual_worked_time, 9 * 3600)
+        self.assertEqual(attendance.day_type, 'WORKING_DAY')
+        self.assertEqual(attendance.admin_alert, 0)
+        self.assertEqual(
+            EmployeeMonthSummary.objects.get(employee=self.employee, year=2025, month=1).seconds_worked,
+            9 * 3600
+        )
+
+        # Backends without RETURNING: new rows get their ids re-read, so alerts link to them
+        from django.db import connection
+        from .models import AttendanceAlert
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert',
+                               new_callable=mock.PropertyMock, return_value=False):
+            PunchIngestionService.ingest([
+                {"employee_id": "EMP-T-0001", "timestamp": self._aware(date(2025, 1, 9), 9).isoformat()},
+            ], notify=False)
+        alert = AttendanceAlert.objects.get(employee=self.employee, date=date(2025, 1, 9))
+        self.assertEqual(alert.attendance_id, Attendance.objects.get(employee=self.employee, date=date(2025, 1, 9)).pk)
+
+    def test_late_days_counter(self):
+        """is_late is set on save and the monthly counter tracks it"""
+        late = Attendance.objects.create(
+            employee=self.employee, date=date(2025, 1, 7),
+            office_in_time=self._aware(date(2025, 1, 7), 10),
+        )
+        self.assertTrue(late.is_late)
+        self.assertEqual(late.late_minutes, 60)
+        second = Attendance.objects.create(
+            employee=self.employee, date=date(2025, 1, 8),
+            office_in_time=self._aware(date(2025, 1, 8), 11),
+        )
+        Attendance.objects.create(
+            employee=self.employee, date=date(2025, 1, 9),
+            office_in_time=self._aware(date(2025, 1, 9), 9),
+        )
+        self.assertEqual(self.assertMatchesRebuild().late_days, 2)
+
+        second = Attendance.objects.get(pk=second.pk)
+        second.office_in_time = self._aware(date(2025, 1, 8), 8)
+        second.save()
+        late.delete()
+        self.assertEqual(self.assertMatchesRebuild().late_days, 0)
+
+    def test_alert_queue_follows_writes(self):
+        """Missing-time alerts open and resolve with saves; the sweep raises missing days"""
+        from .models import AttendanceAlert
+        from .services import AttendanceAlertService
+
+        attendance = Attendance.objects.create(
+            employee=self.employee, date=date(2025, 1, 7),
+            office_in_time=self._aware(date(2025, 1, 7), 9),
+        )
+        alert = AttendanceAlert.objects.get(employee=self.employee, date=date(2025, 1, 7))
+        self.assertEqual((alert.alert_type, alert.status), ('MISSING_TIME', 'OPEN'))
+
+        attendance.office_out_time = self._aware(date(2025, 1, 7), 18)
+        attendance.save()
+        alert.refresh_from_db()
+        self.assertEqual(alert.status, 'RESOLVED')
+
+        result = AttendanceAlertService.sweep(date(2025, 1, 6), date(2025, 1, 10), today=date(2025, 1, 11))
+        self.assertEqual(result['opened'], 4)
+        self.assertEqual(
+            AttendanceAlert.objects.filter(employee=self.employee, alert_type='MISSING_DAY', status='OPEN').count(), 4
+        )
+
+        # Open alerts that are only rewritten do not count; resolved ones raised again do
+        open_alerts = AttendanceAlert.objects.filter(employee=self.employee, alert_type='MISSING_DAY')
+        open_alerts.update(message='stale')
+        open_alerts.filter(date=date(2025, 1, 6)).update(status='RESOLVED')
+        result = AttendanceAlertService.sweep(date(2025, 1, 6), date(2025, 1, 10), today=date(2025, 1, 11))
+        self.assertEqual((result['opened'], result['resolved']), (1, 0))
+
+    def test_weekly_timesheet_batch_submit(self):
+        """A week is written in one go and rejected as a whole on any bad day"""
+        from .services import TimesheetSubmissionService
+
+        entries = [
+            {'date': date(2025, 1, 7), 'total_time': '8'},
+            {'date': date(2025, 1, 8), 'total_time': '7.5', 'is_working_from_home': True,
+             'comments': 'Worked on the reporting module', 'tracker_screenshot': 'ts/1'},
+            {'date': date(2025, 1, 11), 'total_time': '8'},
+        ]
+        rows, errors = TimesheetSubmissionService.submit_week(self.employee, entries, notify=False)
+        self.assertEqual([e['date'] for e in errors], ['2025-01-11'])
+        self.assertFalse(Attendance.objects.filter(employee=self.employee).exists())
+
+        rows, errors = TimesheetSubmissionService.submit_week(self.employee, entries[:2], notify=False)
+        self.assertEqual(errors, [])
+        self.assertEqual([a.timesheet_status for a in rows], ['APPROVED', 'PENDING'])
+        wfh = Attendance.objects.get(employee=self.employee, date=date(2025, 1, 8))
+        self.assertEqual(wfh.seconds_actual_worked_time, int(7.5 * 3600))
+        self.assertMatchesRebuild()
+
+        rows, errors = TimesheetSubmissionService.submit_week(self.employee, entries[:1], notify=False)
+        self.assertEqual(len(errors), 1)
+
+    def test_bulk_timesheet_decision(self):
+        """Only PENDING rows change, in one UPDATE, and rejected days leave the month totals"""
+        from .services import TimesheetApprovalService, TimesheetSubmissionService
+
+        wfh = {'is_working_from_home': True, 'comments': 'Worked on the reporting module', 'tracker_screenshot': 'ts/1'}
+        rows, _ = TimesheetSubmissionService.submit_week(self.employee, [
+            {'date': date(2025, 1, 7), 'total_time': '8'},
+            dict(wfh, date=date(2025, 1, 8), total_time='8'),
+            dict(wfh, date=date(2025, 1, 9), total_time='8'),
+        ], notify=False)
+
+        queryset = Attendance.objects.filter(id__in=[a.id for a in rows])
+        with self.assertNumQueries(6):  # savepoint, select, one UPDATE, month re-aggregate (2), release
+            decided = TimesheetApprovalService.decide(queryset, 'reject', admin_notes='No tracker', notify=False)
+        self.assertEqual([row[2] for row in decided], [date(2025, 1, 8), date(2025, 1, 9)])
+        self.assertEqual(
+            list(queryset.order_by('date').values_list('timesheet_status', flat=True)),
+            ['APPROVED', 'REJECTED', 'REJECTED']
+        )
+        self.assertMatchesRebuild()
+
+    def test_punch_events_compact_into_attendance(self):
+        """Inline and batch compaction fold the log into the row; replay rebuilds it"""
+        from .models import PunchEvent
+        from .services import PunchEventService
+
+        day = date(2025, 1, 7)
+        PunchEventService.record(self.employee, day, [('IN', 'OFFICE', self._aware(day, 10))])
+        attendance = PunchEventService.compact_day(self.employee, day)
+        self.assertEqual(attendance.office_in_time, self._aware(day, 10))
+        self.assertTrue(attendance.is_late)
+
+        # Deferred: events wait in the log, the projection already shows them
+        PunchEventService.record(self.employee, day, [('OUT', 'OFFICE', self._aware(day, 19))])
+        PunchEventService.record(self.employee, day, [('IN', 'OFFICE', self._aware(day, 9))])
+        projected = PunchEventService.project(self.employee, day)
+        self.assertEqual((projected.office_in_time, projected.seconds_actual_worked_time), (self._aware(day, 9), 10 * 3600))
+        self.assertEqual(Attendance.objects.get(pk=attendance.pk).office_out_time, None)
+
+        with mock.patch('notifications.slack_utils.SlackNotificationService.notify_attendance_saved') as notify, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(PunchEventService.compact()["events"], 2)
+        notify.assert_called_once()
+        self.assertEqual((notify.call_args.args[0].pk, notify.call_args.args[1]), (attendance.pk, False))
+        self.assertFalse(PunchEvent.objects.filter(compacted_at__isnull=True).exists())
+        attendance = Attendance.objects.get(pk=attendance.pk)
+        self.assertEqual(attendance.seconds_actual_worked_time, 10 * 3600)
+        self.assertFalse(attendance.is_late)
+        self.assertMatchesRebuild()
+
+        Attendance.objects.filter(pk=attendance.pk).update(office_in_time=None, office_out_time=None)
+        PunchEventService.replay(day, day)
+        self.assertEqual(Attendance.objects.get(pk=attendance.pk).seconds_actual_worked_time, 10 * 3600)
+
+        # Times from other writers survive a replay of a day that only logged a marker
+        other = date(2025, 1, 8)
+        Attendance.objects.create(
+            employee=self.employee, date=other,
+            office_in_time=self._aware(other, 9), office_out_time=self._aware(other, 18),
+        )
+        PunchEventService.record(self.employee, other, [('STANDUP', '', self._aware(other, 10))])
+        PunchEventService.compact()
+        PunchEventService.replay(other, other)
+        replayed = Attendance.objects.get(employee=self.employee, date=other)
+        self.assertEqual((replayed.office_in_time, replayed.standup_time), (self._aware(other, 9), self._aware(other, 10)))
+        self.assertEqual(replayed.seconds_actual_worked_time, 9 * 3600)
+
+        # Deferred: the day's first punch still gets a stored row and id
+        fresh = date(2025, 1, 9)
+        PunchEventService.record(self.employee, fresh, [('IN', 'OFFICE', self._aware(fresh, 9))])
+        with mock.patch('attendance.constants.PUNCH_EVENT_COMPACTION', 'deferred'):
+            settled = PunchEventService.settle(self.employee, fresh)
+            self.assertIsNotNone(settled.pk)
+            PunchEventService.record(self.employee, fresh, [('OUT', 'OFFICE', self._aware(fresh, 18))])
+            projected = PunchEventService.settle(self.employee, fresh)
+        self.assertEqual((projected.pk, projected.seconds_actual_worked_time), (settled.pk, 9 * 3600))
+        self.assertIsNone(Attendance.objects.get(pk=settled.pk).office_out_time)
+
+    def test_batch_fallback_matches_vectorized(self):
+        """Without NumPy, calculate_batch falls back to the scalar path with the same results"""
+        from .services import AttendanceCalculationService
+
+        day = date(2025, 1, 7)
+        office_in = [self._aware(day, 9), self._aware(day, 10), None, self._aware(day, 9)]
+        office_out = [self._aware(day, 18), None, None, self._aware(day, 16)]
+        home_in = [None, None, self._aware(day, 8), self._aware(day, 17)]
+        home_out = [None, None, self._aware(day, 12), self._aware(day, 20)]
+        columns = (office_in, office_out, home_in, home_out, [32400] * 4)
+        day_types = ['WORKING_DAY', 'WORKING_DAY', 'WORKING_DAY', 'HOLIDAY']
+
+        vectorized = AttendanceCalculationService.calculate_batch(*columns, day_types=day_types)
+        with mock.patch('attendance.services.HAS_NUMPY', False):
+            scalar = AttendanceCalculationService.calculate_batch(*columns, day_types=day_types)
+        self.assertIsInstance(scalar['worked_seconds'], list)
+        for key, values in vectorized.items():
+            self.assertEqual(scalar[key], values.tolist(), key)
+
+    def test_save_recomputes_only_dirty_rows(self):
+        """Saves that touch no time field skip recomputation and validation"""
+        attendance = Attendance.objects.create(
+            employee=self.employee, date=date(2025, 1, 7),
+            office_in_time=self._aware(date(2025, 1, 7), 9),
+        )
+        attendance = Attendance.objects.get(pk=attendance.pk)
+        self.assertEqual(attendance.get_dirty_fields(), set())
+
+        attendance.timesheet_admin_notes = "checked"
+        with self.assertNumQueries(1):
+            attendance.save(update_fields=['timesheet_admin_notes'])
+
+        attendance.office_out_time = self._aware(date(2025, 1, 7), 18)
+        self.assertEqual(attendance.get_dirty_fields(), {'office_out_time'})
+        attendance.save(update_fields=['office_out_time'])
+        attendance.refresh_from_db()
+        self.assertEqual((attendance.seconds_actual_worked_time, attendance.admin_alert), (9 * 3600, 0))
+        self.assertMatchesRebuild()
+
+    def test_day_status_bitmap_follows_writes(self):
+        """Team availability from the bitmap matches the monthly grid after in-place updates"""
+        from .models import EmployeeDayStatusYear
+        from .services import DayStatusBitmapService, MonthlyGridService
+
+        def assertMatchesGrid():
+            [(_, day_types, half_days)] = MonthlyGridService.build([self.employee], 2025, 1)
+            _, [(_, out)] = DayStatusBitmapService.availability([self.employee], date(2025, 1, 1), date(2025, 1, 31))
+            self.assertEqual([d.day for d in out['LEAVE_DAY']], [i + 1 for i, t in enumerate(day_types) if t == 'LEAVE_DAY'])
+            self.assertEqual([d.day for d in out['ABSENT']], [i + 1 for i, t in enumerate(day_types) if t == 'ABSENT'])
+            self.assertEqual({d.day for d in out['HALF_DAY']}, half_days)
+
+        Leave.objects.create(
+            employee=self.employee, leave_type='Casual Leave',
+            from_date=date(2025, 1, 8), to_date=date(2025, 1, 9),
+            reason="Personal", status='Approved',
+        )
+        assertMatchesGrid()  # builds the row
+        self.assertEqual(len(bytes(EmployeeDayStatusYear.objects.get(employee=self.employee, year=2025).day_bits)), 92)
+
+        attendance = Attendance.objects.create(
+            employee=self.employee, date=date(2025, 1, 7),
+            office_in_time=self._aware(date(2025, 1, 7), 9),
+            office_out_time=self._aware(date(2025, 1, 7), 18),
+        )
+        Leave.objects.create(
+            employee=self.employee, leave_type='Casual Leave',
+            from_date=date(2025, 1, 13), to_date=date(2025, 1, 13),
+            reason="Appointment", status='Approved', day_status='First Half',
+        )
+        Holiday.objects.create(name="Test Holiday", date=date(2025, 1, 14), country="India")
+        assertMatchesGrid()
+
+        attendance.delete()
+        assertMatchesGrid()
+        self.assertFalse(EmployeeDayStatusYear.objects.get(employee=self.employee, year=2025).is_stale)
+
+    def test_archived_year_is_read_only_for_bulk_writers(self):
+        """Bulk writers leave an archived year alone; range reads come from the archive"""
+        from .models import ArchivedAttendance
+        from .services import AttendanceArchiveService, PunchIngestionService, WorkingHoursService
+
+        day = date(2025, 1, 7)
+        Attendance.objects.create(
+            employee=self.employee, date=day,
+            office_in_time=self._aware(day, 9), office_out_time=self._aware(day, 18),
+        )
+        self.assertEqual(AttendanceArchiveService.archive_year(2025), 1)
+
+        result = PunchIngestionService.ingest([
+            {"employee_id": "EMP-T-0001", "timestamp": self._aware(date(2025, 1, 8), 9).isoformat()},
+        ], notify=False)
+        self.assertEqual((result["created"], result["rejected"]), (0, 1))
+        with self.assertRaises(ValueError):
+            WorkingHoursService.bulk_set([self.employee.id], day, day, '08:00')
+        Leave.objects.create(
+            employee=self.employee, leave_type='Casual Leave',
+            from_date=date(2025, 1, 9), to_date=date(2025, 1, 9),
+            reason="Personal", status='Approved',
+        )
+        self.assertFalse(Attendance.objects.filter(employee=self.employee, date__year=2025).exists())
+
+        rows = AttendanceArchiveService.queryset_for_range(date(2025, 1, 1), date(2025, 1, 31))
+        self.assertIs(rows.model, ArchivedAttendance)
+        self.assertEqual(list(rows.values_list('date', flat=True)), [day])
+
+    def test_open_ended_range_from_archived_year(self):
+        """start_date in an archived year with no end_date reads the archive, not up to date.max"""
+        from django.contrib.auth import get_user_model
+        from rest_framework.test import APIClient
+        from .services import AttendanceArchiveService
+
+        day = date(2025, 1, 7)
+        Attendance.objects.create(
+            employee=self.employee, date=day,
+            office_in_time=self._aware(day, 9), office_out_time=self._aware(day, 18),
+        )
+        AttendanceArchiveService.archive_year(2025)
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass',
+        ))
+
+        response = client.get('/api/attendance/', {'start_date': '2025-01-01'}, HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual([row['date'] for row in response.data['results']], ['2025-01-07'])
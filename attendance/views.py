@@ -5,9 +5,10 @@ from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django.utils import timezone
 from django.db import transaction
+from django.http import StreamingHttpResponse
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from datetime import datetime, timedelta
+from datetime import date as date_cls, datetime, timedelta
 from calendar import monthrange
 
 # Optional django-filter import
@@ -17,29 +18,48 @@ try:
 except ImportError:
     HAS_DJANGO_FILTER = False
 
-from .models import Attendance
+from .models import Attendance, AttendanceAlert
 from .serializers import (
     AttendanceListSerializer,
+    AttendanceAlertSerializer,
     AttendanceDetailSerializer,
     AttendanceCreateUpdateSerializer,
     CheckInSerializer,
     CheckOutSerializer,
     MonthlyAttendanceSerializer,
     WeeklyTimesheetSubmitSerializer,
+    WeeklyTimesheetBatchSubmitSerializer,
     WeeklyTimesheetSerializer,
     UpdateSessionSerializer,
-    BulkUpdateWorkingHoursSerializer
+    BulkUpdateWorkingHoursSerializer,
+    BulkTimesheetDecisionSerializer
 )
-from holidays.models import Holiday
+from holidays.services import WorkCalendar
 from employees.models import Employee
-from .services import AttendanceCalculationService
+from .services import (
+    AttendanceArchiveService,
+    AttendanceCalculationService,
+    AttendanceExportService,
+    DayStatusBitmapService,
+    MonthSummaryService,
+    MonthlyGridService,
+    PunchEventService,
+    PunchIngestionService,
+    TimesheetApprovalService,
+    TimesheetSubmissionService,
+    WorkingHoursService,
+)
 from django.conf import settings
-from .constants import DATE_FORMAT, TIME_12HR_FORMAT
+from .constants import (
+    DATE_FORMAT, TIME_12HR_FORMAT, DAY_NAME_FORMAT, PUNCH_BATCH_MAX_SIZE, EXPORT_FORMATS,
+    TEAM_AVAILABILITY_MAX_DAYS,
+)
 from .serializers import format_datetime_to_iso, format_seconds_to_hms
 
 
 from employees.permissions import IsAdminOrManagerOrOwner
 from employees.filters import HierarchyFilterBackend
+from config.pagination import OptInCursorPagination
 
 class AttendanceViewSet(viewsets.ModelViewSet):
     """
@@ -53,11 +73,13 @@ class AttendanceViewSet(viewsets.ModelViewSet):
     """
     queryset = Attendance.objects.all()
     permission_classes = [IsAuthenticated, IsAdminOrManagerOrOwner]
+    pagination_class = OptInCursorPagination
+    cursor_ordering = ('-date', '-id')
     filter_backends = [HierarchyFilterBackend, SearchFilter, OrderingFilter]
     if HAS_DJANGO_FILTER:
         filter_backends.insert(0, DjangoFilterBackend)
     filterset_fields = [
-        'employee', 'date', 'day_type', 'admin_alert'
+        'employee', 'date', 'day_type', 'admin_alert', 'is_late'
     ] if HAS_DJANGO_FILTER else []
     search_fields = [
         'employee__first_name', 'employee__last_name', 
@@ -76,8 +98,57 @@ class AttendanceViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Queryset is filtered by HierarchyFilterBackend"""
+        if getattr(self, 'range_queryset', None) is not None:
+            return self.range_queryset
         return super().get_queryset()
     
+    def _range_queryset(self, request):
+        """
+        Attendance for the start_date/end_date (or date) query params, read
+        from ArchivedAttendance when they fall in archived years. Without a
+        start date only open years are read; without an end date the range
+        runs to today, or to the end of the archived years when it starts in
+        one. Raises ValueError with the client message for bad dates or a
+        range crossing the archive boundary.
+        """
+        bounds = {}
+        for param in ('start_date', 'end_date'):
+            value = request.query_params.get(param) or request.query_params.get('date')
+            try:
+                bounds[param] = datetime.strptime(value, DATE_FORMAT).date() if value else None
+            except ValueError:
+                raise ValueError(f"Invalid {param} format. Use {DATE_FORMAT}")
+        start_date, end_date = bounds['start_date'], bounds['end_date']
+        
+        if start_date is None:
+            queryset = Attendance.objects.all()
+            return queryset.filter(date__lte=end_date) if end_date else queryset
+        if end_date is None:
+            end_date = max(start_date, timezone.now().date())
+            archived = AttendanceArchiveService.archived_in_range(start_date, end_date)
+            if start_date.year in archived:
+                last_year = start_date.year
+                while last_year + 1 in archived:
+                    last_year += 1
+                end_date = min(end_date, date_cls(last_year, 12, 31))
+        try:
+            return AttendanceArchiveService.queryset_for_range(start_date, end_date)
+        except ValueError:
+            raise ValueError(
+                f"{start_date} to {end_date} spans archived and open years; request them separately"
+            )
+    
+    def list(self, request, *args, **kwargs):
+        """Archived years are listed from the archive table when start_date/end_date (or date) reach them"""
+        try:
+            self.range_queryset = self._range_queryset(request)
+        except ValueError as e:
+            return Response({
+                "error": 1,
+                "message": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return super().list(request, *args, **kwargs)
+    
     def get_permissions(self):
         """Set permissions based on action"""
         # Admin-only actions
@@ -87,19 +158,15 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         return [IsAuthenticated()]
     
     def perform_create(self, serializer):
-        """Set created_by and determine day_type when creating attendance"""
-        attendance = serializer.save(
+        """Set created_by; the serializer sets day_type before its single save()"""
+        serializer.save(
             created_by=self.request.user,
             updated_by=self.request.user
         )
-        self._determine_day_type(attendance)
-        attendance.save()
     
     def perform_update(self, serializer):
-        """Set updated_by and recalculate when updating attendance"""
-        attendance = serializer.save(updated_by=self.request.user)
-        self._determine_day_type(attendance)
-        attendance.save()
+        """Set updated_by; derived fields are recalculated only if times changed"""
+        serializer.save(updated_by=self.request.user)
     
     def _determine_day_type(self, attendance):
         """Determine day_type based on date, holidays, and weekend"""
@@ -151,11 +218,11 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         # Check if holiday
-        holiday = Holiday.objects.filter(date=check_date, is_active=True).first()
-        if holiday:
+        holiday_name = WorkCalendar.holiday_name(check_date)
+        if holiday_name:
             return Response({
                 "error": 1,
-                "message": f"Cannot check-in on holidays. {holiday.name} is a holiday."
+                "message": f"Cannot check-in on holidays. {holiday_name} is a holiday."
             }, status=status.HTTP_400_BAD_REQUEST)
         
         # Check if employee has approved leave for this date
@@ -211,113 +278,36 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         # Determine if this is a manual entry (work from home with provided times)
         is_manual_entry = is_work_from_home and (check_in_str or check_out_str)
         
-        with transaction.atomic():
-            # Lock row to prevent concurrent check-ins
-            existing = Attendance.objects.select_for_update().filter(
-                employee=employee,
-                date=check_date
-            ).first()
-
-            # Validate location-specific check-in
-            if location == 'OFFICE':
-                if existing and existing.office_in_time:
-                    return Response({
-                        "error": 1,
-                        "message": f"Already checked in at office for {check_date}"
-                    }, status=status.HTTP_400_BAD_REQUEST)
-            elif location == 'HOME':
-                if existing and existing.home_in_time and not is_work_from_home:
-                    return Response({
-                        "error": 1,
-                        "message": f"Already checked in at home for {check_date}"
-                    }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Set timesheet status based on user role and entry type
-            # ALL work-from-home entries from employees need approval, admin entries are auto-approved
-            # Regular office check-ins are auto-approved
-            if is_work_from_home:
-               # Work from home: PENDING for employees, APPROVED for admins
-                if user.is_staff or user.is_superuser:
-                    timesheet_status = 'APPROVED'
-                    timesheet_approved_by = user
-                    timesheet_approved_at = timezone.now()
-                else:
-                    timesheet_status = 'PENDING'
-                    timesheet_approved_by = None
-                    timesheet_approved_at = None
-            else:
-               # Regular office check-in: Auto-approved
-                timesheet_status = 'APPROVED'
-                timesheet_approved_by = user
-                timesheet_approved_at = timezone.now()
-            
-            # Create or update attendance record
-            if existing:
-                if location == 'OFFICE':
-                    existing.office_in_time = current_time
-                elif location == 'HOME':
-                    if home_in_time:
-                        existing.home_in_time = home_in_time
-                    else:
-                        existing.home_in_time = current_time
-                    if home_out_time:
-                        existing.home_out_time = home_out_time
-                
-                existing.is_working_from_home = is_work_from_home
-                if notes:
-                    existing.day_text = notes
-                existing.updated_by = user
-                
-               # Update timesheet status (only if fields exist in model)
-               # For work-from-home entries, always update status
-               # For regular check-ins, only update if status is not already set or is PENDING
-                if is_work_from_home:
-                    if hasattr(existing, 'timesheet_status'):
-                        existing.timesheet_status = timesheet_status
-                    if hasattr(existing, 'timesheet_submitted_at'):
-                        existing.timesheet_submitted_at = timezone.now()
-                    if timesheet_approved_by and hasattr(existing, 'timesheet_approved_by'):
-                        existing.timesheet_approved_by = timesheet_approved_by
-                    if timesheet_approved_at and hasattr(existing, 'timesheet_approved_at'):
-                        existing.timesheet_approved_at = timesheet_approved_at
-                elif hasattr(existing, 'timesheet_status') and (not existing.timesheet_status or existing.timesheet_status == 'PENDING'):
-                   # For regular check-ins, auto-approve if not already set or if pending
-                    existing.timesheet_status = timesheet_status
-                    if timesheet_approved_by and hasattr(existing, 'timesheet_approved_by'):
-                        existing.timesheet_approved_by = timesheet_approved_by
-                    if timesheet_approved_at and hasattr(existing, 'timesheet_approved_at'):
-                        existing.timesheet_approved_at = timesheet_approved_at
-                
-                self._determine_day_type(existing)
-                existing.save()
-                attendance = existing
-            else:
-               # Create new attendance record
-                attendance = Attendance.objects.create(
-                    employee=employee,
-                    date=check_date,
-                    office_in_time=current_time if location == 'OFFICE' else None,
-                    home_in_time=home_in_time if location == 'HOME' else (current_time if location == 'HOME' and not home_in_time else None),
-                    home_out_time=home_out_time if location == 'HOME' and home_out_time else None,
-                    day_text=notes,
-                    is_working_from_home=is_work_from_home,
-                    office_working_hours=getattr(settings, 'ATTENDANCE_DEFAULT_WORKING_HOURS', '09:00'),
-                    orignal_total_time=getattr(settings, 'ATTENDANCE_DEFAULT_TOTAL_TIME_SECONDS', 32400),
-                    created_by=user,
-                    updated_by=user
-                )
-               # Set timesheet fields only if they exist in the model
-                if hasattr(attendance, 'timesheet_status'):
-                    attendance.timesheet_status = timesheet_status
-                if is_work_from_home and hasattr(attendance, 'timesheet_submitted_at'):
-                    attendance.timesheet_submitted_at = timezone.now()
-                if timesheet_status == 'APPROVED':
-                    if timesheet_approved_by and hasattr(attendance, 'timesheet_approved_by'):
-                        attendance.timesheet_approved_by = timesheet_approved_by
-                    if timesheet_approved_at and hasattr(attendance, 'timesheet_approved_at'):
-                        attendance.timesheet_approved_at = timesheet_approved_at
-                self._determine_day_type(attendance)
-                attendance.save()
+        # Validate against the day as it stands including pending punches (no row lock)
+        existing = PunchEventService.project(employee, check_date)
+        
+        # Validate location-specific check-in
+        if location == 'OFFICE':
+            if existing and existing.office_in_time:
+                return Response({
+                    "error": 1,
+                    "message": f"Already checked in at office for {check_date}"
+                }, status=status.HTTP_400_BAD_REQUEST)
+        elif location == 'HOME':
+            if existing and existing.home_in_time and not is_work_from_home:
+                return Response({
+                    "error": 1,
+                    "message": f"Already checked in at home for {check_date}"
+                }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Append the punch(es); timesheet status is applied when they are compacted:
+        # office check-ins and admin entries are auto-approved, employee WFH is PENDING
+        if location == 'OFFICE':
+            punches = [('IN', 'OFFICE', current_time)]
+        else:
+            punches = [('IN', 'HOME', home_in_time or current_time)]
+            if home_out_time:
+                punches.append(('OUT', 'HOME', home_out_time))
+        PunchEventService.record(
+            employee, check_date, punches, user=user, notes=notes,
+            is_working_from_home=is_work_from_home
+        )
+        attendance = PunchEventService.settle(employee, check_date)
         
         # Format response
         from .serializers import format_time_to_12hr, format_datetime_to_iso
@@ -403,52 +393,43 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         notes = serializer.validated_data.get('notes', '')
         current_time = timezone.now()
         
-        with transaction.atomic():
-            attendance = Attendance.objects.select_for_update().filter(
-                employee=employee,
-                date=check_date
-            ).first()
-            
-            if not attendance:
+        # Validate against the day as it stands including pending punches (no row lock)
+        attendance = PunchEventService.project(employee, check_date)
+        
+        if not attendance:
+            return Response({
+                "error": 1,
+                "message": f"No check-in found for {check_date}. Please check in first."
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Validate location-specific check-out
+        if location == 'OFFICE':
+            if not attendance.office_in_time:
                 return Response({
                     "error": 1,
-                    "message": f"No check-in found for {check_date}. Please check in first."
+                    "message": f"No office check-in found for {check_date}. Please check in at office first."
+                }, status=status.HTTP_400_BAD_REQUEST)
+            if attendance.office_out_time:
+                return Response({
+                    "error": 1,
+                    "message": f"Already checked out from office for {check_date}"
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Validate location-specific check-out
-            if location == 'OFFICE':
-                if not attendance.office_in_time:
-                    return Response({
-                        "error": 1,
-                        "message": f"No office check-in found for {check_date}. Please check in at office first."
-                    }, status=status.HTTP_400_BAD_REQUEST)
-                if attendance.office_out_time:
-                    return Response({
-                        "error": 1,
-                        "message": f"Already checked out from office for {check_date}"
-                    }, status=status.HTTP_400_BAD_REQUEST)
-                attendance.office_out_time = current_time
-                
-            elif location == 'HOME':
-                if not attendance.home_in_time:
-                    return Response({
-                        "error": 1,
-                        "message": f"No home check-in found for {check_date}. Please check in at home first."
-                    }, status=status.HTTP_400_BAD_REQUEST)
-                if attendance.home_out_time:
-                    return Response({
-                        "error": 1,
-                        "message": f"Already checked out from home for {check_date}"
-                    }, status=status.HTTP_400_BAD_REQUEST)
-                attendance.home_out_time = current_time
-            
-            if notes:
-                attendance.text = notes
-            attendance.updated_by = user
-            
-            # Save will trigger time calculations
-            self._determine_day_type(attendance)
-            attendance.save()
+        elif location == 'HOME':
+            if not attendance.home_in_time:
+                return Response({
+                    "error": 1,
+                    "message": f"No home check-in found for {check_date}. Please check in at home first."
+                }, status=status.HTTP_400_BAD_REQUEST)
+            if attendance.home_out_time:
+                return Response({
+                    "error": 1,
+                    "message": f"Already checked out from home for {check_date}"
+                }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Append the punch; compaction recalculates the times
+        PunchEventService.record(employee, check_date, [('OUT', location, current_time)], user=user, notes=notes)
+        attendance = PunchEventService.settle(employee, check_date)
         
         # Format response
         from .serializers import format_seconds_to_time, format_time_to_12hr
@@ -551,26 +532,30 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         num_days = monthrange(year, month)[1]
         end_date = datetime(year, month, num_days).date()
         
-        attendance_records = Attendance.objects.filter(
-            employee=employee,
-            date__gte=start_date,
-            date__lte=end_date
-        ).order_by('date')
+        # Routed to the archive table for archived years
+        attendance_records = AttendanceArchiveService.queryset_for_range(
+            start_date, end_date
+        ).filter(employee=employee).select_related('leave').order_by('date')
         
-        # Get holidays for the month
-        holidays_list = Holiday.objects.filter(
-            date__year=year,
-            date__month=month,
-            is_active=True
-        )
+        # Get holidays for the month (shared cached calendar)
+        holiday_dates = WorkCalendar.holidays_between(start_date, end_date)
         
         # Get leaves for the month
         from leaves.models import Leave
-        leaves_list = Leave.objects.filter(
+        leaves_list = list(Leave.objects.filter(
             employee=employee,
             from_date__lte=end_date,
             to_date__gte=start_date
-        ).order_by('from_date')
+        ).order_by('from_date'))
+        
+        # Stored month summary (rebuilt from the rows above if missing/stale)
+        attendance_map = {rec.date: rec for rec in attendance_records}
+        summary = MonthSummaryService.get_summary(
+            employee, year, month,
+            attendance_map=attendance_map,
+            holiday_dates=holiday_dates,
+            leaves_list=leaves_list
+        )
         
         # Serialize monthly data
         response_data = MonthlyAttendanceSerializer.serialize_monthly_data(
@@ -578,12 +563,278 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             employee,
             month,
             year,
-            holidays_list,
-            leaves_list
+            None,
+            leaves_list,
+            summary=summary
         )
         
         return Response(response_data, status=status.HTTP_200_OK)
     
+    @swagger_auto_schema(
+        operation_description="Monthly day-type grid for a team, department or company",
+        manual_parameters=[
+            openapi.Parameter('month', openapi.IN_QUERY, description="Month (1-12)", type=openapi.TYPE_INTEGER, required=True),
+            openapi.Parameter('year', openapi.IN_QUERY, description="Year (e.g., 2026)", type=openapi.TYPE_INTEGER, required=True),
+            openapi.Parameter('department', openapi.IN_QUERY, description="Department ID (optional)", type=openapi.TYPE_INTEGER, required=False),
+            openapi.Parameter('company', openapi.IN_QUERY, description="Company ID (optional)", type=openapi.TYPE_INTEGER, required=False),
+            openapi.Parameter('manager', openapi.IN_QUERY, description="Reporting manager's employee ID (optional)", type=openapi.TYPE_INTEGER, required=False),
+        ],
+        responses={200: openapi.Response("Success")}
+    )
+    @action(detail=False, methods=['get'], url_path='monthly-grid')
+    def monthly_grid(self, request):
+        """
+        Monthly attendance grid (employees x days) in one batched pass
+        GET /api/attendance/monthly-grid/?month=12&year=2025&department=3
+        Day types match /api/attendance/monthly/.
+        Admins and roles with can_view_all_employees see everyone,
+        managers see themselves and their direct reports.
+        """
+        user = request.user
+        
+        try:
+            month = int(request.query_params.get('month'))
+            year = int(request.query_params.get('year'))
+            if month < 1 or month > 12:
+                raise ValueError("Month must be between 1 and 12")
+        except (TypeError, ValueError) as e:
+            return Response({
+                "error": 1,
+                "message": f"Valid month and year query parameters are required: {str(e)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        employees = Employee.objects.filter(is_active=True)
+        profile = getattr(user, 'employee_profile', None)
+        if not (user.is_staff or (profile and profile.role and profile.role.can_view_all_employees)):
+            employees = HierarchyFilterBackend().filter_queryset(request, employees, self)
+        
+        filters_map = {'department': 'department_id', 'company': 'company_id', 'manager': 'reporting_manager_id'}
+        for param, field in filters_map.items():
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    employees = employees.filter(**{field: int(value)})
+                except ValueError:
+                    return Response({
+                        "error": 1,
+                        "message": f"Invalid {param}"
+                    }, status=status.HTTP_400_BAD_REQUEST)
+        
+        employees = employees.select_related('department').only(
+            'id', 'employee_id', 'first_name', 'middle_name', 'last_name',
+            'joining_date', 'department__name'
+        ).order_by('first_name', 'last_name')
+        
+        rows = MonthlyGridService.build(employees, year, month)
+        num_days = monthrange(year, month)[1]
+        days = [
+            {
+                "date": f"{day:02d}",
+                "day": datetime(year, month, day).strftime(DAY_NAME_FORMAT)
+            }
+            for day in range(1, num_days + 1)
+        ]
+        
+        return Response({
+            "error": 0,
+            "data": {
+                "year": year,
+                "month": month,
+                "days": days,
+                "employees": [
+                    {
+                        "userid": str(employee.id),
+                        "employee_id": employee.employee_id,
+                        "name": employee.get_full_name(),
+                        "department": employee.department.name if employee.department_id else "",
+                        "day_types": day_types,
+                        "half_days": sorted(half_days),
+                        "summary": MonthlyGridService.summarize(day_types, half_days)
+                    }
+                    for employee, day_types, half_days in rows
+                ]
+            }
+        }, status=status.HTTP_200_OK)
+    
+    @swagger_auto_schema(
+        operation_description="Team availability: who is on leave, half-day leave or absent per day",
+        manual_parameters=[
+            openapi.Parameter('start_date', openapi.IN_QUERY, description=f"From date ({DATE_FORMAT}), default: 1st of this month", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('end_date', openapi.IN_QUERY, description=f"To date ({DATE_FORMAT}), default: end of start_date's month; at most {TEAM_AVAILABILITY_MAX_DAYS} days", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('department', openapi.IN_QUERY, description="Department ID (optional)", type=openapi.TYPE_INTEGER, required=False),
+            openapi.Parameter('company', openapi.IN_QUERY, description="Company ID (optional)", type=openapi.TYPE_INTEGER, required=False),
+            openapi.Parameter('manager', openapi.IN_QUERY, description="Reporting manager's employee ID (optional)", type=openapi.TYPE_INTEGER, required=False),
+        ],
+        responses={200: openapi.Response("Success")}
+    )
+    @action(detail=False, methods=['get'], url_path='team-availability')
+    def team_availability(self, request):
+        """
+        Who's out calendar for a team over a month or quarter
+        GET /api/attendance/team-availability/?start_date=2026-01-01&end_date=2026-03-31
+        Read from the per-employee-year day status bitmaps (DayStatusBitmapService).
+        Scoped like monthly-grid: admins and roles with can_view_all_employees
+        see everyone, managers themselves and their direct reports.
+        """
+        user = request.user
+
+        try:
+            today = timezone.now().date()
+            start_param = request.query_params.get('start_date')
+            end_param = request.query_params.get('end_date')
+            start_date = datetime.strptime(start_param, DATE_FORMAT).date() if start_param else today.replace(day=1)
+            end_date = (
+                datetime.strptime(end_param, DATE_FORMAT).date() if end_param
+                else start_date.replace(day=monthrange(start_date.year, start_date.month)[1])
+            )
+        except ValueError:
+            return Response({
+                "error": 1,
+                "message": f"Dates must be in {DATE_FORMAT} format"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if start_date > end_date or (end_date - start_date).days >= TEAM_AVAILABILITY_MAX_DAYS:
+            return Response({
+                "error": 1,
+                "message": f"end_date must be on or after start_date and the range at most {TEAM_AVAILABILITY_MAX_DAYS} days"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        employees = Employee.objects.filter(is_active=True)
+        profile = getattr(user, 'employee_profile', None)
+        if not (user.is_staff or (profile and profile.role and profile.role.can_view_all_employees)):
+            employees = HierarchyFilterBackend().filter_queryset(request, employees, self)
+
+        filters_map = {'department': 'department_id', 'company': 'company_id', 'manager': 'reporting_manager_id'}
+        for param, field in filters_map.items():
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    employees = employees.filter(**{field: int(value)})
+                except ValueError:
+                    return Response({
+                        "error": 1,
+                        "message": f"Invalid {param}"
+                    }, status=status.HTTP_400_BAD_REQUEST)
+
+        employees = employees.select_related('department').only(
+            'id', 'employee_id', 'first_name', 'middle_name', 'last_name',
+            'joining_date', 'department__name'
+        ).order_by('first_name', 'last_name')
+
+        calendar, rows = DayStatusBitmapService.availability(employees, start_date, end_date, today=today)
+        by_day = {day: {'on_leave': [], 'half_day': [], 'absent': []} for day in calendar}
+        for employee, out in rows:
+            for key, bucket in (('LEAVE_DAY', 'on_leave'), ('HALF_DAY', 'half_day'), ('ABSENT', 'absent')):
+                for day in out[key]:
+                    by_day[day][bucket].append(str(employee.id))
+
+        return Response({
+            "error": 0,
+            "data": {
+                "start_date": start_date.strftime(DATE_FORMAT),
+                "end_date": end_date.strftime(DATE_FORMAT),
+                "days": [
+                    {
+                        "date": day.strftime(DATE_FORMAT),
+                        "day": day.strftime(DAY_NAME_FORMAT),
+                        "is_weekend": info['is_weekend'],
+                        "holiday": info['holiday'],
+                        **by_day[day],
+                    }
+                    for day, info in sorted(calendar.items())
+                ],
+                "employees": [
+                    {
+                        "userid": str(employee.id),
+                        "employee_id": employee.employee_id,
+                        "name": employee.get_full_name(),
+                        "department": employee.department.name if employee.department_id else "",
+                        "summary": {key: len(days) for key, days in out.items()},
+                    }
+                    for employee, out in rows
+                ]
+            }
+        }, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        operation_description="Attendance alert inbox (missing in/out times and missing days)",
+        manual_parameters=[
+            openapi.Parameter('status', openapi.IN_QUERY, description="OPEN (default) or RESOLVED", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('alert_type', openapi.IN_QUERY, description="MISSING_TIME or MISSING_DAY", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('company', openapi.IN_QUERY, description="Company ID (admins only)", type=openapi.TYPE_INTEGER, required=False),
+            openapi.Parameter('manager', openapi.IN_QUERY, description="Reporting manager's employee ID (admins only)", type=openapi.TYPE_INTEGER, required=False),
+            openapi.Parameter('start_date', openapi.IN_QUERY, description=f"From date ({DATE_FORMAT})", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('end_date', openapi.IN_QUERY, description=f"To date ({DATE_FORMAT})", type=openapi.TYPE_STRING, required=False),
+        ],
+        responses={200: AttendanceAlertSerializer(many=True)}
+    )
+    @action(detail=False, methods=['get'], url_path='alerts')
+    def alerts(self, request):
+        """
+        Alert inbox from the AttendanceAlert queue (indexed by manager/company)
+        GET /api/attendance/alerts/?status=OPEN
+        Admins and roles with can_view_all_employees see every alert,
+        managers the alerts of their direct reports, others their own.
+        """
+        user = request.user
+        alert_status = request.query_params.get('status', 'OPEN').upper()
+        if alert_status not in dict(AttendanceAlert.STATUS_CHOICES):
+            return Response({
+                "error": 1,
+                "message": "status must be OPEN or RESOLVED"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        queryset = AttendanceAlert.objects.filter(status=alert_status)
+        
+        profile = getattr(user, 'employee_profile', None)
+        if user.is_staff or (profile and profile.role and profile.role.can_view_all_employees):
+            for param, field in {'company': 'company_id', 'manager': 'reporting_manager_id'}.items():
+                value = request.query_params.get(param)
+                if value:
+                    try:
+                        queryset = queryset.filter(**{field: int(value)})
+                    except ValueError:
+                        return Response({
+                            "error": 1,
+                            "message": f"Invalid {param}"
+                        }, status=status.HTTP_400_BAD_REQUEST)
+        elif profile and profile.role and profile.role.can_view_subordinates:
+            queryset = queryset.filter(reporting_manager=profile)
+        elif profile:
+            queryset = queryset.filter(employee=profile)
+        else:
+            return Response({
+                "error": 1,
+                "message": "User must have an employee profile"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        alert_type = request.query_params.get('alert_type')
+        if alert_type:
+            queryset = queryset.filter(alert_type=alert_type.upper())
+        for param, lookup in (('start_date', 'date__gte'), ('end_date', 'date__lte')):
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    queryset = queryset.filter(**{lookup: datetime.strptime(value, DATE_FORMAT).date()})
+                except ValueError:
+                    return Response({
+                        "error": 1,
+                        "message": f"Invalid {param} format. Use {DATE_FORMAT}"
+                    }, status=status.HTTP_400_BAD_REQUEST)
+        
+        queryset = queryset.select_related('employee').order_by('-date', '-id')
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = AttendanceAlertSerializer(page, many=True)
+            return self.get_paginated_response({
+                "error": 0,
+                "data": serializer.data
+            })
+        
+        serializer = AttendanceAlertSerializer(queryset, many=True)
+        return Response({
+            "error": 0,
+            "data": serializer.data
+        })
+    
     @action(detail=False, methods=['get'], url_path='today')
     def today(self, request):
         """
@@ -623,6 +874,52 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             "data": serializer.data
         })
     
+    @swagger_auto_schema(
+        operation_description="Stream attendance rows as CSV or NDJSON (same filters as the list endpoint)",
+        manual_parameters=[
+            openapi.Parameter('start_date', openapi.IN_QUERY, description="From date (YYYY-MM-DD)", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('end_date', openapi.IN_QUERY, description="To date (YYYY-MM-DD)", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('export_format', openapi.IN_QUERY, description="csv (default) or ndjson", type=openapi.TYPE_STRING, required=False),
+        ],
+        responses={200: openapi.Response("Streamed file")}
+    )
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """
+        Stream attendance for an arbitrary date range
+        GET /api/attendance/export/?start_date=2026-01-01&end_date=2026-03-31&export_format=csv
+        Accepts the list filters (employee, date, day_type, admin_alert, userid,
+        search) and streams rows in constant memory, ordered by date.
+        """
+        export_format = request.query_params.get('export_format', 'csv').lower()
+        if export_format not in EXPORT_FORMATS:
+            return Response({
+                "error": 1,
+                "message": f"export_format must be one of: {', '.join(EXPORT_FORMATS)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Routed to the archive table for archived years
+        try:
+            queryset = self.filter_queryset(self._range_queryset(request))
+        except ValueError as e:
+            return Response({
+                "error": 1,
+                "message": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if export_format == 'ndjson':
+            response = StreamingHttpResponse(
+                AttendanceExportService.stream_ndjson(queryset),
+                content_type='application/x-ndjson'
+            )
+        else:
+            response = StreamingHttpResponse(
+                AttendanceExportService.stream_csv(queryset),
+                content_type='text/csv'
+            )
+        response['Content-Disposition'] = f'attachment; filename="attendance_export.{export_format}"'
+        return response
+    
     @action(detail=False, methods=['get'], url_path='my-attendance')
     def my_attendance(self, request):
         """
@@ -638,31 +935,15 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         employee = user.employee_profile
-        queryset = Attendance.objects.filter(employee=employee)
-        
-        # Filter by date range if provided
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
         
-        if start_date:
-            try:
-                start_date = datetime.strptime(start_date, DATE_FORMAT).date()
-                queryset = queryset.filter(date__gte=start_date)
-            except ValueError:
-                return Response({
-                    "error": 1,
-                    "message": f"Invalid start_date format. Use {DATE_FORMAT}"
-                }, status=status.HTTP_400_BAD_REQUEST)
-        
-        if end_date:
-            try:
-                end_date = datetime.strptime(end_date, DATE_FORMAT).date()
-                queryset = queryset.filter(date__lte=end_date)
-            except ValueError:
-                return Response({
-                    "error": 1,
-                    "message": f"Invalid end_date format. Use {DATE_FORMAT}"
-                }, status=status.HTTP_400_BAD_REQUEST)
+        # Filter by date range if provided; archived years come from the archive table
+        try:
+            queryset = self._range_queryset(request).filter(employee=employee)
+        except ValueError as e:
+            return Response({
+                "error": 1,
+                "message": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
         
         # Paginate results
         page = self.paginate_queryset(queryset)
@@ -826,11 +1107,11 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         # Check if holiday
-        holiday = Holiday.objects.filter(date=date, is_active=True).first()
-        if holiday:
+        holiday_name = WorkCalendar.holiday_name(date)
+        if holiday_name:
             return Response({
                 "error": 1,
-                "message": f"Cannot submit timesheet on holidays. {holiday.name} is a holiday."
+                "message": f"Cannot submit timesheet on holidays. {holiday_name} is a holiday."
             }, status=status.HTTP_400_BAD_REQUEST)
 
         # Check for full-day approved leave on this date
@@ -985,6 +1266,72 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             }
         }, status=status.HTTP_201_CREATED)
 
+    @swagger_auto_schema(
+        operation_description="Submit a whole week of timesheet entries in one request.",
+        request_body=WeeklyTimesheetBatchSubmitSerializer,
+        responses={201: "Success Response"}
+    )
+    @action(detail=False, methods=['post'], url_path='submit-timesheet-week')
+    def submit_weekly_timesheet_batch(self, request):
+        """
+        Submit several days of the same week at once
+        POST /api/attendance/submit-timesheet-week/
+        Body: {
+            "entries": [
+                {"date": "2025-12-22", "total_time": "8"},
+                {"date": "2025-12-23", "total_time": "8", "is_working_from_home": true,
+                 "comments": "Work description...", "tracker_screenshot": "public_id"}
+            ]
+        }
+        Entries follow the submit-timesheet rules; the week is written in one
+        transaction (all or nothing) with a single management notification.
+        """
+        user = request.user
+        
+        if not hasattr(user, 'employee_profile'):
+            return Response({
+                "error": 1,
+                "message": "User must have an employee profile to submit timesheet."
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        employee = user.employee_profile
+        serializer = WeeklyTimesheetBatchSubmitSerializer(data=request.data, context={'request': request})
+        if not serializer.is_valid():
+            return Response({
+                "error": 1,
+                "message": "Validation failed",
+                "errors": serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        rows, errors = TimesheetSubmissionService.submit_week(
+            employee, serializer.validated_data['entries'], user=user
+        )
+        if errors:
+            return Response({
+                "error": 1,
+                "message": "Timesheet not submitted. " + " ".join(f"{e['date']}: {e['message']}" for e in errors),
+                "errors": errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        requires_approval = not (user.is_staff or user.is_superuser)
+        return Response({
+            "error": 0,
+            "data": {
+                "message": f"{len(rows)} timesheet entries submitted successfully",
+                "entries": [
+                    {
+                        "attendance_id": attendance.id,
+                        "status": attendance.get_timesheet_status_display(),
+                        "date": attendance.date.strftime(DATE_FORMAT),
+                        "is_working_from_home": attendance.is_working_from_home,
+                        "auto_approved": not attendance.is_working_from_home,
+                        "requires_approval": attendance.is_working_from_home and requires_approval
+                    }
+                    for attendance in rows
+                ]
+            }
+        }, status=status.HTTP_201_CREATED)
+
     @swagger_auto_schema(
         operation_description="Manually create or update attendance for a specific day.",
         request_body=UpdateSessionSerializer,
@@ -1030,11 +1377,11 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         # Check if holiday
-        holiday = Holiday.objects.filter(date=date, is_active=True).first()
-        if holiday:
+        holiday_name = WorkCalendar.holiday_name(date)
+        if holiday_name:
             return Response({
                 "error": 1,
-                "message": f"Cannot update attendance on holidays. {holiday.name} is a holiday."
+                "message": f"Cannot update attendance on holidays. {holiday_name} is a holiday."
             }, status=status.HTTP_400_BAD_REQUEST)
 
         # Check for full-day approved leave on this date
@@ -1231,17 +1578,129 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             }
         }, status=status.HTTP_200_OK)
     
+    @swagger_auto_schema(
+        operation_description="Approve or reject many PENDING timesheet entries at once (Admin/Manager).",
+        request_body=BulkTimesheetDecisionSerializer,
+        responses={200: "Success Response"}
+    )
+    @action(detail=False, methods=['post'], url_path='bulk-approve')
+    def bulk_approve_timesheets(self, request):
+        """
+        Bulk approval/rejection endpoint
+        POST /api/attendance/bulk-approve/
+        Body: {
+            "action": "approve",          // or "reject" (admin_notes required)
+            "admin_notes": "Optional notes",
+            "ids": [101, 102]             // or "employee": 12 and/or "week_start": "2025-12-22"
+        }
+        Admins can decide any entry, managers only their direct reports'.
+        Ids outside that scope or no longer PENDING are returned as skipped.
+        """
+        user = request.user
+        
+        queryset = Attendance.objects.all()
+        if not (user.is_superuser or user.is_staff):
+            emp = getattr(user, 'employee_profile', None)
+            if not (emp and emp.role and emp.role.can_view_subordinates):
+                return Response({
+                    "error": 1,
+                    "message": "Permission denied. Only admins and managers can approve/reject timesheets."
+                }, status=status.HTTP_403_FORBIDDEN)
+            queryset = queryset.filter(employee__reporting_manager_id=emp.id)
+        
+        serializer = BulkTimesheetDecisionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({
+                "error": 1,
+                "message": "Validation failed",
+                "errors": serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = serializer.validated_data
+        if data.get('ids') is not None:
+            queryset = queryset.filter(id__in=data['ids'])
+        if data.get('employee') is not None:
+            queryset = queryset.filter(employee_id=data['employee'])
+        if data.get('week_start') is not None:
+            week_start = data['week_start'] - timedelta(days=data['week_start'].weekday())
+            queryset = queryset.filter(date__gte=week_start, date__lte=week_start + timedelta(days=6))
+        
+        rows = TimesheetApprovalService.decide(
+            queryset, data['action'], user=user, admin_notes=data['admin_notes']
+        )
+        decided_ids = [row[0] for row in rows]
+        skipped_ids = sorted(set(data['ids']) - set(decided_ids)) if data.get('ids') is not None else []
+        
+        return Response({
+            "error": 0,
+            "data": {
+                "message": f"{len(decided_ids)} timesheet entries {data['action']}d successfully",
+                "status": 'Approved' if data['action'] == 'approve' else 'Rejected',
+                "attendance_ids": decided_ids,
+                "skipped_ids": skipped_ids,
+                "employees": len({row[1] for row in rows}),
+                "approved_by": user.email,
+                "admin_notes": data['admin_notes'] if data['action'] == 'reject' else None
+            }
+        }, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['post'], url_path='bulk-punches', permission_classes=[IsAdminUser])
+    def bulk_punches(self, request):
+        """
+        Ingest a batch of device punches (Admin/HR only)
+        POST /api/attendance/bulk-punches/
+        Body (JSON): {"punches": [{"employee_id": "EMP20250001", "timestamp": "2026-02-02T09:01:12+05:30", "location": "OFFICE"}]}
+        Or multipart with `file`: a CSV (employee_id,timestamp,location) or JSON export
+        """
+        upload = request.FILES.get('file')
+        try:
+            if upload:
+                content = upload.read().decode('utf-8-sig')
+                if upload.name.lower().endswith('.json'):
+                    import json
+                    punches = json.loads(content)
+                else:
+                    punches = PunchIngestionService.parse_csv(content)
+            else:
+                punches = request.data.get('punches')
+        except (UnicodeDecodeError, ValueError) as e:
+            return Response({
+                "error": 1,
+                "message": f"Could not read punch file: {str(e)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if isinstance(punches, dict):
+            punches = punches.get('punches')
+        if not isinstance(punches, list) or not punches:
+            return Response({
+                "error": 1,
+                "message": "A non-empty list of punches is required"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(punches) > PUNCH_BATCH_MAX_SIZE:
+            return Response({
+                "error": 1,
+                "message": f"Too many punches in one batch (max {PUNCH_BATCH_MAX_SIZE})"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        result = PunchIngestionService.ingest(punches, user=request.user)
+        return Response({
+            "error": 0,
+            "data": result
+        }, status=status.HTTP_200_OK)
+    
     @action(detail=False, methods=['patch'], url_path='bulk-update-working-hours')
     def bulk_update_working_hours(self, request):
         """
         Bulk update office_working_hours for a date range (Admin/Manager only)
         PATCH /api/attendance/bulk-update-working-hours/
         Body: {
-            "employee": 12,
+            "employee": 12,              # or "employees": [12, 13], "department": 3, "company": 1
             "start_date": "2026-02-01",
             "end_date": "2026-02-07",
             "office_working_hours": "09:00"
         }
+        Managers can only target their subordinates; department/company
+        targets are narrowed to them.
         """
         user = request.user
         
@@ -1269,77 +1728,75 @@ class AttendanceViewSet(viewsets.ModelViewSet):
                 "errors": serializer.errors
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        employee_id = serializer.validated_data['employee']
-        start_date = serializer.validated_data['start_date']
-        end_date = serializer.validated_data['end_date']
-        office_hours = serializer.validated_data['office_working_hours']
-        
-        # Get employee
-        try:
-            employee = Employee.objects.get(id=employee_id)
-        except Employee.DoesNotExist:
-            return Response({
-                "error": 1,
-                "message": f"Employee with ID {employee_id} not found"
-            }, status=status.HTTP_404_NOT_FOUND)
+        data = serializer.validated_data
+        start_date = data['start_date']
+        end_date = data['end_date']
+        office_hours = data['office_working_hours']
+        
+        # Resolve target employees
+        if data.get('employee') is not None:
+            employees = Employee.objects.filter(id=data['employee'])
+        elif data.get('employees') is not None:
+            employees = Employee.objects.filter(id__in=data['employees'])
+        elif data.get('department') is not None:
+            employees = Employee.objects.filter(department_id=data['department'], is_active=True)
+        else:
+            employees = Employee.objects.filter(company_id=data['company'], is_active=True)
         
         # Additional permission check for managers: can only update subordinates
         if not (user.is_superuser or user.is_staff):
-            if hasattr(user, 'employee_profile'):
-                emp = user.employee_profile
-                if emp.role and emp.role.can_view_subordinates:
-                    # Manager can only update their subordinates
-                    if employee.reporting_manager_id != emp.id:
+            emp = user.employee_profile
+            if emp.role and emp.role.can_view_subordinates:
+                if data.get('employee') is not None or data.get('employees') is not None:
+                    if employees.exclude(reporting_manager_id=emp.id).exists():
                         return Response({
                             "error": 1,
                             "message": "You can only update working hours for your subordinates"
                         }, status=status.HTTP_403_FORBIDDEN)
-        
-        # Bulk update attendance records
-        from datetime import timedelta
-        current_date = start_date
-        updated_count = 0
-        created_count = 0
-        
-        with transaction.atomic():
-            while current_date <= end_date:
-                attendance, created = Attendance.objects.get_or_create(
-                    employee=employee,
-                    date=current_date,
-                    defaults={
-                        'office_working_hours': office_hours,
-                        'orignal_total_time': getattr(settings, 'ATTENDANCE_DEFAULT_TOTAL_TIME_SECONDS', 32400),
-                        'created_by': user,
-                        'updated_by': user
-                    }
-                )
-                
-                if not created:
-                    # Update existing record
-                    attendance.office_working_hours = office_hours
-                    attendance.updated_by = user
-                    attendance.save()
-                    updated_count += 1
                 else:
-                    created_count += 1
-                
-                current_date += timedelta(days=1)
+                    employees = employees.filter(reporting_manager_id=emp.id)
         
+        employee_ids = list(employees.values_list('id', flat=True))
+        if not employee_ids:
+            return Response({
+                "error": 1,
+                "message": "No employees matched the request"
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            result = WorkingHoursService.bulk_set(employee_ids, start_date, end_date, office_hours, user=user)
+        except ValueError as e:
+            return Response({
+                "error": 1,
+                "message": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
         total_days = (end_date - start_date).days + 1
         
-        return Response({
-            "error": 0,
-            "data": {
+        response_data = {
+            "start_date": start_date.strftime(DATE_FORMAT),
+            "end_date": end_date.strftime(DATE_FORMAT),
+            "office_working_hours": office_hours,
+            "total_days": total_days,
+            "updated_records": result["updated"],
+            "created_records": result["created"]
+        }
+        if data.get('employee') is not None:
+            employee = Employee.objects.get(id=data['employee'])
+            response_data.update({
                 "message": f"Successfully updated office working hours for {employee.get_full_name()}",
-                "employee_id": employee_id,
+                "employee_id": employee.id,
                 "employee_name": employee.get_full_name(),
-                "start_date": start_date.strftime(DATE_FORMAT),
-                "end_date": end_date.strftime(DATE_FORMAT),
-                "office_working_hours": office_hours,
-                "total_days": total_days,
-                "updated_records": updated_count,
-                "created_records": created_count
-            }
+            })
+        else:
+            response_data.update({
+                "message": f"Successfully updated office working hours for {len(employee_ids)} employees",
+                "employee_ids": employee_ids,
+                "total_employees": len(employee_ids),
+            })
+        
+        return Response({
+            "error": 0,
+            "data": response_data
         }, status=status.HTTP_200_OK)
     
     def destroy(self, request, *args, **kwargs):
@@ -0,0 +1,178 @@
+"""
+Opt-in keyset pagination and approximate counts for large list endpoints.
+
+Default behaviour is DRF's PageNumberPagination (?page=N), so existing
+clients keep working. Two opt-ins:
+
+- ?cursor=            keyset pagination on the view's `cursor_ordering`
+                      (e.g. ('-date', '-id')). Pages are fetched with a
+                      WHERE on the last row's key instead of OFFSET and no
+                      COUNT(*) is issued. Follow the returned next/previous
+                      links; ?ordering is ignored in this mode.
+- ?count=approximate  page-number mode with an estimated count: table
+                      statistics for unfiltered lists, otherwise a COUNT
+                      capped at PAGINATION_APPROXIMATE_COUNT_CAP rows.
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+APPROXIMATE_COUNT_CAP = getattr(settings, 'PAGINATION_APPROXIMATE_COUNT_CAP', 10000)
+
+
+def estimate_table_rows(model, using='default'):
+    """Row estimate from the database statistics, or None when unavailable"""
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == 'mysql':
+        sql = ("SELECT TABLE_ROWS FROM information_schema.TABLES "
+               "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s")
+    elif connection.vendor == 'postgresql':
+        sql = "SELECT reltuples::bigint FROM pg_class WHERE relname = %s"
+    else:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [table])
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] and row[0] > 0 else None
+
+
+class ApproximateCountPaginator(Paginator):
+    """Paginator whose count is estimated; any page number >= 1 is accepted"""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_table_rows(queryset.model, queryset.db)
+            if estimate is not None:
+                return estimate
+        return queryset[:APPROXIMATE_COUNT_CAP].count()
+
+    def validate_number(self, number):
+        # The estimate may be short of the real count, so no upper bound
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+
+class OptInCursorPagination(PageNumberPagination):
+    """
+    PageNumberPagination plus opt-in keyset (?cursor=) and approximate
+    count (?count=approximate) modes. Views set `cursor_ordering` to a
+    unique ordering backed by an index, e.g. ('-date', '-id').
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    default_cursor_ordering = ('-id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        self.count_is_approximate = False
+        if self.cursor_mode:
+            return self._paginate_by_cursor(queryset, request, view)
+        if request.query_params.get(self.count_query_param) == 'approximate':
+            self.django_paginator_class = ApproximateCountPaginator
+            self.count_is_approximate = True
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_mode:
+            return Response(OrderedDict([
+                ('next', self.next_cursor_link),
+                ('previous', self.previous_cursor_link),
+                ('results', data),
+            ]))
+        response = super().get_paginated_response(data)
+        if self.count_is_approximate:
+            response.data['count_is_approximate'] = True
+        return response
+
+    # ---------- keyset mode ----------
+
+    @staticmethod
+    def _encode(values, reverse):
+        payload = json.dumps({
+            'v': [v.isoformat() if hasattr(v, 'isoformat') else str(v) for v in values],
+            'r': int(reverse),
+        })
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    @staticmethod
+    def _decode(token, model, fields):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+            values = [
+                model._meta.get_field(field).to_python(raw)
+                for field, raw in zip(fields, payload['v'])
+            ]
+            if len(values) != len(fields):
+                raise ValueError
+            return values, bool(payload.get('r'))
+        except Exception:
+            raise NotFound('Invalid cursor')
+
+    @staticmethod
+    def _after(ordering, values, reverse):
+        """Q for rows strictly after `values` in `ordering` (before, when reverse)"""
+        condition = Q()
+        for i, term in enumerate(ordering):
+            field = term.lstrip('-')
+            descending = term.startswith('-') != reverse
+            step = Q(**{f"{field}__{'lt' if descending else 'gt'}": values[i]})
+            for previous_term, value in zip(ordering[:i], values[:i]):
+                step &= Q(**{previous_term.lstrip('-'): value})
+            condition |= step
+        return condition
+
+    def _paginate_by_cursor(self, queryset, request, view):
+        ordering = list(getattr(view, 'cursor_ordering', self.default_cursor_ordering))
+        fields = [term.lstrip('-') for term in ordering]
+        page_size = self.get_page_size(request)
+
+        token = request.query_params.get(self.cursor_query_param)
+        values, reverse = (None, False)
+        if token:
+            values, reverse = self._decode(token, queryset.model, fields)
+
+        order_by = ordering if not reverse else [
+            term[1:] if term.startswith('-') else f'-{term}' for term in ordering
+        ]
+        queryset = queryset.order_by(*order_by)
+        if values is not None:
+            queryset = queryset.filter(self._after(ordering, values, reverse))
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        has_next = has_more if not reverse else True
+        has_previous = has_more if reverse else values is not None
+        url = remove_query_param(request.build_absolute_uri(), self.page_query_param)
+        self.next_cursor_link = replace_query_param(
+            url, self.cursor_query_param,
+            self._encode([getattr(rows[-1], f) for f in fields], False)
+        ) if rows and has_next else None
+        self.previous_cursor_link = replace_query_param(
+            url, self.cursor_query_param,
+            self._encode([getattr(rows[0], f) for f in fields], True)
+        ) if rows and has_previous else None
+        return rows
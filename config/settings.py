@@ -277,6 +277,20 @@ SWAGGER_SETTINGS = {
     'USE_SESSION_AUTH': False,
 }
 
+# -------------------- Cache --------------------
+# Per-process caches, bounded by entries (least recently used culled first) and TTL
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'payroll': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'payroll-salary',
+        'TIMEOUT': int(os.environ.get('PAYROLL_SALARY_CACHE_SECONDS', '3600')),
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('PAYROLL_SALARY_CACHE_MAX_ENTRIES', '2000'))},
+    },
+}
+
 # -------------------- Logging --------------------
 LOGGING = {
     'version': 1,
@@ -6,9 +6,11 @@ from django.utils import timezone
 from datetime import timedelta
 from django.db.models import Sum, Q
 from employees.models import Employee
-from attendance.models import Attendance
+from attendance.services import AttendanceArchiveService
 from leaves.models import LeaveBalance, RestrictedHoliday
 from holidays.models import Holiday
+from holidays.services import WorkCalendar
+import calendar
 import logging
 
 logger = logging.getLogger(__name__)
@@ -68,11 +70,10 @@ class DashboardSummaryView(APIView):
             # 2. Monthly Attendance Summary
             month_start = today.replace(day=1)
             
-            # Present Days
-            monthly_attendances = Attendance.objects.filter(
-                employee=employee,
-                date__month=current_month,
-                date__year=current_year
+            # Present Days (routed to the archive table for archived years)
+            month_end = month_start.replace(day=calendar.monthrange(current_year, current_month)[1])
+            monthly_attendances = AttendanceArchiveService.queryset_for_range(month_start, month_end).filter(
+                employee=employee
             )
             
             present_days = monthly_attendances.filter(day_type='WORKING_DAY').count()
@@ -80,27 +81,16 @@ class DashboardSummaryView(APIView):
             effective_present = present_days + (half_days * 0.5)
             
             # Calculate business days passed
-            business_days_till_today = 0
-            holidays_in_month = Holiday.objects.filter(
-                date__month=current_month, 
-                date__year=current_year, 
-                is_active=True
-            ).values_list('date', flat=True)
-            
-            current_date_it = month_start
-            while current_date_it <= today:
-                if current_date_it.weekday() < 5 and current_date_it not in holidays_in_month:
-                    business_days_till_today += 1
-                current_date_it += timedelta(days=1)
+            business_days_till_today = WorkCalendar.working_days_between(month_start, today)
                 
             attendance_percentage = (effective_present / business_days_till_today * 100) if business_days_till_today > 0 else 0
             
             # 3. Leave Balance Summary
-            balances = LeaveBalance.objects.filter(employee=employee, year=current_year)
+            balances = list(LeaveBalance.objects.filter(employee=employee, year=current_year))
             total_remaining = sum([float(b.available) for b in balances])
             
             # Add RH available
-            casual_balance = balances.filter(leave_type='Casual Leave').first()
+            casual_balance = next((b for b in balances if b.leave_type == 'Casual Leave'), None)
             if casual_balance:
                 total_remaining += float(casual_balance.rh_available)
 
@@ -120,10 +110,14 @@ class DashboardSummaryView(APIView):
             total_worked_seconds = 0
             days_counted = 0
             
+            # One read for the week; it may cross into an archived year
+            week_attendance = {
+                att.date: att
+                for att in AttendanceArchiveService.records_for_range(seven_days_ago, today, employee=employee)
+            }
             current_date_it = seven_days_ago
             while current_date_it <= today:
-                # Use cached monthly_attendances if possible or fetch specifically
-                day_att = Attendance.objects.filter(employee=employee, date=current_date_it).first()
+                day_att = week_attendance.get(current_date_it)
                 worked_seconds = day_att.seconds_actual_worked_time if day_att else 0
                 worked_hours = round(worked_seconds / 3600.0, 1)
                 
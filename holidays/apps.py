@@ -5,3 +5,6 @@ class HolidaysConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'holidays'
     verbose_name = 'Holidays'
+
+    def ready(self):
+        import holidays.signals
@@ -0,0 +1,182 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Holiday
+
+
+class WorkCalendar:
+    """
+    Shared holiday/weekend calendar.
+
+    Active holidays are loaded once per year and kept in-process; Holiday
+    save/delete invalidates the affected year (see holidays.signals) and
+    entries also expire after HOLIDAY_CALENDAR_CACHE_SECONDS so other worker
+    processes pick up changes. Reads made inside a transaction are not
+    cached, as the rows they see may still be rolled back.
+    """
+
+    _cache = {}  # year -> (loaded_at, {date: name}, sorted weekday-holiday ordinals, sorted holiday ordinals)
+    _lock = threading.Lock()
+
+    # ---------- cache ----------
+
+    @classmethod
+    def _year(cls, year):
+        ttl = getattr(settings, 'HOLIDAY_CALENDAR_CACHE_SECONDS', 300)
+        entry = cls._cache.get(year)
+        if entry and time.monotonic() - entry[0] < ttl:
+            return entry
+
+        holidays = dict(Holiday.objects.filter(
+            date__year=year, is_active=True
+        ).order_by('date').values_list('date', 'name'))
+        ordinals = [d.toordinal() for d in holidays]  # already in date order
+        weekday_ordinals = [o for d, o in zip(holidays, ordinals) if d.weekday() < 5]
+        entry = (time.monotonic(), holidays, weekday_ordinals, ordinals)
+
+        if not connection.in_atomic_block:
+            with cls._lock:
+                cls._cache[year] = entry
+        return entry
+
+    @classmethod
+    def invalidate(cls, year=None):
+        """Drop one cached year, or everything"""
+        with cls._lock:
+            if year is None:
+                cls._cache.clear()
+            else:
+                cls._cache.pop(year, None)
+
+    # ---------- single days ----------
+
+    @staticmethod
+    def is_weekend(day):
+        return day.weekday() >= 5  # Saturday=5, Sunday=6
+
+    @classmethod
+    def holiday_name(cls, day):
+        """Name of the active holiday on `day`, or None"""
+        return cls._year(day.year)[1].get(day)
+
+    @classmethod
+    def is_holiday(cls, day):
+        return day in cls._year(day.year)[1]
+
+    @classmethod
+    def is_working_day(cls, day):
+        return not cls.is_weekend(day) and not cls.is_holiday(day)
+
+    # ---------- ranges ----------
+
+    @classmethod
+    def holidays_between(cls, start_date, end_date):
+        """{date: name} of active holidays in [start_date, end_date]"""
+        result = {}
+        for year in range(start_date.year, end_date.year + 1):
+            for day, name in cls._year(year)[1].items():
+                if start_date <= day <= end_date:
+                    result[day] = name
+        return result
+
+    @staticmethod
+    def weekdays_between(start_date, end_date):
+        """Mon-Fri days in [start_date, end_date], in closed form"""
+        if start_date > end_date:
+            return 0
+        days = (end_date - start_date).days + 1
+        full_weeks, remainder = divmod(days, 7)
+        first = start_date.weekday()
+        extra = sum(1 for i in range(remainder) if (first + i) % 7 < 5)
+        return full_weeks * 5 + extra
+
+    @classmethod
+    def working_days_between(cls, start_date, end_date):
+        """
+        Weekdays in [start_date, end_date] that are not active holidays.
+        Closed-form weekday count minus a bisect over each year's
+        weekday holidays.
+        """
+        if not start_date or not end_date or start_date > end_date:
+            return 0
+        return cls.weekdays_between(start_date, end_date) - cls._count_between(start_date, end_date, 2)
+
+    @classmethod
+    def _count_between(cls, start_date, end_date, index):
+        """Holidays in [start_date, end_date] from a sorted ordinal list of the cache entry"""
+        lo, hi = start_date.toordinal(), end_date.toordinal()
+        count = 0
+        for year in range(start_date.year, end_date.year + 1):
+            ordinals = cls._year(year)[index]
+            count += bisect_right(ordinals, hi) - bisect_left(ordinals, lo)
+        return count
+
+    @classmethod
+    def breakdown(cls, start_date, end_date):
+        """
+        {'working_days', 'weekends', 'holidays'} of [start_date, end_date]
+        without walking the days: weekends and holidays are each counted
+        in full (a holiday on a weekend is in both) and working days are
+        the weekdays that are not holidays.
+        """
+        if not start_date or not end_date or start_date > end_date:
+            return {'working_days': 0, 'weekends': 0, 'holidays': 0}
+        weekdays = cls.weekdays_between(start_date, end_date)
+        return {
+            'working_days': weekdays - cls._count_between(start_date, end_date, 2),
+            'weekends': (end_date - start_date).days + 1 - weekdays,
+            'holidays': cls._count_between(start_date, end_date, 3),
+        }
+
+    @classmethod
+    def days_between(cls, start_date, end_date):
+        """Yield (date, 'working' | 'weekend' | 'holiday') for each day in the range"""
+        holidays = cls.holidays_between(start_date, end_date)
+        current = start_date
+        while current <= end_date:
+            if current in holidays:
+                yield current, 'holiday'
+            elif cls.is_weekend(current):
+                yield current, 'weekend'
+            else:
+                yield current, 'working'
+            current += timedelta(days=1)
+
+    # ---------- employees ----------
+
+    @staticmethod
+    def leave_index(leaves, start_date=None, end_date=None):
+        """
+        {date: leave} for the given leaves (optionally clipped to a window).
+        Where leaves overlap the most recent application (highest id) wins,
+        as in attendance.services.get_leave_for_date.
+        """
+        index = {}
+        for leave in sorted(leaves, key=lambda l: l.id):
+            first = max(leave.from_date, start_date) if start_date else leave.from_date
+            last = min(leave.to_date, end_date) if end_date else leave.to_date
+            current = first
+            while current <= last:
+                index[current] = leave
+                current += timedelta(days=1)
+        return index
+
+    @classmethod
+    def day_type(cls, day, joining_date=None, leave=None, attendance=None, today=None):
+        """
+        Monthly-sheet day type for an employee on `day`
+        (BEFORE_JOINING, HOLIDAY, WEEKEND_OFF, LEAVE_DAY, WORKING_DAY,
+        FUTURE_DAY or ABSENT). `leave` is the leave covering the day, if any.
+        """
+        from attendance.services import AttendanceCalculationService
+
+        day_type, _ = AttendanceCalculationService.classify_month_day(
+            day, attendance, leave, bool(leave and leave.day_status),
+            cls.is_holiday(day), joining_date, today or date.today()
+        )
+        return day_type
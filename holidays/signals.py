@@ -0,0 +1,19 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Holiday
+from .services import WorkCalendar
+
+
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def invalidate_work_calendar(sender, instance, created=False, **kwargs):
+    """
+    Drop cached holidays for the affected year. An edit may have moved the
+    holiday out of another year, so updates clear the whole cache. Repeated
+    on commit so a concurrent read of the old rows doesn't stay cached.
+    """
+    year = instance.date.year if created or kwargs.get('signal') is post_delete else None
+    WorkCalendar.invalidate(year)
+    transaction.on_commit(lambda: WorkCalendar.invalidate(year))
@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 from django.utils import timezone
 from .models import Holiday
 
@@ -27,3 +27,58 @@ class HolidayModelTest(TestCase):
         self.assertEqual(str(self.holiday), expected)
 
 
+
+class WorkCalendarTest(TransactionTestCase):
+    """
+    WorkCalendar counts match a day-by-day walk and follow holiday edits.
+    Not a TestCase: reads inside its transaction bypass the cache.
+    """
+
+    def setUp(self):
+        from .services import WorkCalendar
+        WorkCalendar.invalidate()
+
+    def test_working_days_and_invalidation(self):
+        from datetime import date, timedelta
+        from .services import WorkCalendar
+
+        Holiday.objects.create(name="Weekday", date=date(2025, 12, 31), country="India")
+        Holiday.objects.create(name="Weekend", date=date(2026, 1, 3), country="India")
+        new_year = Holiday.objects.create(name="New Year", date=date(2026, 1, 1), country="India")
+
+        start, end = date(2025, 12, 20), date(2026, 1, 20)
+        expected = sum(
+            1 for i in range((end - start).days + 1)
+            if (start + timedelta(days=i)).weekday() < 5
+            and (start + timedelta(days=i)) not in (date(2025, 12, 31), date(2026, 1, 1))
+        )
+        self.assertEqual(WorkCalendar.working_days_between(start, end), expected)
+
+        # One query loads the year, the next read is served from the cache
+        WorkCalendar.invalidate(2026)
+        with self.assertNumQueries(1):
+            self.assertEqual(WorkCalendar.holiday_name(date(2026, 1, 1)), "New Year")
+        with self.assertNumQueries(0):
+            self.assertEqual(WorkCalendar.holiday_name(date(2026, 1, 1)), "New Year")
+
+        # Saving a Holiday drops its year, so the next read misses and reloads
+        new_year.is_active = False
+        new_year.save()
+        with self.assertNumQueries(1):
+            self.assertTrue(WorkCalendar.is_working_day(date(2026, 1, 1)))
+        self.assertEqual(WorkCalendar.working_days_between(start, end), expected + 1)
+
+    def test_breakdown_matches_day_walk(self):
+        from datetime import date, timedelta
+        from .services import WorkCalendar
+
+        for day in (date(2025, 12, 25), date(2026, 1, 3), date(2026, 8, 15), date(2027, 1, 26)):
+            Holiday.objects.create(name=str(day), date=day, country="India")
+
+        start, end = date(2025, 12, 1), date(2027, 2, 10)
+        kinds = [kind for _, kind in WorkCalendar.days_between(start, end)]
+        weekends = sum(1 for i in range((end - start).days + 1) if (start + timedelta(days=i)).weekday() >= 5)
+        self.assertEqual(
+            WorkCalendar.breakdown(start, end),
+            {'working_days': kinds.count('working'), 'weekends': weekends, 'holidays': kinds.count('holiday')},
+        )
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.9 on 2026-10-17 06:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0005_employee_address_line1_2_employee_address_line2_2_and_more'),
+        ('inventory', '0004_device_invoice_doc_device_photo_device_warranty_doc'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='device',
+            index=models.Index(fields=['created_at'], name='inventory_d_created_a46f7f_idx'),
+        ),
+    ]
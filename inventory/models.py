@@ -193,6 +193,7 @@ class Device(models.Model):
             models.Index(fields=['serial_number']),
             models.Index(fields=['is_active']),
             models.Index(fields=['status']),
+            models.Index(fields=['created_at']),
         ]
 
     def __str__(self):
@@ -124,6 +124,7 @@ class DeviceTypeViewSet(viewsets.ModelViewSet):
 
 from employees.permissions import IsAdminOrManagerOrOwner
 from employees.filters import HierarchyFilterBackend
+from config.pagination import OptInCursorPagination
 
 class DeviceViewSet(viewsets.ModelViewSet):
     """
@@ -137,6 +138,8 @@ class DeviceViewSet(viewsets.ModelViewSet):
     """
     queryset = Device.objects.all()
     permission_classes = [IsAuthenticated, IsAdminOrManagerOrOwner]
+    pagination_class = OptInCursorPagination
+    cursor_ordering = ('-created_at', '-id')
     filter_backends = [HierarchyFilterBackend, SearchFilter, OrderingFilter]
     if HAS_DJANGO_FILTER:
         filter_backends.insert(0, DjangoFilterBackend)
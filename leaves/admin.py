@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Leave, LeaveQuota, LeaveBalance, RestrictedHoliday
+from .models import Leave, LeaveQuota, LeaveBalance, LeaveLedgerEntry, RestrictedHoliday
+from .services import LeaveLedgerService
 
 @admin.register(Leave)
 class LeaveAdmin(admin.ModelAdmin):
@@ -61,6 +62,21 @@ class LeaveBalanceAdmin(admin.ModelAdmin):
     def get_rh_available(self, obj):
         return obj.rh_available
     get_rh_available.short_description = 'RH Available'
+
+    def get_readonly_fields(self, request, obj=None):
+        # The ledger is keyed on employee/type/year, so they are fixed once created
+        if obj:
+            return self.readonly_fields + ('employee', 'leave_type', 'year')
+        return self.readonly_fields
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            return super().save_model(request, obj, form, change)
+        # Post the edit as a ledger adjustment instead of overwriting concurrent updates
+        columns = list(LeaveLedgerService.BALANCE_COLUMNS.values()) + list(LeaveLedgerService.RH_BALANCE_COLUMNS.values())
+        values = {column: getattr(obj, column) for column in columns if column in form.changed_data}
+        if values:
+            LeaveLedgerService.adjust(obj, values, note=f'Admin adjustment by {request.user}')
     
     fieldsets = (
         ('Employee & Period', {
@@ -94,3 +110,19 @@ class RestrictedHolidayAdmin(admin.ModelAdmin):
             'fields': ('name', 'date', 'description', 'is_active')
         }),
     )
+
+
+@admin.register(LeaveLedgerEntry)
+class LeaveLedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ('employee', 'leave_type', 'year', 'entry_type', 'is_rh', 'allocated', 'pending', 'used', 'leave', 'created_at')
+    list_filter = ('entry_type', 'is_rh', 'year', 'leave_type')
+    search_fields = ('employee__first_name', 'employee__email', 'note')
+    raw_id_fields = ('employee', 'leave')
+    readonly_fields = ('created_at',)
+
+    # Append-only and written by LeaveLedgerService; corrections are balance edits
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,7 @@
+"""
+Constants for leaves app
+"""
+from django.conf import settings
+
+# Bulk leave approve/reject: most ids accepted per request
+LEAVE_BULK_DECISION_MAX_IDS = getattr(settings, 'LEAVE_BULK_DECISION_MAX_IDS', 500)
@@ -0,0 +1,65 @@
+"""
+Management command to generate leave balances from LeaveQuota in bulk.
+
+Year-start mode creates/refreshes every active employee's balances for a
+year: allocation, carry-forward from the previous year (capped at the
+quota's carry_forward_limit) and Restricted Holidays. Monthly mode accrues
+monthly_quota onto the year's balances. Both are idempotent, so a period
+can be re-run after fixing quotas.
+
+Usage:
+    # Year start, grant the full yearly_quota
+    python manage.py allocate_leave_balances --year 2027
+
+    # Year start for accrual-based quotas (carry forward and RH only)
+    python manage.py allocate_leave_balances --year 2027 --accrual
+
+    # Monthly accrual (schedule on the 1st)
+    python manage.py allocate_leave_balances --accrue-month 2027-03
+
+    # Preview for some employees
+    python manage.py allocate_leave_balances --year 2027 --employee 12 --dry-run
+"""
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from leaves.services import LeaveAllocationService
+
+
+class Command(BaseCommand):
+    help = 'Allocate yearly leave balances (with carry forward) or accrue a month'
+
+    def add_arguments(self, parser):
+        mode = parser.add_mutually_exclusive_group(required=True)
+        mode.add_argument('--year', type=int, help='Year to allocate at year start')
+        mode.add_argument('--accrue-month', type=str, help='Month to accrue (YYYY-MM)')
+        parser.add_argument('--accrual', action='store_true',
+                            help='With --year: skip yearly_quota (granted by monthly accrual instead)')
+        parser.add_argument('--employee', type=int, action='append', help='Employee ID (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Employees per transaction (default: 1000)')
+        parser.add_argument('--dry-run', action='store_true', help='Compute and report without writing')
+
+    def handle(self, *args, **options):
+        common = dict(
+            employee_ids=options['employee'],
+            dry_run=options['dry_run'],
+            batch_size=max(options['batch_size'], 1),
+        )
+        if options['year']:
+            label = str(options['year'])
+            result = LeaveAllocationService.allocate_year(options['year'], accrual=options['accrual'], **common)
+        else:
+            try:
+                month = datetime.strptime(options['accrue_month'], '%Y-%m')
+            except ValueError:
+                raise CommandError('--accrue-month must be in YYYY-MM format')
+            label = options['accrue_month']
+            result = LeaveAllocationService.accrue_month(month.year, month.month, **common)
+
+        verb = 'would be' if options['dry_run'] else 'were'
+        self.stdout.write(
+            f"{label}: {result['employees']} employees, balances {verb} created: {result['created']}, "
+            f"updated: {result['updated']}, unchanged: {result['unchanged']}"
+        )
+        self.stdout.write(self.style.SUCCESS('Done'))
@@ -0,0 +1,47 @@
+"""
+Management command to rebuild LeaveBalance columns from the leave ledger.
+
+Sums LeaveLedgerEntry deltas per employee/leave type/year and bulk-updates
+the balances that drifted (e.g. rows edited by hand in the database).
+Balances without ledger entries are reported and left untouched.
+
+Usage:
+    # Show what would change
+    python manage.py reconcile_leave_balances --dry-run
+
+    # One year, some employees
+    python manage.py reconcile_leave_balances --year 2026 --employee 12 --employee 15
+"""
+from django.core.management.base import BaseCommand
+
+from leaves.services import LeaveLedgerService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild leave balances from the leave ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help='Only balances of this year')
+        parser.add_argument('--employee', type=int, action='append', help='Employee ID (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=200, help='Employees per transaction (default: 200)')
+        parser.add_argument('--dry-run', action='store_true', help='Report differences without writing')
+        parser.add_argument('--max-diffs', type=int, default=50, help='Differences to print (default: 50)')
+
+    def handle(self, *args, **options):
+        result = LeaveLedgerService.reconcile(
+            employee_ids=options['employee'],
+            year=options['year'],
+            dry_run=options['dry_run'],
+            batch_size=max(options['batch_size'], 1),
+        )
+
+        for balance, diff in result['diffs'][:options['max_diffs']]:
+            changes = ', '.join(f'{column}: {stored} -> {ledger}' for column, (stored, ledger) in diff.items())
+            self.stdout.write(f'{balance.employee_id} {balance.leave_type} {balance.year}: {changes}')
+
+        verb = 'would be updated' if options['dry_run'] else 'updated'
+        self.stdout.write(
+            f"{result['checked']} balances checked, {result['updated']} {verb}, "
+            f"{result['untracked']} without ledger entries"
+        )
+        self.stdout.write(self.style.SUCCESS('Done'))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-17 06:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0005_employee_address_line1_2_employee_address_line2_2_and_more'),
+        ('leaves', '0004_leavebalance_rh_pending'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leave',
+            index=models.Index(fields=['created_at'], name='leaves_leav_created_aceedb_idx'),
+        ),
+    ]
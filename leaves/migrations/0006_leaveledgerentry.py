@@ -0,0 +1,62 @@
+# Generated by Django 5.2.9 on 2026-10-17 06:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def open_existing_balances(apps, schema_editor):
+    """Seed one opening ALLOCATE entry per existing balance (plus one for RH columns in use)"""
+    LeaveBalance = apps.get_model('leaves', 'LeaveBalance')
+    LeaveLedgerEntry = apps.get_model('leaves', 'LeaveLedgerEntry')
+    entries = []
+    for balance in LeaveBalance.objects.iterator(chunk_size=1000):
+        common = dict(
+            employee_id=balance.employee_id, leave_type=balance.leave_type, year=balance.year,
+            entry_type='ALLOCATE', note='Opening balance',
+        )
+        entries.append(LeaveLedgerEntry(
+            allocated=balance.total_allocated, carried_forward=balance.carried_forward,
+            pending=balance.pending, used=balance.used, **common
+        ))
+        if balance.rh_allocated or balance.rh_pending or balance.rh_used:
+            entries.append(LeaveLedgerEntry(
+                is_rh=True, allocated=balance.rh_allocated,
+                pending=balance.rh_pending, used=balance.rh_used, **common
+            ))
+    LeaveLedgerEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0005_employee_address_line1_2_employee_address_line2_2_and_more'),
+        ('leaves', '0005_created_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('leave_type', models.CharField(choices=[('Casual Leave', 'Casual Leave'), ('Sick Leave', 'Sick Leave'), ('Earned Leave', 'Earned Leave'), ('Unpaid Leave', 'Unpaid Leave'), ('Maternity Leave', 'Maternity Leave'), ('Paternity Leave', 'Paternity Leave'), ('Restricted Holiday', 'Restricted Holiday'), ('Other', 'Other')], help_text='Balance the entry applies to (RH entries are kept on Casual Leave)', max_length=50)),
+                ('year', models.IntegerField()),
+                ('entry_type', models.CharField(choices=[('ALLOCATE', 'Allocate'), ('PEND', 'Pend'), ('USE', 'Use'), ('RELEASE', 'Release')], max_length=10)),
+                ('is_rh', models.BooleanField(default=False, help_text='Applies to the rh_* columns')),
+                ('allocated', models.DecimalField(decimal_places=1, default=0, max_digits=5)),
+                ('carried_forward', models.DecimalField(decimal_places=1, default=0, max_digits=5)),
+                ('pending', models.DecimalField(decimal_places=1, default=0, max_digits=5)),
+                ('used', models.DecimalField(decimal_places=1, default=0, max_digits=5)),
+                ('from_status', models.CharField(blank=True, default='', help_text='Leave status this entry moved the leave out of (blank when it was applied)', max_length=20)),
+                ('note', models.CharField(blank=True, default='', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_ledger_entries', to='employees.employee')),
+                ('leave', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='leaves.leave')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['employee', 'leave_type', 'year'], name='leaves_leav_employe_fcdfa4_idx')],
+                'constraints': [models.UniqueConstraint(fields=('leave', 'from_status'), name='unique_leave_ledger_transition')],
+            },
+        ),
+        migrations.RunPython(open_existing_balances, migrations.RunPython.noop),
+    ]
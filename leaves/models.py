@@ -69,6 +69,16 @@ class Leave(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Stored status, so the balance signal can tell a transition without re-reading the row
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
 
     def __str__(self):
         return f"{self.employee} - {self.leave_type} ({self.from_date} to {self.to_date})"
@@ -131,7 +141,8 @@ class LeaveQuota(models.Model):
 class LeaveBalance(models.Model):
     """
     Tracks current leave balance for each employee.
-    Auto-calculated based on quotas, approved leaves, and carry forwards.
+    Kept by LeaveLedgerService from the LeaveLedgerEntry log (quotas,
+    applied/approved leaves and carry forwards).
     """
     # OLD CODE: employee = models.ForeignKey(settings.AUTH_USER_MODEL, ...)
     # NEW CODE (2025-12-22): Changed to Employee model
@@ -202,6 +213,70 @@ class LeaveBalance(models.Model):
         return f"{self.employee} - {self.leave_type} ({self.year}): {self.available}/{self.total_allocated}"
 
 
+class LeaveLedgerEntry(models.Model):
+    """
+    Append-only log of LeaveBalance movements. Every change to a balance's
+    allocation/pending/used columns is recorded here (as signed deltas) and
+    applied to the balance with F() expressions, so the balance row is a
+    cache of the ledger that reconcile_leave_balances can rebuild.
+    """
+    class EntryType(models.TextChoices):
+        ALLOCATE = 'ALLOCATE', _('Allocate')
+        PEND = 'PEND', _('Pend')
+        USE = 'USE', _('Use')
+        RELEASE = 'RELEASE', _('Release')
+
+    employee = models.ForeignKey(
+        'employees.Employee',
+        on_delete=models.CASCADE,
+        related_name='leave_ledger_entries'
+    )
+    leave_type = models.CharField(
+        max_length=50,
+        choices=Leave.LeaveType.choices,
+        help_text="Balance the entry applies to (RH entries are kept on Casual Leave)"
+    )
+    year = models.IntegerField()
+    entry_type = models.CharField(max_length=10, choices=EntryType.choices)
+    is_rh = models.BooleanField(default=False, help_text="Applies to the rh_* columns")
+
+    # Signed deltas applied to the balance
+    allocated = models.DecimalField(max_digits=5, decimal_places=1, default=0)
+    carried_forward = models.DecimalField(max_digits=5, decimal_places=1, default=0)
+    pending = models.DecimalField(max_digits=5, decimal_places=1, default=0)
+    used = models.DecimalField(max_digits=5, decimal_places=1, default=0)
+
+    leave = models.ForeignKey(
+        Leave,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='ledger_entries'
+    )
+    from_status = models.CharField(
+        max_length=20,
+        blank=True,
+        default='',
+        help_text="Leave status this entry moved the leave out of (blank when it was applied)"
+    )
+    note = models.CharField(max_length=255, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['employee', 'leave_type', 'year']),
+        ]
+        constraints = [
+            # A leave leaves each status once: a repeated or concurrent
+            # transition (e.g. Slack button and web UI) cannot apply twice
+            models.UniqueConstraint(fields=['leave', 'from_status'], name='unique_leave_ledger_transition'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee} - {self.leave_type} ({self.year}): {self.entry_type}"
+
+
 class RestrictedHoliday(models.Model):
     """
     Restricted Holidays (RH) that employees can choose to take.
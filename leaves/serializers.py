@@ -292,3 +292,42 @@ class LeaveCalculationSerializer(serializers.Serializer):
     """
     start_date = serializers.DateField()
     end_date = serializers.DateField()
+    include_days = serializers.BooleanField(default=True, required=False, help_text="Include the per-day `days` list (default true); pass false to get only the counts")
+
+
+class PendingLeaveSerializer(LeaveSerializer):
+    """Approval queue row: the leave plus who applied"""
+    employee = serializers.IntegerField(source='employee_id', read_only=True)
+    employee_code = serializers.CharField(source='employee.employee_id', read_only=True)
+    employee_name = serializers.CharField(source='employee.get_full_name', read_only=True)
+
+    class Meta(LeaveSerializer.Meta):
+        fields = LeaveSerializer.Meta.fields + ['employee', 'employee_code', 'employee_name']
+
+
+class BulkLeaveDecisionSerializer(serializers.Serializer):
+    """
+    Serializer for bulk approving/rejecting Pending leaves by id.
+    """
+    action = serializers.ChoiceField(choices=['approve', 'reject'])
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        help_text="Leave IDs"
+    )
+    rejection_reason = serializers.CharField(required=False, allow_blank=True, default='')
+
+    def validate(self, data):
+        """Cap the batch size, and require a reason when rejecting"""
+        from .constants import LEAVE_BULK_DECISION_MAX_IDS
+
+        if len(data['ids']) > LEAVE_BULK_DECISION_MAX_IDS:
+            raise serializers.ValidationError({
+                'ids': f'At most {LEAVE_BULK_DECISION_MAX_IDS} ids per request.'
+            })
+        data['rejection_reason'] = data.get('rejection_reason', '').strip()
+        if data['action'] == 'reject' and not data['rejection_reason']:
+            raise serializers.ValidationError({
+                'rejection_reason': 'Rejection reason is required when rejecting a leave.'
+            })
+        return data
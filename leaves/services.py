@@ -0,0 +1,573 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+
+class LeaveLedgerService:
+    """
+    Writes to LeaveBalance go through the append-only LeaveLedgerEntry log.
+
+    Each movement is recorded as one entry of signed deltas and applied to
+    the balance row with a single F() UPDATE in the same savepoint, so
+    concurrent approvals never read-modify-write the row. The ledger is the
+    source of truth; reconcile() rebuilds the balance columns from it.
+    """
+
+    # Ledger delta -> balance column, for regular and RH entries
+    BALANCE_COLUMNS = {
+        'allocated': 'total_allocated',
+        'carried_forward': 'carried_forward',
+        'pending': 'pending',
+        'used': 'used',
+    }
+    RH_BALANCE_COLUMNS = {
+        'allocated': 'rh_allocated',
+        'pending': 'rh_pending',
+        'used': 'rh_used',
+    }
+
+    # (old status, new status) -> entry type; other transitions leave the balance alone
+    STATUS_TRANSITIONS = {
+        ('Pending', 'Approved'): 'USE',
+        ('Pending', 'Rejected'): 'RELEASE',
+        ('Pending', 'Cancelled'): 'RELEASE',
+        ('Approved', 'Cancelled'): 'RELEASE',
+    }
+
+    @staticmethod
+    def balance_key(leave):
+        """(leave_type, year, is_rh) of the balance a leave draws from"""
+        is_rh = leave.leave_type == 'Restricted Holiday'
+        # RH balance is tracked on the Casual Leave record
+        return ('Casual Leave' if is_rh else leave.leave_type), leave.from_date.year, is_rh
+
+    @staticmethod
+    def leave_days(leave, is_rh):
+        # One RH application is one whole RH unit
+        return Decimal(int(leave.no_of_days)) if is_rh else Decimal(str(leave.no_of_days))
+
+    @staticmethod
+    def post(employee_id, leave_type, year, entry_type, is_rh=False, leave=None,
+             from_status='', note='', **deltas):
+        """
+        Append one entry and apply its deltas to the balance atomically.
+
+        Returns the entry, or None when there is no balance row for the
+        employee/type/year or the leave already made this transition.
+        """
+        from .models import LeaveBalance, LeaveLedgerEntry
+
+        columns = LeaveLedgerService.RH_BALANCE_COLUMNS if is_rh else LeaveLedgerService.BALANCE_COLUMNS
+        deltas = {key: Decimal(str(value)) for key, value in deltas.items() if value}
+        # rh_* columns are whole days
+        updates = {columns[key]: F(columns[key]) + (int(value) if is_rh else value) for key, value in deltas.items()}
+        updates['updated_at'] = timezone.now()
+
+        try:
+            with transaction.atomic():
+                # The UPDATE takes the balance row lock before the entry is inserted,
+                # so a duplicate transition waits and then fails on the unique constraint
+                if not LeaveBalance.objects.filter(
+                    employee_id=employee_id, leave_type=leave_type, year=year
+                ).update(**updates):
+                    return None
+                return LeaveLedgerEntry.objects.create(
+                    employee_id=employee_id, leave_type=leave_type, year=year,
+                    entry_type=entry_type, is_rh=is_rh, leave=leave,
+                    from_status=from_status, note=note, **deltas
+                )
+        except IntegrityError:
+            return None
+
+    @staticmethod
+    def record_leave_created(leave):
+        """A new application holds its days as pending"""
+        leave_type, year, is_rh = LeaveLedgerService.balance_key(leave)
+        LeaveLedgerService.post(
+            leave.employee_id, leave_type, year, 'PEND', is_rh=is_rh, leave=leave,
+            pending=LeaveLedgerService.leave_days(leave, is_rh)
+        )
+        if leave.status != 'Pending':
+            # Created already decided (e.g. by an admin)
+            LeaveLedgerService.record_status_change(leave, 'Pending')
+
+    @staticmethod
+    def status_change_deltas(leave, old_status):
+        """(entry_type, leave_type, year, is_rh, deltas) of a status change, or None"""
+        entry_type = LeaveLedgerService.STATUS_TRANSITIONS.get((old_status, leave.status))
+        if not entry_type:
+            return None
+        leave_type, year, is_rh = LeaveLedgerService.balance_key(leave)
+        days = LeaveLedgerService.leave_days(leave, is_rh)
+        if entry_type == 'USE':
+            deltas = {'pending': -days, 'used': days}
+        elif old_status == 'Approved':
+            deltas = {'used': -days}
+        else:
+            deltas = {'pending': -days}
+        return entry_type, leave_type, year, is_rh, deltas
+
+    @staticmethod
+    def record_status_change(leave, old_status):
+        """Move the leave's days between pending/used per STATUS_TRANSITIONS"""
+        change = LeaveLedgerService.status_change_deltas(leave, old_status)
+        if not change:
+            return None
+        entry_type, leave_type, year, is_rh, deltas = change
+        return LeaveLedgerService.post(
+            leave.employee_id, leave_type, year, entry_type, is_rh=is_rh, leave=leave,
+            from_status=old_status, **deltas
+        )
+
+    @staticmethod
+    def record_status_changes(leaves, old_status):
+        """
+        record_status_change() for many leaves leaving the same status (bulk
+        decisions). Deltas are summed per balance row and applied with one
+        UPDATE ... SET col = col + CASE id ... END, and the entries are
+        bulk-inserted. Falls back to one post() per leave if any of them
+        already made the transition.
+        """
+        from collections import defaultdict
+        from django.db.models import Case, Value, When
+        from .models import LeaveBalance, LeaveLedgerEntry
+
+        changes = [(leave, LeaveLedgerService.status_change_deltas(leave, old_status)) for leave in leaves]
+        changes = [(leave, change) for leave, change in changes if change]
+        if not changes:
+            return []
+
+        balance_ids = {
+            (emp_id, leave_type, year): pk
+            for pk, emp_id, leave_type, year in LeaveBalance.objects.filter(
+                employee_id__in={leave.employee_id for leave, _ in changes},
+                year__in={change[2] for _, change in changes},
+            ).values_list('id', 'employee_id', 'leave_type', 'year')
+        }
+        totals = defaultdict(Decimal)
+        entries = []
+        for leave, (entry_type, leave_type, year, is_rh, deltas) in changes:
+            balance_id = balance_ids.get((leave.employee_id, leave_type, year))
+            if balance_id is None:
+                continue
+            columns = LeaveLedgerService.RH_BALANCE_COLUMNS if is_rh else LeaveLedgerService.BALANCE_COLUMNS
+            for key, value in deltas.items():
+                totals[(balance_id, columns[key])] += value
+            entries.append(LeaveLedgerEntry(
+                employee_id=leave.employee_id, leave_type=leave_type, year=year,
+                entry_type=entry_type, is_rh=is_rh, leave=leave, from_status=old_status, **deltas
+            ))
+        if not entries:
+            return []
+
+        updates = {}
+        for column in {column for _, column in totals}:
+            field = LeaveBalance._meta.get_field(column)
+            # rh_* columns are whole days
+            cast = int if column.startswith('rh_') else (lambda value: value)
+            updates[column] = F(column) + Case(
+                *[When(pk=pk, then=Value(cast(value))) for (pk, col), value in totals.items() if col == column],
+                default=Value(cast(Decimal('0'))), output_field=field,
+            )
+        updates['updated_at'] = timezone.now()
+
+        try:
+            with transaction.atomic():
+                LeaveBalance.objects.filter(pk__in={pk for pk, _ in totals}).update(**updates)
+                return LeaveLedgerEntry.objects.bulk_create(entries)
+        except IntegrityError:
+            posted = [LeaveLedgerService.record_status_change(leave, old_status) for leave, _ in changes]
+            return [entry for entry in posted if entry]
+
+    @staticmethod
+    def status_from_ledger(leave):
+        """
+        Status the ledger last saw for a leave (for instances not loaded from
+        the DB); None when the leave has no entries or was already released.
+        """
+        from .models import LeaveLedgerEntry
+
+        last = LeaveLedgerEntry.objects.filter(leave=leave).order_by('-id').values_list('entry_type', flat=True).first()
+        return {'PEND': 'Pending', 'USE': 'Approved'}.get(last)
+
+    @staticmethod
+    def opening_entries(balance, note='Opening balance'):
+        """
+        Unsaved ALLOCATE entries carrying a balance row's current columns,
+        for rows written outside the ledger (creation, data loads).
+        """
+        from .models import LeaveLedgerEntry
+
+        entries = []
+        for is_rh, columns in ((False, LeaveLedgerService.BALANCE_COLUMNS),
+                               (True, LeaveLedgerService.RH_BALANCE_COLUMNS)):
+            deltas = {key: Decimal(str(getattr(balance, column))) for key, column in columns.items()}
+            if is_rh and not any(deltas.values()):
+                continue
+            entries.append(LeaveLedgerEntry(
+                employee_id=balance.employee_id, leave_type=balance.leave_type, year=balance.year,
+                entry_type='ALLOCATE', is_rh=is_rh, note=note, **deltas
+            ))
+        return entries
+
+    @staticmethod
+    def adjust(balance, values, note=''):
+        """
+        Bring a balance to the given column values (e.g. an admin edit) by
+        posting the difference, instead of overwriting the row.
+        """
+        from .models import LeaveBalance
+
+        current = LeaveBalance.objects.filter(pk=balance.pk).values(*values).first()
+        if current is None:
+            return []
+        entries = []
+        for is_rh, columns in ((False, LeaveLedgerService.BALANCE_COLUMNS),
+                               (True, LeaveLedgerService.RH_BALANCE_COLUMNS)):
+            deltas = {
+                key: Decimal(str(values[column])) - Decimal(str(current[column]))
+                for key, column in columns.items()
+                if column in values and values[column] != current[column]
+            }
+            if deltas:
+                entries.append(LeaveLedgerService.post(
+                    balance.employee_id, balance.leave_type, balance.year, 'ALLOCATE',
+                    is_rh=is_rh, note=note, **deltas
+                ))
+        return [entry for entry in entries if entry]
+
+    @staticmethod
+    def reconcile(employee_ids=None, year=None, dry_run=False, batch_size=200):
+        """
+        Rebuild balance columns from the ledger, a batch of employees at a time.
+
+        Each batch locks its balance rows, sums the ledger per
+        (employee, leave_type, year) in one grouped query and bulk_updates
+        the rows that drifted. Balances without any entry are left alone.
+        Returns counts plus the list of (balance, {column: (stored, ledger)}).
+        """
+        from .models import LeaveBalance, LeaveLedgerEntry
+
+        balances = LeaveBalance.objects.all()
+        if employee_ids:
+            balances = balances.filter(employee_id__in=employee_ids)
+        if year:
+            balances = balances.filter(year=year)
+        all_employee_ids = list(balances.values_list('employee_id', flat=True).distinct().order_by('employee_id'))
+
+        all_columns = list(LeaveLedgerService.BALANCE_COLUMNS.values()) + list(LeaveLedgerService.RH_BALANCE_COLUMNS.values())
+        result = {'checked': 0, 'updated': 0, 'untracked': 0, 'diffs': []}
+
+        for start in range(0, len(all_employee_ids), batch_size):
+            batch_ids = all_employee_ids[start:start + batch_size]
+            with transaction.atomic():
+                rows = list(balances.filter(employee_id__in=batch_ids).select_for_update())
+
+                entries = LeaveLedgerEntry.objects.filter(employee_id__in=batch_ids)
+                if year:
+                    entries = entries.filter(year=year)
+                totals = {}
+                for row in entries.order_by().values('employee_id', 'leave_type', 'year', 'is_rh').annotate(
+                    allocated_sum=Sum('allocated'), carried_forward_sum=Sum('carried_forward'),
+                    pending_sum=Sum('pending'), used_sum=Sum('used'),
+                ):
+                    columns = LeaveLedgerService.RH_BALANCE_COLUMNS if row['is_rh'] else LeaveLedgerService.BALANCE_COLUMNS
+                    expected = totals.setdefault((row['employee_id'], row['leave_type'], row['year']), {})
+                    for key, column in columns.items():
+                        expected[column] = row[f'{key}_sum'] or Decimal('0')
+
+                changed = []
+                now = timezone.now()
+                for balance in rows:
+                    result['checked'] += 1
+                    expected = totals.get((balance.employee_id, balance.leave_type, balance.year))
+                    if expected is None:
+                        result['untracked'] += 1
+                        continue
+                    diff = {}
+                    for column in all_columns:
+                        value = expected.get(column, Decimal('0'))
+                        if column.startswith('rh_'):
+                            value = int(value)
+                        if getattr(balance, column) != value:
+                            diff[column] = (getattr(balance, column), value)
+                            setattr(balance, column, value)
+                    if diff:
+                        balance.updated_at = now
+                        changed.append(balance)
+                        result['diffs'].append((balance, diff))
+
+                if changed and not dry_run:
+                    LeaveBalance.objects.bulk_update(changed, all_columns + ['updated_at'])
+                result['updated'] += len(changed)
+
+        return result
+
+
+class LeaveAllocationService:
+    """
+    Set-based year-start allocation and monthly accrual of leave balances.
+
+    Per batch of employees: quotas, prior-year and current balances are read
+    with a few queries, new balances are computed in memory and written with
+    bulk_create(update_conflicts=True); the difference to the stored values
+    is appended to the ledger as ALLOCATE entries, so re-running a period
+    is a no-op.
+    """
+
+    ALLOCATION_FIELDS = ['total_allocated', 'carried_forward', 'rh_allocated', 'updated_at']
+
+    @staticmethod
+    def quotas_in_effect(on_date, employee_ids):
+        """{(employee_id, leave_type): LeaveQuota} of the quota in effect on a date (latest start wins)"""
+        from django.db.models import Q
+        from .models import LeaveQuota
+
+        quotas = {}
+        for quota in LeaveQuota.objects.filter(
+            Q(effective_to__isnull=True) | Q(effective_to__gte=on_date),
+            employee_id__in=employee_ids,
+            effective_from__lte=on_date,
+        ).order_by('effective_from', 'id'):
+            quotas[(quota.employee_id, quota.leave_type)] = quota
+        return quotas
+
+    @staticmethod
+    def employee_batches(employee_ids=None, batch_size=1000):
+        from employees.models import Employee
+
+        employees = Employee.objects.filter(is_active=True)
+        if employee_ids:
+            employees = employees.filter(pk__in=employee_ids)
+        ids = list(employees.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(ids), batch_size):
+            yield ids[start:start + batch_size]
+
+    @staticmethod
+    def allocate_year(year, accrual=False, employee_ids=None, dry_run=False, batch_size=1000):
+        """
+        Create/refresh every employee's balances for a year from their quotas.
+
+        carried_forward is the previous year's unused balance (available,
+        floored at 0) capped at the quota's carry_forward_limit; Casual Leave
+        rows also get rh_allocated = rh_quota. total_allocated is
+        yearly_quota + carried_forward, or with accrual=True only the carry
+        forward plus whatever accrue_month() already added.
+        """
+        from datetime import date
+        from .models import LeaveBalance
+
+        result = {'employees': 0, 'created': 0, 'updated': 0, 'unchanged': 0}
+        for batch_ids in LeaveAllocationService.employee_batches(employee_ids, batch_size):
+            result['employees'] += len(batch_ids)
+            with transaction.atomic():
+                quotas = LeaveAllocationService.quotas_in_effect(date(year, 1, 1), batch_ids)
+                previous = {
+                    (b.employee_id, b.leave_type): b
+                    for b in LeaveBalance.objects.filter(employee_id__in=batch_ids, year=year - 1)
+                }
+                current = LeaveAllocationService._locked_balances(batch_ids, year)
+
+                targets = []
+                for (employee_id, leave_type), quota in quotas.items():
+                    prior = previous.get((employee_id, leave_type))
+                    carried = Decimal('0')
+                    if prior is not None and quota.carry_forward_limit > 0:
+                        carried = min(max(prior.available, Decimal('0')), quota.carry_forward_limit)
+
+                    existing = current.get((employee_id, leave_type))
+                    if not accrual:
+                        granted = quota.yearly_quota
+                    elif existing is not None:
+                        granted = existing.total_allocated - existing.carried_forward
+                    else:
+                        granted = Decimal('0')
+                    rh_allocated = quota.rh_quota if leave_type == 'Casual Leave' else 0
+                    targets.append(LeaveBalance(
+                        employee_id=employee_id, leave_type=leave_type, year=year,
+                        total_allocated=granted + carried, carried_forward=carried,
+                        rh_allocated=rh_allocated,
+                    ))
+
+                LeaveAllocationService._write(targets, current, 'Year allocation', dry_run, result)
+        return result
+
+    @staticmethod
+    def accrue_month(year, month, employee_ids=None, dry_run=False, batch_size=1000):
+        """
+        Add monthly_quota to total_allocated for quotas in effect on the first
+        of the month, capped at yearly_quota (when set) excluding carry
+        forward. Months already accrued for a balance are skipped.
+        """
+        from datetime import date
+        from .models import LeaveBalance, LeaveLedgerEntry
+
+        note = f'Monthly accrual {year}-{month:02d}'
+        result = {'employees': 0, 'created': 0, 'updated': 0, 'unchanged': 0}
+        for batch_ids in LeaveAllocationService.employee_batches(employee_ids, batch_size):
+            result['employees'] += len(batch_ids)
+            with transaction.atomic():
+                quotas = LeaveAllocationService.quotas_in_effect(date(year, month, 1), batch_ids)
+                current = LeaveAllocationService._locked_balances(batch_ids, year)
+                accrued = set(LeaveLedgerEntry.objects.filter(
+                    employee_id__in=batch_ids, year=year, entry_type='ALLOCATE', note=note
+                ).values_list('employee_id', 'leave_type'))
+
+                targets = []
+                for key, quota in quotas.items():
+                    if quota.monthly_quota <= 0 or key in accrued:
+                        continue
+                    existing = current.get(key)
+                    total = existing.total_allocated if existing else Decimal('0')
+                    carried = existing.carried_forward if existing else Decimal('0')
+                    amount = quota.monthly_quota
+                    if quota.yearly_quota > 0:
+                        amount = min(amount, quota.yearly_quota - (total - carried))
+                    if amount <= 0:
+                        continue
+                    targets.append(LeaveBalance(
+                        employee_id=key[0], leave_type=key[1], year=year,
+                        total_allocated=total + amount, carried_forward=carried,
+                        rh_allocated=existing.rh_allocated if existing else 0,
+                    ))
+
+                LeaveAllocationService._write(targets, current, note, dry_run, result)
+        return result
+
+    @staticmethod
+    def _locked_balances(employee_ids, year):
+        from .models import LeaveBalance
+
+        return {
+            (b.employee_id, b.leave_type): b
+            for b in LeaveBalance.objects.filter(employee_id__in=employee_ids, year=year).select_for_update()
+        }
+
+    @staticmethod
+    def _write(targets, current, note, dry_run, result):
+        """Upsert changed balances and append their allocation deltas to the ledger"""
+        from django.db import connection
+        from .models import LeaveBalance, LeaveLedgerEntry
+
+        changed, entries = [], []
+        for target in targets:
+            existing = current.get((target.employee_id, target.leave_type))
+            before = {
+                'allocated': existing.total_allocated if existing else Decimal('0'),
+                'carried_forward': existing.carried_forward if existing else Decimal('0'),
+                'rh_allocated': existing.rh_allocated if existing else 0,
+            }
+            deltas = {
+                'allocated': target.total_allocated - before['allocated'],
+                'carried_forward': target.carried_forward - before['carried_forward'],
+            }
+            rh_delta = target.rh_allocated - before['rh_allocated']
+            if not any(deltas.values()) and not rh_delta:
+                result['unchanged'] += 1
+                continue
+            result['updated' if existing else 'created'] += 1
+            changed.append(target)
+            common = dict(
+                employee_id=target.employee_id, leave_type=target.leave_type, year=target.year,
+                entry_type='ALLOCATE', note=note,
+            )
+            if any(deltas.values()) or not existing:
+                entries.append(LeaveLedgerEntry(**common, **deltas))
+            if rh_delta:
+                entries.append(LeaveLedgerEntry(**common, is_rh=True, allocated=rh_delta))
+
+        if dry_run or not changed:
+            return
+        kwargs = {'update_conflicts': True, 'update_fields': LeaveAllocationService.ALLOCATION_FIELDS}
+        if connection.features.supports_update_conflicts_with_target:
+            kwargs['unique_fields'] = ['employee', 'leave_type', 'year']
+        # used/pending are not in update_fields, so they stay as the ledger left them
+        LeaveBalance.objects.bulk_create(changed, batch_size=1000, **kwargs)
+        LeaveLedgerEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class LeaveApprovalService:
+    """
+    Bulk approve/reject of Pending leaves: the target rows are resolved (and
+    hierarchy-scoped) by the caller, changed with a single UPDATE, the
+    balances moved in one batched ledger write, attendance synced once for
+    all of them and each employee gets one digest message.
+    """
+
+    @staticmethod
+    def decide(queryset, action, user=None, rejection_reason='', notify=True):
+        """
+        Approve or reject the Pending leaves of `queryset`, which the caller
+        has already narrowed to what `user` may decide on.
+        Returns the decided leaves.
+
+        update() skips the Leave post_save handlers, so their work (ledger,
+        attendance, month summaries, day bitmaps, Slack) is done here in bulk.
+        """
+        from collections import defaultdict
+        from attendance.services import (
+            DayStatusBitmapService, LeaveAttendanceSyncService, MonthSummaryService,
+        )
+        from employees.models import Employee
+        from .models import Leave
+
+        new_status = Leave.Status.APPROVED if action == 'approve' else Leave.Status.REJECTED
+        now = timezone.now()
+
+        with transaction.atomic():
+            leaves = list(
+                queryset.filter(status=Leave.Status.PENDING)
+                .select_for_update(of=('self',))
+                .order_by('id')
+            )
+            if not leaves:
+                return []
+            changes = {'status': new_status, 'updated_at': now}
+            if new_status == Leave.Status.REJECTED:
+                changes['rejection_reason'] = rejection_reason
+            Leave.objects.filter(id__in=[leave.id for leave in leaves]).update(**changes)
+            for leave in leaves:
+                for field, value in changes.items():
+                    setattr(leave, field, value)
+                leave._loaded_status = new_status
+
+            LeaveLedgerService.record_status_changes(leaves, Leave.Status.PENDING)
+            if new_status == Leave.Status.APPROVED:
+                LeaveAttendanceSyncService.apply_many(leaves)
+            else:
+                # Pending leaves have no linked days unless they were approved before
+                LeaveAttendanceSyncService.revert_many(leaves)
+
+            spans = LeaveAttendanceSyncService.employee_spans(leaves)
+            employees = Employee.objects.in_bulk(list(spans))
+            for emp_id, (from_date, to_date) in spans.items():
+                MonthSummaryService.refresh_range(employees[emp_id], from_date, to_date)
+            DayStatusBitmapService.refresh_range(
+                list(spans), min(f for f, _ in spans.values()), max(t for _, t in spans.values())
+            )
+
+            if notify:
+                leaves_by_employee = defaultdict(list)
+                for leave in leaves:
+                    leaves_by_employee[leave.employee_id].append(leave)
+                transaction.on_commit(lambda: LeaveApprovalService.notify_digest(
+                    leaves_by_employee, new_status
+                ))
+        return leaves
+
+    @staticmethod
+    def notify_digest(leaves_by_employee, status_display):
+        """One DM per employee listing the decided leaves"""
+        import logging
+        from employees.models import Employee
+        from notifications.slack_utils import SlackNotificationService
+
+        for employee in Employee.objects.filter(id__in=leaves_by_employee).select_related('company'):
+            try:
+                SlackNotificationService.notify_leave_decisions(
+                    employee, leaves_by_employee[employee.id], status_display
+                )
+            except Exception as e:
+                logging.getLogger(__name__).error(f"Error sending leave decision digest: {e}")
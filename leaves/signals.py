@@ -1,107 +1,33 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save
 from django.dispatch import receiver
-from decimal import Decimal
-from .models import Leave, LeaveBalance
+from .models import Leave, LeaveBalance, LeaveLedgerEntry
+from .services import LeaveLedgerService
 
 
 @receiver(post_save, sender=Leave)
-def update_balance_on_leave_create(sender, instance, created, **kwargs):
+def update_balance_on_leave_change(sender, instance, created, update_fields=None, **kwargs):
     """
-    Automatically update leave balance when a new leave is created.
-    Deducts from 'pending' balance immediately (optimistic approach).
+    Keep the leave balance in line with the leave's status through the ledger.
+
+    New leaves hold their days as pending (optimistic approach); status
+    transitions (Pending -> Approved/Rejected/Cancelled, Approved -> Cancelled)
+    move them with an atomic F() update. The old status comes from the row
+    as it was loaded, so no extra read of the leave or the balance is needed.
     """
     if created:
-        try:
-            # RH balance is tracked on the Casual Leave record
-            target_type = instance.leave_type
-            if target_type == 'Restricted Holiday':
-                target_type = 'Casual Leave'
-
-            balance = LeaveBalance.objects.get(
-                employee=instance.employee,
-                leave_type=target_type,
-                year=instance.from_date.year
-            )
-            
-            if instance.leave_type == 'Restricted Holiday':
-                 # Only update RH specific pending
-                 balance.rh_pending += int(instance.no_of_days)
-            else:
-                balance.pending += Decimal(str(instance.no_of_days))
-                
-            balance.save()
-            
-        except LeaveBalance.DoesNotExist:
-            pass
-
+        LeaveLedgerService.record_leave_created(instance)
+    elif update_fields is None or 'status' in update_fields:
+        previous = getattr(instance, '_loaded_status', None)
+        if previous is None:
+            # Instance not loaded from the DB, so ask the ledger
+            previous = LeaveLedgerService.status_from_ledger(instance)
+        if previous and previous != instance.status:
+            LeaveLedgerService.record_status_change(instance, previous)
+    instance._loaded_status = instance.status
 
-@receiver(pre_save, sender=Leave)
-def update_balance_on_status_change(sender, instance, **kwargs):
-    """
-    Automatically update leave balance when leave status changes.
-    Handles: Pending → Approved, Pending → Rejected, Approved → Cancelled
-    """
-    if not instance.pk:
-        # New leave, handled by post_save
-        return
-    
-    try:
-        # Get the old leave object to compare status
-        old_leave = Leave.objects.get(pk=instance.pk)
-        old_status = old_leave.status
-        new_status = instance.status
-        
-        # Only update if status actually changed
-        if old_status == new_status:
-            return
-        
-        # Get the balance
-        target_type = instance.leave_type
-        if target_type == 'Restricted Holiday':
-            target_type = 'Casual Leave'
 
-        balance = LeaveBalance.objects.get(
-            employee=instance.employee,
-            leave_type=target_type,
-            year=instance.from_date.year
-        )
-        
-        # Handle status transitions
-        if old_status == 'Pending' and new_status == 'Approved':
-            # Move from pending to used
-            if instance.leave_type == 'Restricted Holiday':
-                 balance.rh_pending -= int(instance.no_of_days)
-                 balance.rh_used += int(instance.no_of_days)
-            else:
-                 balance.pending -= Decimal(str(instance.no_of_days))
-                 balance.used += Decimal(str(instance.no_of_days))
-        
-        elif old_status == 'Pending' and new_status == 'Rejected':
-            # Restore balance (remove from pending)
-            if instance.leave_type == 'Restricted Holiday':
-                 balance.rh_pending -= int(instance.no_of_days)
-            else:
-                 balance.pending -= Decimal(str(instance.no_of_days))
-        
-        elif old_status == 'Approved' and new_status == 'Cancelled':
-            # Restore balance (remove from used)
-            if instance.leave_type == 'Restricted Holiday':
-                 balance.rh_used -= int(instance.no_of_days)
-            else:
-                 balance.used -= Decimal(str(instance.no_of_days))
-        
-        elif old_status == 'Pending' and new_status == 'Cancelled':
-            # Restore balance (remove from pending)
-            if instance.leave_type == 'Restricted Holiday':
-                 balance.rh_pending -= int(instance.no_of_days)
-            else:
-                 balance.pending -= Decimal(str(instance.no_of_days))
-        
-        balance.save()
-        
-    except Leave.DoesNotExist:
-        # Shouldn't happen, but handle gracefully
-        pass
-    except LeaveBalance.DoesNotExist:
-        # Balance doesn't exist, can't update
-        pass
+@receiver(post_save, sender=LeaveBalance)
+def open_balance_ledger(sender, instance, created, raw=False, **kwargs):
+    """Balances created directly (HR, admin, data loads) start the ledger with their values"""
+    if created and not raw:
+        LeaveLedgerEntry.objects.bulk_create(LeaveLedgerService.opening_entries(instance))
@@ -1,3 +1,107 @@
+from datetime import date
+from decimal import Decimal
+
 from django.test import TestCase
 
-# Create your tests here.
+from departments.models import Department, Designation
+from employees.models import Employee
+from .models import Leave, LeaveBalance, LeaveLedgerEntry, LeaveQuota
+from .services import LeaveAllocationService, LeaveApprovalService, LeaveLedgerService
+
+
+class LeaveLedgerTest(TestCase):
+    """Balance columns follow the ledger and can be rebuilt from it"""
+
+    def setUp(self):
+        department = Department.objects.create(name="Engineering")
+        designation = Designation.objects.create(name="Engineer", department=department)
+        self.employee = Employee.objects.create(
+            employee_id="EMP-T-0101",
+            first_name="Ledger",
+            last_name="Employee",
+            email="ledger@test.com",
+            phone="+919999999998",
+            department=department,
+            designation=designation,
+            joining_date=date(2025, 1, 6),
+        )
+        self.balance = LeaveBalance.objects.create(
+            employee=self.employee, leave_type='Casual Leave', year=2026,
+            total_allocated=Decimal('12'), rh_allocated=2,
+        )
+
+    def test_transitions_apply_once_and_reconcile(self):
+        leave = Leave.objects.create(
+            employee=self.employee, leave_type='Casual Leave', reason="Trip",
+            from_date=date(2026, 2, 2), to_date=date(2026, 2, 3), no_of_days=Decimal('2'),
+        )
+        self.balance.refresh_from_db()
+        self.assertEqual((self.balance.pending, self.balance.used), (Decimal('2'), Decimal('0')))
+
+        # Two stale copies approving at once (Slack button + web UI) count once
+        first, second = Leave.objects.get(pk=leave.pk), Leave.objects.get(pk=leave.pk)
+        for copy in (first, second):
+            copy.status = Leave.Status.APPROVED
+            copy.save(update_fields=['status'])
+        self.balance.refresh_from_db()
+        self.assertEqual((self.balance.pending, self.balance.used), (Decimal('0'), Decimal('2')))
+
+        first.status = Leave.Status.CANCELLED
+        first.save()
+        self.balance.refresh_from_db()
+        self.assertEqual(self.balance.available, Decimal('12'))
+        self.assertEqual(
+            list(LeaveLedgerEntry.objects.filter(leave=leave).values_list('entry_type', flat=True)),
+            ['PEND', 'USE', 'RELEASE'],
+        )
+
+        # A hand edit outside the ledger is undone by the rebuild
+        LeaveBalance.objects.filter(pk=self.balance.pk).update(used=Decimal('5'), rh_used=1)
+        result = LeaveLedgerService.reconcile(employee_ids=[self.employee.pk])
+        self.assertEqual((result['checked'], result['updated']), (1, 1))
+        self.balance.refresh_from_db()
+        self.assertEqual((self.balance.used, self.balance.rh_used, self.balance.total_allocated), (Decimal('0'), 0, Decimal('12')))
+
+    def test_year_allocation_and_accrual(self):
+        """Carry forward is capped, RH granted, and re-runs change nothing"""
+        LeaveQuota.objects.create(
+            employee=self.employee, leave_type='Casual Leave', yearly_quota=Decimal('12'),
+            monthly_quota=Decimal('1'), rh_quota=2, carry_forward_limit=Decimal('5'),
+            effective_from=date(2026, 1, 1),
+        )
+        result = LeaveAllocationService.allocate_year(2027, accrual=True)
+        self.assertEqual(result['created'], 1)
+        for _ in range(2):
+            LeaveAllocationService.accrue_month(2027, 1)
+        self.assertEqual(LeaveAllocationService.allocate_year(2027, accrual=True)['unchanged'], 1)
+
+        balance = LeaveBalance.objects.get(employee=self.employee, leave_type='Casual Leave', year=2027)
+        self.assertEqual(
+            (balance.carried_forward, balance.total_allocated, balance.rh_allocated),
+            (Decimal('5'), Decimal('6'), 2),
+        )
+        self.assertEqual(LeaveLedgerService.reconcile(year=2027)['updated'], 0)
+
+    def test_bulk_decision_batches_ledger_and_attendance(self):
+        """Bulk approval moves each leave once and links its days; decided leaves are skipped"""
+        from attendance.models import Attendance
+
+        first, second = [
+            Leave.objects.create(
+                employee=self.employee, leave_type='Casual Leave', reason="Trip",
+                from_date=start, to_date=end, no_of_days=Decimal((end - start).days + 1),
+            )
+            for start, end in ((date(2026, 3, 2), date(2026, 3, 3)), (date(2026, 3, 4), date(2026, 3, 4)))
+        ]
+        decided = LeaveApprovalService.decide(Leave.objects.all(), 'approve', notify=False)
+        self.assertEqual([leave.id for leave in decided], [first.id, second.id])
+        self.assertEqual(LeaveApprovalService.decide(Leave.objects.all(), 'reject', rejection_reason='No'), [])
+
+        self.balance.refresh_from_db()
+        self.assertEqual((self.balance.pending, self.balance.used), (Decimal('0'), Decimal('3')))
+        self.assertEqual(LeaveLedgerEntry.objects.filter(entry_type='USE').count(), 2)
+        self.assertEqual(
+            dict(Attendance.objects.filter(employee=self.employee).values_list('date', 'leave_id')),
+            {date(2026, 3, 2): first.id, date(2026, 3, 3): first.id, date(2026, 3, 4): second.id},
+        )
+        self.assertEqual(LeaveLedgerService.reconcile(employee_ids=[self.employee.pk])['updated'], 0)
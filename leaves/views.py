@@ -8,12 +8,13 @@ from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from django.utils.dateparse import parse_date
 from django.utils import timezone
-from datetime import timedelta, date
+from datetime import date
 from .models import Leave, LeaveBalance, LeaveQuota, RestrictedHoliday
-from holidays.models import Holiday
+from holidays.services import WorkCalendar
 from .serializers import (
     LeaveSerializer, LeaveCalculationSerializer, LeaveBalanceSerializer,
-    LeaveQuotaSerializer, RestrictedHolidaySerializer
+    LeaveQuotaSerializer, RestrictedHolidaySerializer, PendingLeaveSerializer,
+    BulkLeaveDecisionSerializer
 )
 from django.db.models import Q, Sum
 import logging
@@ -22,11 +23,14 @@ logger = logging.getLogger(__name__)
 
 from employees.permissions import IsAdminOrManagerOrOwner
 from employees.filters import HierarchyFilterBackend
+from config.pagination import OptInCursorPagination
 
 class LeaveViewSet(viewsets.ModelViewSet):
     queryset = Leave.objects.all()
     serializer_class = LeaveSerializer
     permission_classes = [IsAuthenticated, IsAdminOrManagerOrOwner]
+    pagination_class = OptInCursorPagination
+    cursor_ordering = ('-created_at', '-id')
     filter_backends = [HierarchyFilterBackend]
 
     def get_queryset(self):
@@ -77,7 +81,10 @@ class LeaveViewSet(viewsets.ModelViewSet):
         serializer.save(employee=target_employee)
 
     @swagger_auto_schema(
-        operation_description="Calculate working days, weekends, and holidays between two dates.",
+        operation_description=(
+            "Calculate working days, weekends, and holidays between two dates. "
+            "The per-day `days` list is included unless `include_days` is false."
+        ),
         request_body=LeaveCalculationSerializer,
         responses={200: openapi.Response("Success", openapi.Schema(
             type=openapi.TYPE_OBJECT,
@@ -91,7 +98,7 @@ class LeaveViewSet(viewsets.ModelViewSet):
     def calculate_days(self, request):
         """
         API to calculate working days, weekends, and holidays between two dates.
-        Expected Payload: {"start_date": "YYYY-MM-DD", "end_date": "YYYY-MM-DD"}
+        Expected Payload: {"start_date": "YYYY-MM-DD", "end_date": "YYYY-MM-DD", "include_days": true}
         User Prototype Payload used 'action': 'get_days_between_leaves', but we use a REST path.
         """
         
@@ -108,69 +115,31 @@ class LeaveViewSet(viewsets.ModelViewSet):
         if not start_date or not end_date:
             return Response({"error": 1, "message": "Invalid date format"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Logic to calculate days
-        current_date = start_date
-        working_days = 0
-        holidays_count = 0
-        weekends = 0
-        days_details = []
-
-        # Fetch holidays in range
-        holidays_in_range = Holiday.objects.filter(
-            date__range=[start_date, end_date], 
-            is_active=True
-        ).values_list('date', flat=True)
-
-        while current_date <= end_date:
-            day_type = "working"
-            sub_type = ""
-            
-            # Check for Weekend (Sat=5, Sun=6)
-            if current_date.weekday() in [5, 6]:
-                weekends += 1
-                day_type = "weekend"
-                sub_type = "Saturday" if current_date.weekday() == 5 else "Sunday"
-            
-            # Check for Holiday (overrides weekend if we want strict accounting, or counts as both? 
-            # Usually strict accounting means 1 day is either Holiday OR Weekend OR Working. 
-            # Let's assume Holiday takes precedence or is counted separately. 
-            # The user output shows 'holidays': 0, 'weekends': 0. 
-            # Let's count them mutually exclusively for the total 'working_days' calculation.)
-
-            is_holiday = current_date in holidays_in_range
-            
-            if is_holiday:
-                holidays_count += 1
-                day_type = "holiday"
-                # If it was also a weekend, we might not want to double count the 'non-working' aspect, 
-                # but valid metrics usually count "Weekends" and "Holidays" separately. 
-                # However, for 'working_days', both reduce the count.
-                if current_date.weekday() in [5, 6]:
-                     # It's a weekend AND a holiday. 
-                     # Should we decrement weekend count? Depends on business logic.
-                     # Let's keep specific counters correct: It IS a weekend, and it IS a holiday.
-                     pass
-
-            if day_type == "working":
-                working_days += 1
-
-            days_details.append({
-                "type": day_type,
-                "sub_type": sub_type,
-                "sub_sub_type": "", # Placeholder as per prototype
-                "full_date": current_date.strftime("%Y-%m-%d")
-            })
+        # Counts in closed form (weekday arithmetic + bisect over the cached holidays),
+        # so long ranges cost O(#holidays); weekends and holidays are each counted
+        # in full and a holiday on a weekend is in both
+        counts = WorkCalendar.breakdown(start_date, end_date)
 
-            current_date += timedelta(days=1)
+        # Per-day list unless the client opts out with include_days=false
+        days_details = []
+        include_days = str(request.data.get('include_days', True)).lower() not in ('false', '0')
+        if include_days:
+            for current_date, day_type in WorkCalendar.days_between(start_date, end_date):
+                days_details.append({
+                    "type": day_type,
+                    "sub_type": current_date.strftime("%A") if WorkCalendar.is_weekend(current_date) else "",
+                    "sub_sub_type": "", # Placeholder as per prototype
+                    "full_date": current_date.strftime("%Y-%m-%d")
+                })
 
         response_data = {
             "error": 0,
             "data": {
                 "start_date": start_date_str,
                 "end_date": end_date_str,
-                "working_days": working_days,
-                "holidays": holidays_count,
-                "weekends": weekends,
+                "working_days": counts['working_days'],
+                "holidays": counts['holidays'],
+                "weekends": counts['weekends'],
                 "days": days_details,
                 "message": ""
             }
@@ -349,12 +318,13 @@ class LeaveViewSet(viewsets.ModelViewSet):
         employee = user.employee_profile
         current_year = timezone.now().year
         
-        balances = LeaveBalance.objects.filter(
+        # Plain read: balances are only written by atomic ledger updates
+        balances = list(LeaveBalance.objects.filter(
             employee=employee,
             year=current_year
-        )
+        ))
         
-        if not balances.exists():
+        if not balances:
             return Response({
                 "error": 1,
                 "message": "No leave balance configured. Please contact HR."
@@ -378,7 +348,7 @@ class LeaveViewSet(viewsets.ModelViewSet):
                  }
         
         # Add RH balance (assuming one RH balance per employee)
-        rh_balance = balances.filter(leave_type='Casual Leave').first()
+        rh_balance = next((b for b in balances if b.leave_type == 'Casual Leave'), None)
         if rh_balance:
             balance_data['rh'] = {
                 "allocated": rh_balance.rh_allocated,
@@ -397,18 +367,111 @@ class LeaveViewSet(viewsets.ModelViewSet):
             "data": balance_data
         })
 
+    def approval_scope(self, request):
+        """
+        Leaves the user may approve/reject: all for admins, their direct
+        reports' for managers; None for everyone else.
+        """
+        user = request.user
+        queryset = Leave.objects.all()
+        if user.is_superuser or user.is_staff:
+            return queryset
+        emp = getattr(user, 'employee_profile', None)
+        if not (emp and emp.role and emp.role.can_view_subordinates):
+            return None
+        return queryset.filter(employee__reporting_manager_id=emp.id)
+
+    @swagger_auto_schema(
+        operation_description="Pending leaves awaiting a decision: all for admins, direct reports' for managers (paginated).",
+        manual_parameters=[
+            openapi.Parameter('employee', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="Employee ID"),
+            openapi.Parameter('leave_type', openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Leave type"),
+        ],
+        responses={200: PendingLeaveSerializer(many=True)}
+    )
     @action(detail=False, methods=['get'], url_path='pending-leaves')
     def pending_leaves(self, request):
         """
-        Get all pending leaves (SuperAdmin only).
+        Approvals queue, oldest first
+        GET /api/leaves/pending-leaves/?employee=12&leave_type=Casual%20Leave
+        Admins see every pending leave, managers their direct reports'.
         """
-        if not (request.user.is_superuser or request.user.is_staff):
-             return Response({"error": 1, "message": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
-        
-        leaves = Leave.objects.filter(status='Pending').order_by('created_at')
-        serializer = self.get_serializer(leaves, many=True)
-        
+        queryset = self.approval_scope(request)
+        if queryset is None:
+            return Response({"error": 1, "message": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+
+        queryset = queryset.filter(status='Pending')
+        if request.query_params.get('employee'):
+            queryset = queryset.filter(employee_id=request.query_params['employee'])
+        if request.query_params.get('leave_type'):
+            queryset = queryset.filter(leave_type=request.query_params['leave_type'])
+
+        queryset = queryset.select_related('employee', 'restricted_holiday').order_by('created_at', 'id')
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = PendingLeaveSerializer(page, many=True, context=self.get_serializer_context())
+            return self.get_paginated_response({
+                "error": 0,
+                "data": serializer.data
+            })
+
+        serializer = PendingLeaveSerializer(queryset, many=True, context=self.get_serializer_context())
         return Response({
             "error": 0,
             "data": serializer.data
         })
+
+    @swagger_auto_schema(
+        operation_description="Approve or reject many Pending leaves at once (Admin/Manager).",
+        request_body=BulkLeaveDecisionSerializer,
+        responses={200: "Success Response"}
+    )
+    @action(detail=False, methods=['post'], url_path='bulk-decision')
+    def bulk_decision(self, request):
+        """
+        Bulk approval/rejection endpoint
+        POST /api/leaves/bulk-decision/
+        Body: {
+            "action": "approve",          // or "reject" (rejection_reason required)
+            "ids": [101, 102],
+            "rejection_reason": "Optional reason"
+        }
+        Admins can decide any leave, managers only their direct reports'.
+        Ids outside that scope or no longer Pending are returned as skipped.
+        All decisions are applied in one transaction.
+        """
+        from .services import LeaveApprovalService
+
+        queryset = self.approval_scope(request)
+        if queryset is None:
+            return Response({
+                "error": 1,
+                "message": "Permission denied. Only admins and managers can approve/reject leaves."
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = BulkLeaveDecisionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({
+                "error": 1,
+                "message": "Validation failed",
+                "errors": serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        leaves = LeaveApprovalService.decide(
+            queryset.filter(id__in=data['ids']), data['action'],
+            user=request.user, rejection_reason=data['rejection_reason']
+        )
+        decided_ids = [leave.id for leave in leaves]
+
+        return Response({
+            "error": 0,
+            "data": {
+                "message": f"{len(decided_ids)} leaves {data['action']}d successfully",
+                "status": 'Approved' if data['action'] == 'approve' else 'Rejected',
+                "leave_ids": decided_ids,
+                "skipped_ids": sorted(set(data['ids']) - set(decided_ids)),
+                "employees": len({leave.employee_id for leave in leaves}),
+                "rejection_reason": data['rejection_reason'] if data['action'] == 'reject' else None
+            }
+        }, status=status.HTTP_200_OK)
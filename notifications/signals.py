@@ -40,89 +40,7 @@ def handle_payslip_notification(sender, instance, created, **kwargs):
 @receiver(post_save, sender=Attendance)
 def handle_attendance_notification(sender, instance, created, **kwargs):
     try:
-        from django.utils import timezone
-        import calendar
-
-        # 1. Daily Punch-in Notification
-        if created and instance.office_in_time:
-            # Find previous working day session
-            prev_attendance = Attendance.objects.filter(
-                employee=instance.employee,
-                date__lt=instance.date,
-                day_type='WORKING_DAY'
-            ).order_by('-date').first()
-            
-            prev_entry = "N/A"
-            prev_exit = "N/A"
-            if prev_attendance:
-                prev_entry = prev_attendance.office_in_time.strftime("%I:%M %p") if prev_attendance.office_in_time else "N/A"
-                prev_exit = prev_attendance.office_out_time.strftime("%I:%M %p") if prev_attendance.office_out_time else "N/A"
-            
-            today_entry = instance.office_in_time.strftime("%I:%M %p")
-            
-            # Check for Late Alerts (more than 4 times this month)
-            # Define "late" as after office_working_hours + 30 mins (example: 09:30 + 30m = 10:00 AM)
-            # Or just after office_working_hours? Prototype shows late on 11:05 AM.
-            
-            # Extract hour/minute from office_working_hours (e.g. "09:00")
-            wh_hour, wh_min = 9, 0
-            if instance.office_working_hours and ":" in instance.office_working_hours:
-                wh_hour, wh_min = map(int, instance.office_working_hours.split(":"))
-            
-            is_late_today = instance.office_in_time.time() > timezone.datetime.strptime(f"{wh_hour}:{wh_min}", "%H:%M").time()
-            
-            if is_late_today:
-                month_start = instance.date.replace(day=1)
-                month_end = instance.date.replace(day=calendar.monthrange(instance.date.year, instance.date.month)[1])
-                
-                # Find all late days this month
-                # For simplicity, we compare time() with the work hours
-                # In a real app we might use a field, but here we query
-                late_records = Attendance.objects.filter(
-                    employee=instance.employee,
-                    date__gte=month_start,
-                    date__lte=instance.date,
-                    office_in_time__isnull=False
-                )
-                
-                late_days = []
-                for rec in late_records:
-                    if rec.office_in_time.time() > timezone.datetime.strptime(f"{wh_hour}:{wh_min}", "%H:%M").time():
-                        late_days.append(rec.date.strftime("%dth"))
-                
-                if len(late_days) > 4:
-                    late_dates_str = ", ".join(late_days)
-                    SlackNotificationService.notify_late_alert(
-                        instance.employee,
-                        late_dates_str,
-                        today_entry,
-                        prev_entry,
-                        prev_exit
-                    )
-                    return # Skip normal daily notification if late alert sent
-
-            # Normal Daily Notification
-            SlackNotificationService.notify_daily_attendance(
-                instance.employee,
-                prev_entry,
-                prev_exit,
-                today_entry
-            )
-        
-        elif created and not instance.office_in_time:
-            # New record created but no entry time yet
-            SlackNotificationService.notify_missing_attendance(instance.employee, instance.date.strftime("%Y-%m-%d"))
-
-        # 2. Timing Update Notification (triggered when reason 'text' is provided)
-        elif not created:
-            if instance.text:
-                SlackNotificationService.notify_attendance_update(
-                    instance.employee,
-                    instance.date.strftime("%d-%m-%Y"),
-                    instance.office_in_time.strftime("%I:%M %p") if instance.office_in_time else "N/A",
-                    instance.office_out_time.strftime("%I:%M %p") if instance.office_out_time else "N/A",
-                    instance.text or "N/A"
-                )
+        SlackNotificationService.notify_attendance_saved(instance, created)
     except Exception as e:
         logger.error(f"Error in attendance notification signal: {e}")
 
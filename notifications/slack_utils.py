@@ -99,6 +99,18 @@ class SlackNotificationService:
         message = f"Hi @{employee.get_full_name()}\n Your manual attendance  {date} is {status}."
         return service.send_message(employee, message)
 
+    @staticmethod
+    def notify_timesheet_decisions(employee, dates, status="Approved"):
+        """ Hi @Name, Your timesheet entries for 22-Dec-2025, 23-Dec-2025 are status (one message per batch) """
+        if not employee.company:
+            logger.warning(f"Employee {employee.get_full_name()} has no company assigned.")
+            return False
+        service = SlackNotificationService(company=employee.company)
+        days = ", ".join(d.strftime("%d-%b-%Y") for d in sorted(dates))
+        noun = "entry" if len(dates) == 1 else "entries"
+        message = f"Hi @{employee.get_full_name()}\n Your timesheet {noun} for {days} {'is' if len(dates) == 1 else 'are'} {status}."
+        return service.send_message(employee, message)
+
     @staticmethod
     def notify_leave_applied(employee, leave_obj):
         """ Hi @Name !! You just had applied for X days of leave from Start to End ... """
@@ -136,6 +148,29 @@ class SlackNotificationService:
         )
         return service.send_message(employee, message)
 
+    @staticmethod
+    def notify_leave_decisions(employee, leaves, status_msg="Approved"):
+        """ Hi @Name !! Your leaves from A to B, C to D have been Approved . (one message per batch) """
+        if not employee.company:
+            logger.warning(f"Employee {employee.get_full_name()} has no company assigned.")
+            return False
+        if len(leaves) == 1:
+            return SlackNotificationService.notify_leave_status(employee, leaves[0], status_msg)
+        service = SlackNotificationService(company=employee.company)
+        details = "\n".join(
+            f" From:  {leave.from_date}  To:  {leave.to_date}  ({leave.no_of_days} days)"
+            for leave in sorted(leaves, key=lambda leave: leave.from_date)
+        )
+        reason = next((leave.rejection_reason for leave in leaves if leave.rejection_reason), None)
+        message = (
+            f"Hi {employee.first_name} !!\n"
+            f" Your {len(leaves)} leaves have been {status_msg} .\n"
+            f" Leave Details :\n"
+            f"{details}\n"
+            f" Message from Admin: {reason or 'N/A'}"
+        )
+        return service.send_message(employee, message)
+
     @staticmethod
     def notify_payslip_generated(employee, month_name):
         """ Hi @Name, Your salary slip is generated for month of Month . """
@@ -181,6 +216,82 @@ class SlackNotificationService:
         )
         return service.send_message(employee, message)
 
+    @staticmethod
+    def notify_attendance_saved(attendance, created):
+        """
+        Daily punch-in / late alert / missing entry for a new record, timing
+        update for a changed one with a reason. Sent on post_save, and by
+        bulk writers (punch compaction) that skip it.
+        """
+        from attendance.models import Attendance
+
+        # 1. Daily Punch-in Notification
+        if created and attendance.office_in_time:
+            # Find previous working day session
+            prev_attendance = Attendance.objects.filter(
+                employee=attendance.employee,
+                date__lt=attendance.date,
+                day_type='WORKING_DAY'
+            ).order_by('-date').first()
+
+            prev_entry = "N/A"
+            prev_exit = "N/A"
+            if prev_attendance:
+                prev_entry = prev_attendance.office_in_time.strftime("%I:%M %p") if prev_attendance.office_in_time else "N/A"
+                prev_exit = prev_attendance.office_out_time.strftime("%I:%M %p") if prev_attendance.office_out_time else "N/A"
+
+            today_entry = attendance.office_in_time.strftime("%I:%M %p")
+
+            # Late alert (more than 4 late check-ins this month). is_late is set
+            # at save time and the monthly counter lives on EmployeeMonthSummary,
+            # so the check is a single-row read; dates are fetched only to alert.
+            if attendance.is_late:
+                from attendance.services import MonthSummaryService
+                summary = MonthSummaryService.get_summary(
+                    attendance.employee, attendance.date.year, attendance.date.month
+                )
+                if summary.late_days > 4:
+                    late_dates = Attendance.objects.filter(
+                        employee=attendance.employee,
+                        date__gte=attendance.date.replace(day=1),
+                        date__lte=attendance.date,
+                        is_late=True
+                    ).order_by('date').values_list('date', flat=True)
+                    late_dates_str = ", ".join(d.strftime("%dth") for d in late_dates)
+                    # Skip normal daily notification if late alert sent
+                    return SlackNotificationService.notify_late_alert(
+                        attendance.employee,
+                        late_dates_str,
+                        today_entry,
+                        prev_entry,
+                        prev_exit
+                    )
+
+            # Normal Daily Notification
+            return SlackNotificationService.notify_daily_attendance(
+                attendance.employee,
+                prev_entry,
+                prev_exit,
+                today_entry
+            )
+
+        elif created and not attendance.office_in_time:
+            # New record created but no entry time yet
+            return SlackNotificationService.notify_missing_attendance(
+                attendance.employee, attendance.date.strftime("%Y-%m-%d")
+            )
+
+        # 2. Timing Update Notification (triggered when reason 'text' is provided)
+        elif not created and attendance.text:
+            return SlackNotificationService.notify_attendance_update(
+                attendance.employee,
+                attendance.date.strftime("%d-%m-%Y"),
+                attendance.office_in_time.strftime("%I:%M %p") if attendance.office_in_time else "N/A",
+                attendance.office_out_time.strftime("%I:%M %p") if attendance.office_out_time else "N/A",
+                attendance.text or "N/A"
+            )
+        return False
+
     @staticmethod
     def notify_welcome(employee):
         """ Sends a welcome message to the newly created employee. """
@@ -228,6 +339,25 @@ class SlackNotificationService:
         )
         return service.send_message(employee, message)
 
+    @staticmethod
+    def notify_weekly_timesheet_submitted(employee, attendances):
+        """ Name submitted N timesheet entries (Mon, 15-Sep-2025 to Fri, 19-Sep-2025), one line per day. (management channel) """
+        if not employee.company:
+            logger.warning(f"Employee {employee.get_full_name()} has no company assigned.")
+            return False
+        service = SlackNotificationService(company=employee.company)
+        lines = [
+            f" {att.date.strftime('%a, %d-%b-%Y')}: {round(att.seconds_actual_worked_time / 3600, 2)}h"
+            f"{' (WFH)' if att.is_working_from_home else ''} - {att.get_timesheet_status_display()}"
+            for att in attendances
+        ]
+        message = (
+            f"{employee.get_full_name()} submitted {len(attendances)} timesheet entries "
+            f"({attendances[0].date.strftime('%a, %d-%b-%Y')} to {attendances[-1].date.strftime('%a, %d-%b-%Y')})\n"
+            + "\n".join(lines)
+        )
+        return service.notify_management(message)
+
     @staticmethod
     def notify_manual_attendance_request(request_obj):
         """ Sends interactive manual attendance request to management channel. """
@@ -327,6 +457,18 @@ class SlackNotificationService:
         )
         return service.send_message(employee, message)
 
+    @staticmethod
+    def notify_punch_batch(company, employee_count, created_count, updated_count):
+        """ Device punch batch ingested: N employees, X new records, Y updated. (management channel) """
+        service = SlackNotificationService(company=company)
+        message = (
+            f"Device punch batch ingested\n"
+            f" Employees: {employee_count}\n"
+            f" New attendance records: {created_count}\n"
+            f" Updated attendance records: {updated_count}"
+        )
+        return service.notify_management(message)
+
     @staticmethod
     def notify_missing_attendance(employee, date=None):
         """ Hi @Name, You didn't put your Entry / Exit Time ... """
@@ -98,36 +98,34 @@ class SlackInteractionsView(APIView):
                 
                 # Check for keywords
                 # ... mapping logic ...
-                field_map = {
-                    "#standup": "standup_time",
-                    "#report": "report_time",
-                    "#lunchstart": "lunch_start_time",
-                    "#lunchend": "lunch_end_time"
+                event_map = {
+                    "#standup": "STANDUP",
+                    "#report": "REPORT",
+                    "#lunchstart": "LUNCH_START",
+                    "#lunchend": "LUNCH_END"
                 }
                 
-                target_field = None
-                for keyword, field in field_map.items():
+                target_event = None
+                for keyword, event_type in event_map.items():
                     if keyword in text.lower():
-                        target_field = field
+                        target_event = event_type
                         break
                 
-                if target_field:
+                if target_event:
                     from employees.models import Employee
-                    from attendance.models import Attendance
+                    from attendance.services import PunchEventService
                     from datetime import datetime, timezone as dt_timezone
                     
                     # Ensure employee belongs to the company associated with this Slack team
                     employee = Employee.objects.filter(slack_user_id=slack_user_id, company=company).first()
                     if employee:
                         event_dt = datetime.fromtimestamp(ts, tz=dt_timezone.utc)
-                        # ...
-                        attendance, created = Attendance.objects.get_or_create(
-                            employee=employee,
-                            date=event_dt.date()
+                        # Append to the punch log; compaction sets the matching *_time field
+                        PunchEventService.record(
+                            employee, event_dt.date(), [(target_event, '', event_dt)], source='SLACK'
                         )
-                        setattr(attendance, target_field, event_dt)
-                        attendance.save()
-                        logger.info(f"Updated {target_field} for {employee.get_full_name()} via Slack.")
+                        PunchEventService.settle(employee, event_dt.date())
+                        logger.info(f"Recorded {target_event} for {employee.get_full_name()} via Slack.")
                     else:
                         logger.warning(f"No employee found with Slack ID: {slack_user_id}. Please link the Slack ID in the Employee profile.")
 
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import SalaryStructure, Payslip, PayrollConfig
+from .models import SalaryStructure, Payslip, PayrollConfig, PayrollRun
 
 @admin.register(SalaryStructure)
 class SalaryStructureAdmin(admin.ModelAdmin):
@@ -12,7 +12,20 @@ class PayslipAdmin(admin.ModelAdmin):
     list_display = ('employee', 'month', 'year', 'net_salary', 'status')
     search_fields = ('employee__first_name', 'employee__last_name')
     list_filter = ('year', 'month', 'status')
-    readonly_fields = ('generated_at',)
+    readonly_fields = ('generated_at', 'payroll_run')
+
+@admin.register(PayrollRun)
+class PayrollRunAdmin(admin.ModelAdmin):
+    list_display = ('company', 'month', 'year', 'status', 'progress', 'created_count', 'updated_count', 'failed_count', 'finished_at')
+    list_filter = ('status', 'year', 'month', 'company')
+
+    # Started with `manage.py run_payroll` and written by PayrollRunService
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 @admin.register(PayrollConfig)
 class PayrollConfigAdmin(admin.ModelAdmin):
@@ -0,0 +1,98 @@
+"""
+Salary arithmetic shared by PayrollService.calculate_monthly_salary and
+batch payroll runs.
+
+Works on plain, picklable inputs (no ORM access), so a payroll run can
+compute chunks of employees in worker processes.
+"""
+import calendar
+from datetime import date
+from decimal import Decimal
+
+# SalaryStructure columns the calculation reads
+STRUCTURE_FIELDS = [
+    'basic_salary', 'hra', 'medical_allowance', 'conveyance_allowance',
+    'special_allowance', 'epf', 'tds',
+]
+EARNING_FIELDS = STRUCTURE_FIELDS[:5]
+
+
+def is_attended(office_in, office_out, home_in, home_out, in_time, out_time):
+    """A day counts as worked when any in/out pair is complete"""
+    return bool((office_in and office_out) or (home_in and home_out) or (in_time and out_time))
+
+
+def count_days(year, month, joining_date, holidays, attended_dates, leave_days):
+    """
+    (working_days, absent_days, paid_leave_days) of one employee-month.
+
+    Weekends, holidays and days before joining are neither; a weekday is
+    worked when attended, paid when on a paid leave, absent otherwise
+    (including Unpaid Leave). `leave_days` is {date: is_unpaid}.
+    """
+    working = absent = paid_leave = 0
+    for day in range(1, calendar.monthrange(year, month)[1] + 1):
+        curr_date = date(year, month, day)
+        if joining_date and curr_date < joining_date:
+            continue
+        if curr_date.weekday() >= 5 or curr_date in holidays:
+            continue
+        if curr_date in attended_dates:
+            working += 1
+        elif curr_date in leave_days:
+            if leave_days[curr_date]:
+                absent += 1
+            else:
+                working += 1
+                paid_leave += 1
+        else:
+            absent += 1
+    return working, absent, paid_leave
+
+
+def compute_salary(inputs, holidays):
+    """
+    Salary breakdown of one employee-month from its prepared inputs:
+    month, year, joining_date, structure ({field: Decimal}), attended_dates,
+    leave_days ({date: is_unpaid}) and balance ((total_allocated, available) or None).
+    """
+    month, year, structure = inputs['month'], inputs['year'], inputs['structure']
+    working_days, absent_days, paid_leave_days = count_days(
+        year, month, inputs['joining_date'], holidays, inputs['attended_dates'], inputs['leave_days']
+    )
+
+    gross_salary = sum((structure[field] for field in EARNING_FIELDS), Decimal('0'))
+    daily_rate = gross_salary / Decimal(calendar.monthrange(year, month)[1])
+    unpaid_leave_deduction = absent_days * daily_rate
+    statutory_deductions = structure['epf'] + structure['tds']
+    net_salary = gross_salary - statutory_deductions - unpaid_leave_deduction
+    total_allocated, remaining_balance = inputs['balance'] or (Decimal('0'), Decimal('0'))
+
+    return {
+        "month": month,
+        "year": year,
+        "gross_salary": gross_salary,
+        "working_days": working_days,
+        "absent_days": absent_days,
+        "paid_leave_days": paid_leave_days,
+        "statutory_deductions": statutory_deductions,
+        "unpaid_leave_deduction": unpaid_leave_deduction.quantize(Decimal('0.01')),
+        "net_salary": net_salary.quantize(Decimal('0.01')),
+        "leave_balance": remaining_balance,
+        "allocated_leaves": total_allocated,
+        "daily_rate": daily_rate.quantize(Decimal('0.01'))
+    }
+
+
+def compute_chunk(chunk, holidays):
+    """
+    compute_salary() over [(employee_id, inputs)], as run in a worker process.
+    Returns [(employee_id, result, error)]; one bad employee does not fail the chunk.
+    """
+    results = []
+    for employee_id, inputs in chunk:
+        try:
+            results.append((employee_id, compute_salary(inputs, holidays), None))
+        except Exception as e:
+            results.append((employee_id, None, f"{type(e).__name__}: {e}"))
+    return results
@@ -0,0 +1,23 @@
+"""
+Constants for payroll app
+"""
+import os
+
+from django.conf import settings
+
+# Batch payroll runs: worker processes (1 = compute in-process) and employees per chunk
+PAYROLL_RUN_WORKERS = getattr(settings, 'PAYROLL_RUN_WORKERS', min(os.cpu_count() or 1, 4))
+PAYROLL_RUN_CHUNK_SIZE = getattr(settings, 'PAYROLL_RUN_CHUNK_SIZE', 500)
+
+# Per-employee errors kept on a PayrollRun (the count is always exact)
+PAYROLL_RUN_MAX_ERRORS = getattr(settings, 'PAYROLL_RUN_MAX_ERRORS', 200)
+
+# Worker processes for diffs requested over HTTP; the default 1 computes in
+# the request process instead of spawning a pool per request
+PAYROLL_DIFF_REQUEST_WORKERS = getattr(settings, 'PAYROLL_DIFF_REQUEST_WORKERS', 1)
+
+# Dry-run diff report formats (first is the default)
+PAYROLL_DIFF_FORMATS = ['csv', 'ndjson']
+
+# Memoized salary calculations (PayrollService.cached_monthly_salary): cache alias
+PAYROLL_SALARY_CACHE_ALIAS = getattr(settings, 'PAYROLL_SALARY_CACHE_ALIAS', 'payroll')
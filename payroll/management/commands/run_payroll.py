@@ -0,0 +1,101 @@
+"""
+Management command to generate a month's draft payslips for a company.
+
+Creates a PayrollRun and processes every active employee of the company:
+inputs are prefetched set-based, salaries computed in a process pool and
+payslips bulk-written chunk by chunk. Draft payslips are recomputed;
+published/paid ones are left untouched. Progress and errors are kept on the
+run (admin, GET /api/payroll/runs/<id>/).
+
+With --dry-run nothing is written: the month is recomputed the same way
+and a per-employee diff against the stored payslips (net salary, unpaid
+leave deduction, working days) is streamed as CSV or NDJSON.
+
+Usage:
+    # December 2025 payroll for company 1
+    python manage.py run_payroll --company 1 --month 2025-12
+
+    # Every active company, computed in-process
+    python manage.py run_payroll --all-companies --month 2025-12 --workers 1
+
+    # Preview: employees of department 4 whose net salary moves by 100 or more
+    python manage.py run_payroll --company 1 --month 2025-12 --dry-run --department 4 --threshold 100 > diff.csv
+"""
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+
+from organizations.models import Company
+from payroll.constants import PAYROLL_DIFF_FORMATS
+from payroll.services import PayrollDiffService, PayrollRunService
+
+
+class Command(BaseCommand):
+    help = "Generate a month's draft payslips for every active employee of a company"
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--company', type=int, action='append', help='Company ID (repeatable)')
+        target.add_argument('--all-companies', action='store_true', help='Every active company')
+        parser.add_argument('--month', type=str, required=True, help='Payroll month (YYYY-MM)')
+        parser.add_argument('--workers', type=int, help='Worker processes (default: PAYROLL_RUN_WORKERS)')
+        parser.add_argument('--chunk-size', type=int, help='Employees per chunk (default: PAYROLL_RUN_CHUNK_SIZE)')
+        parser.add_argument('--dry-run', action='store_true', help='Stream a diff against stored payslips, write nothing')
+        parser.add_argument('--format', choices=PAYROLL_DIFF_FORMATS, default=PAYROLL_DIFF_FORMATS[0],
+                            help='Dry-run report format (default: csv)')
+        parser.add_argument('--department', type=int, action='append', help='Dry run: department ID (repeatable)')
+        parser.add_argument('--threshold', type=str, help='Dry run: only net salary changes of at least this amount')
+
+    def handle(self, *args, **options):
+        try:
+            month = datetime.strptime(options['month'], '%Y-%m')
+        except ValueError:
+            raise CommandError('--month must be in YYYY-MM format')
+
+        companies = Company.objects.filter(is_active=True)
+        if options['company']:
+            companies = Company.objects.filter(id__in=options['company'])
+        if not companies.exists():
+            raise CommandError('No matching company')
+
+        if options['dry_run']:
+            return self.dry_run(companies, month, options)
+        if options['department'] or options['threshold'] is not None:
+            raise CommandError('--department and --threshold only apply to --dry-run')
+
+        for company in companies:
+            run = PayrollRunService.start(
+                company, month.month, month.year,
+                workers=options['workers'], chunk_size=options['chunk_size'],
+            )
+            seconds = (run.finished_at - run.started_at).total_seconds()
+            self.stdout.write(
+                f"{company.name} {options['month']} (run {run.id}): {run.total_employees} employees, "
+                f"payslips created: {run.created_count}, updated: {run.updated_count}, "
+                f"skipped: {run.skipped_count}, failed: {run.failed_count} in {seconds:.1f}s"
+            )
+            for error in run.errors[:10]:
+                self.stdout.write(self.style.WARNING(f"  employee {error['employee_id']}: {error['error']}"))
+        self.stdout.write(self.style.SUCCESS('Done'))
+
+    def dry_run(self, companies, month, options):
+        """Stream the diff report of every company to stdout as it is computed"""
+        threshold = None
+        if options['threshold'] is not None:
+            try:
+                threshold = Decimal(options['threshold'])
+            except InvalidOperation:
+                raise CommandError('--threshold must be a number')
+
+        def rows():
+            for company in companies:
+                yield from PayrollDiffService.rows(
+                    company, month.month, month.year,
+                    department_ids=options['department'], threshold=threshold,
+                    workers=options['workers'], chunk_size=options['chunk_size'],
+                )
+
+        stream = PayrollDiffService.stream_ndjson if options['format'] == 'ndjson' else PayrollDiffService.stream_csv
+        for chunk in stream(rows()):
+            self.stdout.write(chunk, ending='')
@@ -102,6 +102,14 @@ class Payslip(models.Model):
     misc_deduction_2 = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
+    payroll_run = models.ForeignKey(
+        'PayrollRun',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='payslips',
+        help_text="Batch run that generated this payslip"
+    )
     generated_at = models.DateTimeField(auto_now_add=True)
     generated_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -118,6 +126,64 @@ class Payslip(models.Model):
     def __str__(self):
         return f"Payslip {self.month}/{self.year} - {self.employee.get_full_name()}"
 
+class PayrollRun(models.Model):
+    """
+    One batch payroll run: draft payslips for every active employee of a
+    company for a month, with progress and per-employee errors.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    company = models.ForeignKey(
+        'organizations.Company',
+        on_delete=models.CASCADE,
+        related_name='payroll_runs'
+    )
+    month = models.IntegerField()  # 1-12
+    year = models.IntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+
+    # Progress
+    total_employees = models.IntegerField(default=0)
+    processed = models.IntegerField(default=0)
+    created_count = models.IntegerField(default=0, help_text="New payslips")
+    updated_count = models.IntegerField(default=0, help_text="Draft payslips recomputed")
+    skipped_count = models.IntegerField(default=0, help_text="No active salary structure, or payslip already published/paid")
+    failed_count = models.IntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True, help_text="[{employee_id, error}] (first ones only)")
+
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='payroll_runs',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['company', 'year', 'month'], name='payroll_run_company_month'),
+        ]
+
+    def __str__(self):
+        return f"Payroll run {self.month}/{self.year} - {self.company} ({self.status})"
+
+    @property
+    def progress(self):
+        """Share of employees processed, 0-100"""
+        if not self.total_employees:
+            return 100 if self.status == 'completed' else 0
+        return round(self.processed * 100 / self.total_employees)
+
+
 class PayrollConfig(models.Model):
     """
     Generic payroll configurations.
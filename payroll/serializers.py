@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import SalaryStructure, Payslip, PayrollConfig
+from .models import SalaryStructure, Payslip, PayrollConfig, PayrollRun
 
 class PayslipSummarySerializer(serializers.ModelSerializer):
     month_name = serializers.SerializerMethodField()
@@ -209,3 +209,16 @@ class PayrollConfigSerializer(serializers.ModelSerializer):
     class Meta:
         model = PayrollConfig
         fields = ['key', 'value', 'description']
+
+
+class PayrollRunSerializer(serializers.ModelSerializer):
+    company_name = serializers.CharField(source='company.name', read_only=True)
+    progress = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = PayrollRun
+        fields = [
+            'id', 'company', 'company_name', 'month', 'year', 'status', 'progress',
+            'total_employees', 'processed', 'created_count', 'updated_count',
+            'skipped_count', 'failed_count', 'errors', 'started_at', 'finished_at', 'created_at'
+        ]
@@ -1,12 +1,12 @@
-from datetime import date, timedelta, datetime
+from datetime import date, datetime
 import calendar
 from django.db.models import Sum, Q
 from decimal import Decimal
 from leaves.models import Leave, LeaveBalance, LeaveQuota
-from holidays.models import Holiday
-from attendance.models import Attendance
-from attendance.services import AttendanceCalculationService
+from holidays.services import WorkCalendar
+from attendance.services import AttendanceCalculationService, AttendanceArchiveService
 from .models import SalaryStructure, Payslip
+from .calculation import STRUCTURE_FIELDS, compute_salary, is_attended
 
 class PayrollService:
     @staticmethod
@@ -15,103 +15,415 @@ class PayrollService:
         Calculates the salary for an employee for a specific month.
         Automated based on Attendance and Approved Leaves.
         """
-        # 1. Get Salary Structure
-        salary_structure = SalaryStructure.objects.filter(employee=employee, is_active=True).first()
-        if not salary_structure:
+        holidays, inputs = PayrollService.load_inputs([employee], month, year)
+        if employee.id not in inputs:
+            # No active salary structure
             return None
+        return compute_salary(inputs[employee.id], holidays)
+
+    @staticmethod
+    def cached_monthly_salary(employee, month, year):
+        """
+        calculate_monthly_salary() memoized in the payroll cache (see
+        PAYROLL_SALARY_CACHE_ALIAS). The key carries input_versions(), so
+        any change to the inputs misses and recomputes; superseded entries
+        age out through the cache's TTL and MAX_ENTRIES.
+        """
+        import hashlib
+        from django.core.cache import caches
+        from .constants import PAYROLL_SALARY_CACHE_ALIAS
+
+        cache = caches[PAYROLL_SALARY_CACHE_ALIAS]
+        versions = PayrollService.input_versions(employee, month, year)
+        digest = hashlib.sha1(repr(versions).encode()).hexdigest()
+        key = f"payroll:salary:{employee.id}:{year}:{month}:{digest}"
+
+        cached = cache.get(key)
+        if cached is not None:
+            return cached[0]
+        result = PayrollService.calculate_monthly_salary(employee, month, year)
+        # Wrapped so a None result (no salary structure) is cached too
+        cache.set(key, (result,))
+        return result
+
+    @staticmethod
+    def input_versions(employee, month, year):
+        """
+        Version stamps of everything calculate_monthly_salary() reads, in one
+        query: (max updated_at, row count) of the employee's attendance and
+        leaves in the month, salary structures, leave balances of the year
+        and the month's holidays, plus the joining date. Counts catch
+        deletes, which leave no updated_at behind.
+        """
+        from django.db.models import DateTimeField, Func, IntegerField, OuterRef, Subquery
+        from employees.models import Employee
+        from holidays.models import Holiday
 
-        # 2. Get Month Range
         _, last_day = calendar.monthrange(year, month)
         start_date = date(year, month, 1)
         end_date = date(year, month, last_day)
-        
-        # 3. Calculate Attendance/Working Days automatically
-        working_days_count = 0
-        absent_days_count = 0
-        total_days = last_day
-        
-        # Fetch all attendance records for this month once to avoid repeated DB hits
-        attendance_records = {a.date: a for a in Attendance.objects.filter(
-            employee=employee, date__range=[start_date, end_date]
-        )}
-        
-        # Fetch leaves and holidays
-        holidays = set(Holiday.objects.filter(
-            date__range=[start_date, end_date], is_active=True
-        ).values_list('date', flat=True))
-        
-        # Approved leaves
-        approved_leaves = Leave.objects.filter(
-            employee=employee,
+        attendance = AttendanceArchiveService.queryset_for_range(start_date, end_date).model
+
+        sources = {
+            'attendance': attendance.objects.filter(employee_id=OuterRef('pk'), date__gte=start_date, date__lte=end_date),
+            'leave': Leave.objects.filter(employee_id=OuterRef('pk'), from_date__lte=end_date, to_date__gte=start_date),
+            'structure': SalaryStructure.objects.filter(employee_id=OuterRef('pk')),
+            'balance': LeaveBalance.objects.filter(employee_id=OuterRef('pk'), year=year),
+            'holiday': Holiday.objects.filter(date__gte=start_date, date__lte=end_date),
+        }
+        annotations = {}
+        for name, queryset in sources.items():
+            # Plain MAX()/COUNT() functions, not aggregates, so no GROUP BY: one row per subquery
+            queryset = queryset.order_by()
+            annotations[f'{name}_updated'] = Subquery(queryset.annotate(
+                stamp=Func('updated_at', function='MAX', output_field=DateTimeField())
+            ).values('stamp')[:1])
+            annotations[f'{name}_rows'] = Subquery(queryset.annotate(
+                rows=Func('id', function='COUNT', output_field=IntegerField())
+            ).values('rows')[:1])
+        row = Employee.objects.filter(pk=employee.pk).annotate(**annotations).values(
+            'joining_date', *annotations
+        ).first()
+        return tuple(sorted((row or {}).items()))
+
+    @staticmethod
+    def load_inputs(employees, month, year):
+        """
+        Prefetch everything the salary calculation reads for some employees
+        with one query per source: active salary structures, the month's
+        attendance, approved leaves and leave balances (holidays come from
+        WorkCalendar). Returns (holidays, {employee_id: inputs}) with plain,
+        picklable inputs for payroll.calculation; employees without an
+        active salary structure are left out.
+        """
+        _, last_day = calendar.monthrange(year, month)
+        start_date = date(year, month, 1)
+        end_date = date(year, month, last_day)
+        joining_dates = {employee.id: employee.joining_date for employee in employees}
+        employee_ids = list(joining_dates)
+
+        # The lowest-id active structure, as .first() picked per employee
+        structures = {}
+        for row in SalaryStructure.objects.filter(
+            employee_id__in=employee_ids, is_active=True
+        ).order_by('-id').values('employee_id', *STRUCTURE_FIELDS):
+            structures[row.pop('employee_id')] = row
+
+        attended = {}
+        for emp_id, day, *times in AttendanceArchiveService.queryset_for_range(start_date, end_date).filter(
+            employee_id__in=list(structures)
+        ).values_list(
+            'employee_id', 'date', 'office_in_time', 'office_out_time',
+            'home_in_time', 'home_out_time', 'in_time', 'out_time'
+        ):
+            if is_attended(*times):
+                attended.setdefault(emp_id, set()).add(day)
+
+        leaves = {}
+        for leave in Leave.objects.filter(
+            employee_id__in=list(structures),
             status='Approved',
             from_date__lte=end_date,
             to_date__gte=start_date
+        ).only('id', 'employee_id', 'leave_type', 'from_date', 'to_date'):
+            leaves.setdefault(leave.employee_id, []).append(leave)
+
+        balances = {}
+        for balance in LeaveBalance.objects.filter(employee_id__in=list(structures), year=year).order_by('-id'):
+            balances[balance.employee_id] = (balance.total_allocated, balance.available)
+
+        inputs = {}
+        for emp_id, structure in structures.items():
+            leave_dates = WorkCalendar.leave_index(leaves.get(emp_id, ()), start_date, end_date)
+            inputs[emp_id] = {
+                "month": month,
+                "year": year,
+                "joining_date": joining_dates[emp_id],
+                "structure": structure,
+                "attended_dates": attended.get(emp_id, set()),
+                "leave_days": {
+                    day: leave.leave_type == Leave.LeaveType.UNPAID_LEAVE for day, leave in leave_dates.items()
+                },
+                "balance": balances.get(emp_id),
+            }
+        return set(WorkCalendar.holidays_between(start_date, end_date)), inputs
+
+
+class PayrollRunService:
+    """
+    Company-wide payroll for a month as one PayrollRun.
+
+    Inputs for all employees are prefetched with a handful of set-based
+    queries (PayrollService.load_inputs), the arithmetic is split into
+    chunks computed in a process pool, and each chunk's draft payslips are
+    written with one bulk_create(update_conflicts=True). Progress and
+    per-employee errors are saved on the run after every chunk.
+    Published/paid payslips are never overwritten.
+    """
+
+    # Payslip columns a run writes (and rewrites on draft payslips)
+    PAYSLIP_FIELDS = [
+        'basic_salary', 'hra', 'medical_allowance', 'conveyance_allowance', 'special_allowance',
+        'epf', 'tds', 'unpaid_leave_deduction', 'total_earnings', 'total_deductions', 'net_salary',
+        'working_days', 'leaves_taken', 'paid_leaves', 'unpaid_leaves', 'leave_balance',
+        'allocated_leaves', 'final_leave_balance', 'payroll_run', 'generated_by',
+    ]
+
+    @staticmethod
+    def start(company, month, year, user=None, **options):
+        """Create a run and execute it"""
+        from .models import PayrollRun
+
+        run = PayrollRun.objects.create(company=company, month=month, year=year, created_by=user)
+        return PayrollRunService.execute(run, **options)
+
+    @staticmethod
+    def execute(run, workers=None, chunk_size=None):
+        """Process every active employee of the run's company; returns the run"""
+        from django.db import transaction
+        from django.utils import timezone
+
+        employees = list(PayrollRunService.employees(run.company_id).only('id', 'joining_date'))
+        run.status = 'running'
+        run.started_at = timezone.now()
+        run.total_employees = len(employees)
+        run.processed = run.created_count = run.updated_count = run.skipped_count = run.failed_count = 0
+        run.errors = []
+        run.save()
+
+        try:
+            holidays, inputs = PayrollService.load_inputs(employees, run.month, run.year)
+            locked = set(Payslip.objects.filter(
+                employee_id__in=list(inputs), month=run.month, year=run.year
+            ).exclude(status='draft').values_list('employee_id', flat=True))
+            run.skipped_count = len(employees) - len(inputs) + len(locked)
+            run.processed = run.skipped_count
+
+            todo = [(emp_id, data) for emp_id, data in inputs.items() if emp_id not in locked]
+            for results in PayrollRunService.compute(todo, holidays, workers, chunk_size):
+                with transaction.atomic():
+                    PayrollRunService._write(run, results, inputs)
+                run.save(update_fields=[
+                    'processed', 'created_count', 'updated_count', 'skipped_count', 'failed_count', 'errors'
+                ])
+            run.status = 'completed'
+        except Exception as e:
+            run.status = 'failed'
+            PayrollRunService._add_error(run, None, f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            run.finished_at = timezone.now()
+            run.save()
+        return run
+
+    @staticmethod
+    def employees(company_id, department_ids=None):
+        """Active employees a run of the company covers"""
+        from employees.models import Employee
+
+        employees = Employee.objects.filter(company_id=company_id, is_active=True)
+        if department_ids:
+            employees = employees.filter(department_id__in=department_ids)
+        return employees
+
+    @staticmethod
+    def compute(items, holidays, workers=None, chunk_size=None):
+        """
+        Yield compute_chunk() results for [(employee_id, inputs)] chunk by
+        chunk, in a process pool when there is more than one chunk and
+        worker. Workers are spawned (not forked) so they never share the
+        parent's database connections.
+        """
+        from .calculation import compute_chunk
+        from .constants import PAYROLL_RUN_CHUNK_SIZE, PAYROLL_RUN_WORKERS
+
+        workers = workers or PAYROLL_RUN_WORKERS
+        chunk_size = max(chunk_size or PAYROLL_RUN_CHUNK_SIZE, 1)
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+        if workers <= 1 or len(chunks) <= 1:
+            for chunk in chunks:
+                yield compute_chunk(chunk, holidays)
+            return
+
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(chunks)), mp_context=multiprocessing.get_context('spawn')
+        ) as pool:
+            for results in pool.map(compute_chunk, chunks, [holidays] * len(chunks)):
+                yield results
+
+    @staticmethod
+    def payslip(employee_id, result, inputs, run):
+        """Unsaved draft Payslip of one computed employee"""
+        structure = inputs['structure']
+        paid_leaves = Decimal(result['paid_leave_days'])
+        return Payslip(
+            employee_id=employee_id,
+            month=result['month'],
+            year=result['year'],
+            unpaid_leave_deduction=result['unpaid_leave_deduction'],
+            total_earnings=result['gross_salary'],
+            total_deductions=result['statutory_deductions'] + result['unpaid_leave_deduction'],
+            net_salary=result['net_salary'],
+            working_days=result['working_days'],
+            leaves_taken=paid_leaves + result['absent_days'],
+            paid_leaves=paid_leaves,
+            unpaid_leaves=Decimal(result['absent_days']),
+            leave_balance=result['leave_balance'],
+            allocated_leaves=result['allocated_leaves'],
+            final_leave_balance=result['leave_balance'],
+            status='draft',
+            payroll_run=run,
+            generated_by_id=run.created_by_id,
+            **structure
         )
-        
-        leave_dates = {}
-        for l in approved_leaves:
-            curr = max(l.from_date, start_date)
-            limit = min(l.to_date, end_date)
-            while curr <= limit:
-                leave_dates[curr] = l
-                curr += timedelta(days=1)
-
-        # 4. Iterate through each day to determine payment status
-        for day in range(1, last_day + 1):
-            curr_date = date(year, month, day)
-            
-            # Skip if before joining
-            if employee.joining_date and curr_date < employee.joining_date:
-                continue
-                
-            # If it's a weekend or holiday, it's a paid non-working day
-            if curr_date.weekday() >= 5 or curr_date in holidays:
-                continue
-
-            # Check attendance
-            att = attendance_records.get(curr_date)
-            leave = leave_dates.get(curr_date)
-            
-            if att and ((att.office_in_time and att.office_out_time) or 
-                       (att.home_in_time and att.home_out_time) or
-                       (att.in_time and att.out_time)):
-                working_days_count += 1
-            elif leave:
-                # If on paid leave, it counts as working/paid
-                if leave.leave_type != Leave.LeaveType.UNPAID_LEAVE:
-                    working_days_count += 1
-                else:
-                    absent_days_count += 1
+
+    @staticmethod
+    def _write(run, results, inputs):
+        """Upsert one chunk's draft payslips and update the run's counters"""
+        from django.db import connection
+
+        # Payslips published since the run started are left alone
+        existing = dict(Payslip.objects.select_for_update().filter(
+            employee_id__in=[emp_id for emp_id, _, _ in results], month=run.month, year=run.year
+        ).values_list('employee_id', 'status'))
+
+        payslips = []
+        for emp_id, result, error in results:
+            if error:
+                run.failed_count += 1
+                PayrollRunService._add_error(run, emp_id, error)
+            elif existing.get(emp_id, 'draft') != 'draft':
+                run.skipped_count += 1
             else:
-                # No attendance and no leave = Absent (Undeducted)
-                absent_days_count += 1
-
-        # 5. Financial Calculations
-        gross_salary = salary_structure.total_earnings
-        daily_rate = gross_salary / Decimal(total_days)
-        
-        unpaid_leave_deduction = absent_days_count * daily_rate
-        statutory_deductions = salary_structure.epf + salary_structure.tds
-        net_salary = gross_salary - statutory_deductions - unpaid_leave_deduction
-
-        # 6. Fetch Leave Balance Info
-        total_allocated = Decimal('0')
-        remaining_balance = Decimal('0')
-        balance_obj = LeaveBalance.objects.filter(employee=employee, year=year).first()
-        if balance_obj:
-            total_allocated = balance_obj.total_allocated
-            remaining_balance = balance_obj.available
-
-        return {
-            "month": month,
-            "year": year,
-            "gross_salary": gross_salary,
-            "working_days": working_days_count,
-            "absent_days": absent_days_count,
-            "statutory_deductions": statutory_deductions,
-            "unpaid_leave_deduction": unpaid_leave_deduction.quantize(Decimal('0.01')),
-            "net_salary": net_salary.quantize(Decimal('0.01')),
-            "leave_balance": remaining_balance,
-            "allocated_leaves": total_allocated,
-            "daily_rate": daily_rate.quantize(Decimal('0.01'))
+                payslips.append(PayrollRunService.payslip(emp_id, result, inputs[emp_id], run))
+
+        kwargs = {'update_conflicts': True, 'update_fields': PayrollRunService.PAYSLIP_FIELDS}
+        if connection.features.supports_update_conflicts_with_target:
+            kwargs['unique_fields'] = ['employee', 'month', 'year']
+        Payslip.objects.bulk_create(payslips, batch_size=500, **kwargs)
+
+        updated = sum(1 for payslip in payslips if payslip.employee_id in existing)
+        run.updated_count += updated
+        run.created_count += len(payslips) - updated
+        run.processed += len(results)
+
+    @staticmethod
+    def _add_error(run, employee_id, error):
+        from .constants import PAYROLL_RUN_MAX_ERRORS
+
+        if len(run.errors) < PAYROLL_RUN_MAX_ERRORS:
+            run.errors.append({"employee_id": employee_id, "error": error})
+
+
+class PayrollDiffService:
+    """
+    Dry run of a payroll run: recompute a company-month with the same
+    prefetch and process pool as PayrollRunService, compare with the stored
+    payslips and stream one row per employee (CSV or NDJSON). Nothing is
+    written.
+    """
+
+    # Payslip values compared (computed result key, payslip column)
+    COMPARED = [
+        ('net_salary', 'net_salary'),
+        ('unpaid_leave_deduction', 'unpaid_leave_deduction'),
+        ('working_days', 'working_days'),
+    ]
+
+    COLUMNS = ['company', 'employee_id', 'name', 'department', 'payslip_status', 'change'] + [
+        f'{column}_{suffix}' for column, _ in COMPARED for suffix in ('old', 'new', 'delta')
+    ] + ['error']
+
+    class Echo:
+        """File-like object whose write() returns the value, for csv.writer"""
+        def write(self, value):
+            return value
+
+    @staticmethod
+    def rows(company, month, year, department_ids=None, threshold=None, workers=None, chunk_size=None):
+        """
+        Yield {column: value} per employee with an active salary structure.
+
+        `change` is new (no payslip yet), changed, unchanged or error.
+        With `threshold`, only rows whose net salary moves by at least
+        that much (new payslips by their whole net salary) and errors are
+        yielded.
+        """
+        employees = {
+            employee.id: employee
+            for employee in PayrollRunService.employees(company.id, department_ids)
+            .select_related('department')
+            .only('id', 'employee_id', 'first_name', 'last_name', 'joining_date', 'department__name')
         }
+        holidays, inputs = PayrollService.load_inputs(list(employees.values()), month, year)
+        stored = {
+            row['employee_id']: row for row in Payslip.objects.filter(
+                employee_id__in=list(inputs), month=month, year=year
+            ).values('employee_id', 'status', *[column for _, column in PayrollDiffService.COMPARED])
+        }
+
+        for results in PayrollRunService.compute(sorted(inputs.items()), holidays, workers, chunk_size):
+            for emp_id, result, error in results:
+                row = PayrollDiffService.compare(result, stored.get(emp_id), error)
+                if threshold is not None and row['change'] != 'error' and abs(row['net_salary_delta']) < threshold:
+                    continue
+                employee = employees[emp_id]
+                row.update({
+                    'company': company.name,
+                    'employee_id': employee.employee_id,
+                    'name': employee.get_full_name(),
+                    'department': employee.department.name if employee.department else '',
+                })
+                yield row
+
+    @staticmethod
+    def compare(result, payslip, error=None):
+        """Diff columns of one employee's computed result against the stored payslip values"""
+        row = {
+            'payslip_status': payslip['status'] if payslip else 'missing',
+            'error': error or '',
+        }
+        changed = False
+        for key, column in PayrollDiffService.COMPARED:
+            old = payslip[column] if payslip else None
+            new = result[key] if result else None
+            delta = (new - (old or 0)) if new is not None else None
+            row.update({f'{column}_old': old, f'{column}_new': new, f'{column}_delta': delta})
+            changed = changed or bool(delta)
+        if error:
+            row['change'] = 'error'
+        elif payslip is None:
+            row['change'] = 'new'
+        else:
+            row['change'] = 'changed' if changed else 'unchanged'
+        return row
+
+    @staticmethod
+    def format_value(value, empty=''):
+        if value is None:
+            return empty
+        if isinstance(value, Decimal):
+            # Keep money exact in JSON
+            return str(value)
+        return value
+
+    @staticmethod
+    def stream_csv(rows):
+        import csv
+        writer = csv.writer(PayrollDiffService.Echo())
+        yield writer.writerow(PayrollDiffService.COLUMNS)
+        for row in rows:
+            yield writer.writerow([PayrollDiffService.format_value(row[column]) for column in PayrollDiffService.COLUMNS])
+
+    @staticmethod
+    def stream_ndjson(rows):
+        import json
+        for row in rows:
+            yield json.dumps({
+                column: PayrollDiffService.format_value(row[column], empty=None)
+                for column in PayrollDiffService.COLUMNS
+            }) + '\n'
@@ -1,3 +1,99 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from django.db.models import F
 from django.test import TestCase
 
-# Create your tests here.
+from attendance.models import Attendance
+from departments.models import Department, Designation
+from employees.models import Employee
+from leaves.models import Leave
+from organizations.models import Company
+from .models import Payslip, SalaryStructure
+from .services import PayrollDiffService, PayrollRunService, PayrollService
+
+
+class PayrollRunTest(TestCase):
+    """A company run matches the per-employee calculation and keeps published payslips"""
+
+    def setUp(self):
+        self.company = Company.objects.create(name="Acme", slug="acme")
+        department = Department.objects.create(name="Engineering")
+        designation = Designation.objects.create(name="Engineer", department=department)
+        self.employees = [
+            Employee.objects.create(
+                employee_id=f"EMP-P-{i}", first_name="Pay", last_name=str(i),
+                email=f"pay{i}@test.com", phone=f"+9199999990{i:02d}",
+                department=department, designation=designation,
+                company=self.company, joining_date=date(2025, 1, 6),
+            )
+            for i in range(3)
+        ]
+        for employee in self.employees[:2]:
+            SalaryStructure.objects.create(
+                employee=employee, basic_salary=Decimal('31000'), epf=Decimal('1800')
+            )
+        first = self.employees[0]
+        for day in (1, 2, 3):
+            Attendance.objects.create(
+                employee=first, date=date(2025, 12, day),
+                in_time=datetime(2025, 12, day, 4, tzinfo=timezone.utc),
+                out_time=datetime(2025, 12, day, 13, tzinfo=timezone.utc),
+            )
+        Leave.objects.create(
+            employee=first, leave_type='Unpaid Leave', reason="Trip", status='Approved',
+            from_date=date(2025, 12, 4), to_date=date(2025, 12, 5), no_of_days=Decimal('2'),
+        )
+
+    def test_run_writes_draft_payslips(self):
+        first, second, _ = self.employees
+        run = PayrollRunService.start(self.company, 12, 2025, workers=2, chunk_size=1)
+        self.assertEqual(
+            (run.status, run.total_employees, run.created_count, run.skipped_count, run.failed_count),
+            ('completed', 3, 2, 1, 0),
+        )
+
+        expected = PayrollService.calculate_monthly_salary(first, 12, 2025)
+        payslip = Payslip.objects.get(employee=first, month=12, year=2025)
+        self.assertEqual(
+            (payslip.net_salary, payslip.working_days, payslip.unpaid_leave_deduction, payslip.payroll_run_id),
+            (expected['net_salary'], 3, expected['unpaid_leave_deduction'], run.id),
+        )
+
+        # Re-runs recompute drafts only
+        Payslip.objects.filter(employee=second).update(status='published', net_salary=Decimal('1'))
+        run = PayrollRunService.start(self.company, 12, 2025, workers=1)
+        self.assertEqual((run.updated_count, run.skipped_count, run.progress), (1, 2, 100))
+        self.assertEqual(Payslip.objects.get(employee=second).net_salary, Decimal('1'))
+
+    def test_dry_run_diff_writes_nothing(self):
+        first, second, _ = self.employees
+        PayrollRunService.start(self.company, 12, 2025, workers=1)
+        Payslip.objects.filter(employee=first).update(net_salary=F('net_salary') - 500)
+        Payslip.objects.filter(employee=second).delete()
+
+        rows = list(PayrollDiffService.rows(self.company, 12, 2025, threshold=Decimal('100'), workers=1))
+        self.assertEqual(
+            [(row['employee_id'], row['change'], row['net_salary_delta']) for row in rows],
+            [(first.employee_id, 'changed', Decimal('500.00')),
+             (second.employee_id, 'new', rows[1]['net_salary_new'])],
+        )
+        self.assertFalse(Payslip.objects.filter(employee=second).exists())
+        lines = list(PayrollDiffService.stream_csv(iter(rows)))
+        self.assertEqual(lines[0].split(',')[:2], ['company', 'employee_id'])
+        self.assertEqual(len(lines), 3)
+
+    def test_cached_salary_follows_input_versions(self):
+        from django.core.cache import caches
+
+        caches['payroll'].clear()
+        first = self.employees[0]
+        cached = PayrollService.cached_monthly_salary(first, 12, 2025)
+        with self.assertNumQueries(2):
+            self.assertEqual(PayrollService.cached_monthly_salary(first, 12, 2025), cached)
+
+        # Attendance deleted: the stamp changes, so the next call recomputes
+        Attendance.objects.filter(employee=first, date=date(2025, 12, 1)).delete()
+        fresh = PayrollService.cached_monthly_salary(first, 12, 2025)
+        self.assertEqual(fresh['working_days'], cached['working_days'] - 1)
+        self.assertEqual(fresh, PayrollService.calculate_monthly_salary(first, 12, 2025))
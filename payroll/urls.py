@@ -1,7 +1,10 @@
 from django.urls import path
-from .views import UserSalaryInfoView, GenericConfigurationView
+from .views import UserSalaryInfoView, GenericConfigurationView, PayrollRunView, PayrollDiffView
 
 urlpatterns = [
     path('user-salary-info/', UserSalaryInfoView.as_view(), name='user-salary-info'),
     path('generic-configuration/', GenericConfigurationView.as_view(), name='generic-configuration'),
+    path('runs/', PayrollRunView.as_view(), name='payroll-runs'),
+    path('runs/diff/', PayrollDiffView.as_view(), name='payroll-run-diff'),
+    path('runs/<int:pk>/', PayrollRunView.as_view(), name='payroll-run-detail'),
 ]
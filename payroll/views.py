@@ -1,14 +1,15 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from .models import SalaryStructure, Payslip, PayrollConfig
-from .serializers import SalaryStructureSerializer, PayslipSerializer, PayslipSummarySerializer, SalaryOverviewSerializer, PayrollConfigSerializer
-from .services import PayrollService
+from .models import SalaryStructure, Payslip, PayrollConfig, PayrollRun
+from .serializers import SalaryStructureSerializer, PayslipSerializer, PayslipSummarySerializer, SalaryOverviewSerializer, PayrollConfigSerializer, PayrollRunSerializer
+from .services import PayrollService, PayrollDiffService
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from employees.models import Employee
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.http import StreamingHttpResponse
 
 class UserSalaryInfoView(APIView):
     """
@@ -39,6 +40,7 @@ class UserSalaryInfoView(APIView):
                             "bank_details": openapi.Schema(type=openapi.TYPE_OBJECT),
                             "payslip_months": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
                             "selected_payslip": openapi.Schema(type=openapi.TYPE_OBJECT),
+                            "current_month_preview": openapi.Schema(type=openapi.TYPE_OBJECT),
                         }
                     )
                 }
@@ -103,7 +105,11 @@ class UserSalaryInfoView(APIView):
             # Sidebar list (Summary data)
             "payslip_months": PayslipSummarySerializer(all_payslips, many=True).data,
             # Main detail card (Full data)
-            "selected_payslip": PayslipSerializer(selected_payslip).data if selected_payslip else None
+            "selected_payslip": PayslipSerializer(selected_payslip).data if selected_payslip else None,
+            # Live calculation for the running month (memoized on its inputs' versions)
+            "current_month_preview": PayrollService.cached_monthly_salary(
+                employee, timezone.localdate().month, timezone.localdate().year
+            )
         }
         
         return Response({
@@ -164,3 +170,113 @@ class GenericConfigurationView(APIView):
             "error": False,
             "data": merged_data
         })
+
+class PayrollRunView(APIView):
+    """
+    Batch payroll runs and their progress (Admin only).
+    Runs are started with `python manage.py run_payroll`.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="List payroll runs, or one run's progress and errors (Admin only).",
+        manual_parameters=[
+            openapi.Parameter('company', openapi.IN_QUERY, description="Company ID", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('month', openapi.IN_QUERY, description="Month (1-12)", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('year', openapi.IN_QUERY, description="Year (e.g. 2025)", type=openapi.TYPE_INTEGER),
+        ],
+        responses={200: PayrollRunSerializer(many=True)}
+    )
+    def get(self, request, pk=None):
+        if not (request.user.is_staff or request.user.is_superuser):
+            return Response({"error": 1, "message": "Permission denied"}, status=403)
+
+        runs = PayrollRun.objects.select_related('company')
+        if pk is not None:
+            return Response({
+                "error": 0,
+                "data": PayrollRunSerializer(get_object_or_404(runs, pk=pk)).data
+            })
+
+        for param in ('company', 'month', 'year'):
+            value = request.query_params.get(param)
+            if value:
+                if not value.isdigit():
+                    return Response({"error": 1, "message": f"Invalid {param}"}, status=400)
+                runs = runs.filter(**{f"{param}_id" if param == 'company' else param: int(value)})
+        return Response({
+            "error": 0,
+            "data": PayrollRunSerializer(runs[:50], many=True).data
+        })
+
+
+class PayrollDiffView(APIView):
+    """
+    Dry run of a payroll run (Admin only): recomputes a company-month and
+    streams a per-employee diff against the stored payslips. Nothing is written.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Stream a per-employee diff of recomputed vs stored payslips as CSV or NDJSON (Admin only).",
+        manual_parameters=[
+            openapi.Parameter('company', openapi.IN_QUERY, description="Company ID", type=openapi.TYPE_INTEGER, required=True),
+            openapi.Parameter('month', openapi.IN_QUERY, description="Month (1-12)", type=openapi.TYPE_INTEGER, required=True),
+            openapi.Parameter('year', openapi.IN_QUERY, description="Year (e.g. 2025)", type=openapi.TYPE_INTEGER, required=True),
+            openapi.Parameter('department', openapi.IN_QUERY, description="Department ID (repeatable)", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('threshold', openapi.IN_QUERY, description="Only net salary changes of at least this amount", type=openapi.TYPE_NUMBER),
+            openapi.Parameter('export_format', openapi.IN_QUERY, description="csv (default) or ndjson", type=openapi.TYPE_STRING),
+        ],
+        responses={200: openapi.Response("Streamed file")}
+    )
+    def get(self, request):
+        """
+        GET /api/payroll/runs/diff/?company=1&month=12&year=2025&department=4&threshold=100&export_format=csv
+        """
+        from decimal import Decimal, InvalidOperation
+        from organizations.models import Company
+        from .constants import PAYROLL_DIFF_FORMATS, PAYROLL_DIFF_REQUEST_WORKERS
+
+        if not (request.user.is_staff or request.user.is_superuser):
+            return Response({"error": 1, "message": "Permission denied"}, status=403)
+
+        export_format = request.query_params.get('export_format', PAYROLL_DIFF_FORMATS[0]).lower()
+        if export_format not in PAYROLL_DIFF_FORMATS:
+            return Response({
+                "error": 1,
+                "message": f"export_format must be one of: {', '.join(PAYROLL_DIFF_FORMATS)}"
+            }, status=400)
+
+        params = {}
+        for param in ('company', 'month', 'year'):
+            value = request.query_params.get(param, '')
+            if not value.isdigit():
+                return Response({"error": 1, "message": f"{param} is required and must be a number"}, status=400)
+            params[param] = int(value)
+        if not 1 <= params['month'] <= 12:
+            return Response({"error": 1, "message": "month must be between 1 and 12"}, status=400)
+
+        departments = request.query_params.getlist('department')
+        if not all(value.isdigit() for value in departments):
+            return Response({"error": 1, "message": "Invalid department"}, status=400)
+        threshold = request.query_params.get('threshold')
+        if threshold is not None:
+            try:
+                threshold = Decimal(threshold)
+            except InvalidOperation:
+                return Response({"error": 1, "message": "Invalid threshold"}, status=400)
+
+        company = get_object_or_404(Company, id=params['company'])
+        rows = PayrollDiffService.rows(
+            company, params['month'], params['year'],
+            department_ids=[int(value) for value in departments], threshold=threshold,
+            workers=PAYROLL_DIFF_REQUEST_WORKERS,
+        )
+        if export_format == 'ndjson':
+            response = StreamingHttpResponse(PayrollDiffService.stream_ndjson(rows), content_type='application/x-ndjson')
+        else:
+            response = StreamingHttpResponse(PayrollDiffService.stream_csv(rows), content_type='text/csv')
+        response['Content-Disposition'] = (
+            f'attachment; filename="payroll_diff_{params["year"]}_{params["month"]:02d}.{export_format}"'
+        )
+        return response